@@ -264,6 +264,38 @@ def upgrade_db_structure():
             )
         """)
 
+        def create_index_if_not_exists(name, sql):
+            try:
+                c.execute(sql)
+            except Exception as e:
+                logger.warning(f"Impossible de créer l'index {name}: {e}")
+
+        # Index unique utilisé par l'upsert (ON CONFLICT) des lignes d'inventaire.
+        # Échoue sans bloquer si la base contient déjà des doublons.
+        create_index_if_not_exists("idx_buvette_inventaire_lignes_inv_article", """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_buvette_inventaire_lignes_inv_article
+            ON buvette_inventaire_lignes(inventaire_id, article_id)
+        """)
+
+        # Index pour list_mouvements (tri par date, jointures articles/événements)
+        create_index_if_not_exists("idx_buvette_mouvements_date", """
+            CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_date
+            ON buvette_mouvements(date_mouvement DESC)
+        """)
+        create_index_if_not_exists("idx_buvette_mouvements_article", """
+            CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_article
+            ON buvette_mouvements(article_id)
+        """)
+        create_index_if_not_exists("idx_buvette_mouvements_event", """
+            CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_event
+            ON buvette_mouvements(event_id)
+        """)
+        # Index pour les listes triées par nom (stock, listes déroulantes)
+        create_index_if_not_exists("idx_buvette_articles_name", """
+            CREATE INDEX IF NOT EXISTS idx_buvette_articles_name
+            ON buvette_articles(name)
+        """)
+
         conn.commit()
         conn.close()
         messagebox.showinfo("Base de données", "La structure de la base a été mise à jour avec succès.")
@@ -613,6 +645,10 @@ def init_db():
                 FOREIGN KEY (article_id) REFERENCES buvette_articles(id)
             )
         """)
+        c.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_buvette_inventaire_lignes_inv_article
+            ON buvette_inventaire_lignes(inventaire_id, article_id)
+        """)
         c.execute("""
             CREATE TABLE IF NOT EXISTS buvette_mouvements (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -626,6 +662,22 @@ def init_db():
                 FOREIGN KEY (event_id) REFERENCES events(id)
             )
         """)
+        c.execute("""
+            CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_date
+            ON buvette_mouvements(date_mouvement DESC)
+        """)
+        c.execute("""
+            CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_article
+            ON buvette_mouvements(article_id)
+        """)
+        c.execute("""
+            CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_event
+            ON buvette_mouvements(event_id)
+        """)
+        c.execute("""
+            CREATE INDEX IF NOT EXISTS idx_buvette_articles_name
+            ON buvette_articles(name)
+        """)
         c.execute("""
             CREATE TABLE IF NOT EXISTS buvette_recettes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
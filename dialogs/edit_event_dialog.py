@@ -4,6 +4,7 @@ from tkcalendar import DateEntry
 import pandas as pd
 from dialogs.edit_field_dialog import EditFieldDialog
 from db.db import get_connection, get_df_or_sql
+from modules.dropdowns import invalidate_events
 from utils.error_handler import handle_errors
 
 # Optionally handle DataSource if present
@@ -97,6 +98,7 @@ class EditEventDialog(tk.Toplevel):
             conn.commit()
         finally:
             conn.close()
+        invalidate_events()
         if self.on_save:
             self.on_save()
         self.destroy()
\ No newline at end of file
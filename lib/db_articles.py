@@ -260,6 +260,11 @@ def create_article(name, categorie, unite=None, contenance=None, commentaire=Non
         
         article_id = cursor.lastrowid
         conn.commit()
+        # Refresh the article dropdowns and stock listing cached by modules
+        from modules.dropdowns import invalidate_articles
+        from modules.stock_tab import invalidate_stock_listing
+        invalidate_articles()
+        invalidate_stock_listing()
         print(f"✓ Created article '{name}' with id {article_id}")
         return article_id
     finally:
@@ -289,6 +294,9 @@ def update_article_stock(article_id, stock):
             WHERE id = ?
         """, (stock, article_id))
         conn.commit()
+        # Invalidate stock read caches held by modules.buvette_db
+        from modules.stock_db import notify_stock_changed
+        notify_stock_changed(article_id)
         print(f"✓ Updated stock for article id {article_id} to {stock}")
         return True
     finally:
@@ -110,22 +110,20 @@ class MainApp(tk.Tk):
             print(f"Warning: Could not determine DB path for schema check: {e}")
 
         # Ensure stock tables exist early (best-effort).
-        # Prefer to use the application's connection to avoid conflicting DB handles.
+        # Runs on the shared pooled connection, which stays open for later use.
         try:
             from modules.stock_db import ensure_stock_tables
-            try:
-                conn = get_connection()
-                ensure_stock_tables(conn)
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-            except Exception:
-                # fallback to module-managed connection
-                ensure_stock_tables()
+            ensure_stock_tables()
         except Exception as e:
             print(f"Warning: Could not initialize stock tables: {e}")
 
+        # Periodic WAL checkpoint / PRAGMA optimize on a background connection
+        try:
+            from modules.db_api import start_maintenance
+            start_maintenance()
+        except Exception as e:
+            print(f"Warning: Could not start database maintenance: {e}")
+
         # Build UI
         self.create_menu()
         self.create_home_buttons()
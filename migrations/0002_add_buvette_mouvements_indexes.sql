@@ -0,0 +1,11 @@
+-- Migration: Add indexes used by the buvette mouvements listing
+-- list_mouvements sorts on date_mouvement and joins on article_id / event_id;
+-- without these indexes every call is a full scan plus a temporary sort.
+-- buvette_inventaire_lignes(inventaire_id, article_id) is already covered by
+-- idx_buvette_inventaire_lignes_inv_article.
+-- Date: 2025-11-10
+-- Author: Performance review
+
+CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_date ON buvette_mouvements(date_mouvement DESC);
+CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_article ON buvette_mouvements(article_id);
+CREATE INDEX IF NOT EXISTS idx_buvette_mouvements_event ON buvette_mouvements(event_id);
@@ -26,7 +26,8 @@ from modules.buvette_db import (
     list_articles, insert_article, update_article, delete_article,
     list_achats, insert_achat, update_achat, delete_achat,
     get_article_by_id, get_achat_by_id,
-    list_mouvements, insert_mouvement, update_mouvement, delete_mouvement, get_mouvement_by_id,
+    yield_mouvements, insert_mouvement, update_mouvement, delete_mouvement,
+    get_mouvement_by_id,
     list_articles_names, set_article_stock, ensure_stock_column
 )
 import modules.buvette_inventaire_db as inv_db
@@ -265,7 +266,7 @@ class BuvetteModule:
         try:
             for row in self.inventaires_tree.get_children():
                 self.inventaires_tree.delete(row)
-            for inv in inv_db.list_inventaires():
+            for inv in inv_db.yield_inventaires():
                 self.inventaires_tree.insert("", "end", iid=inv["id"], values=(inv["date_inventaire"], inv["type_inventaire"], inv["commentaire"]))
         except Exception as e:  # catch tkinter.TclError or others if widget destroyed mid-iteration
             return
@@ -278,7 +279,7 @@ class BuvetteModule:
         sel = self.inventaires_tree.focus()
         if sel:
             inv = None
-            for i in inv_db.list_inventaires():
+            for i in inv_db.yield_inventaires():
                 if str(i["id"]) == str(sel):
                     inv = i
                     break
@@ -358,7 +359,7 @@ class BuvetteModule:
         try:
             for row in self.mouvements_tree.get_children():
                 self.mouvements_tree.delete(row)
-            for mvt in list_mouvements():
+            for mvt in yield_mouvements():
                 self.mouvements_tree.insert(
                     "", "end", iid=mvt["id"],
                     values=(mvt["date"], mvt["article_name"], mvt["article_contenance"] if "article_contenance" in mvt.keys() and mvt["article_contenance"] is not None else "", mvt["type"], mvt["quantite"], mvt["commentaire"])
@@ -495,10 +496,16 @@ class BuvetteModule:
             return
         try:
             # Protection contre None pour les agrégations
-            achats = sum(int(a["quantite"] or 0) for a in list_achats())
-            mvts_entree = sum(int(m["quantite"] or 0) for m in list_mouvements() if m["type"] == "entrée")
-            mvts_sortie = sum(int(m["quantite"] or 0) for m in list_mouvements() if m["type"] == "sortie")
-            invs = sum(int(l["quantite"] or 0) for inv in inv_db.list_inventaires() for l in inv_db.list_lignes_inventaire(inv["id"]))
+            # Totals only: skip the article joins
+            achats = sum(int(a["quantite"] or 0) for a in list_achats(with_article=False))
+            # Single streamed pass over the mouvements for both totals
+            mvts_entree = mvts_sortie = 0
+            for m in yield_mouvements(with_article=False):
+                if m["type"] == "entrée":
+                    mvts_entree += int(m["quantite"] or 0)
+                elif m["type"] == "sortie":
+                    mvts_sortie += int(m["quantite"] or 0)
+            invs = sum(int(l["quantite"] or 0) for inv in inv_db.yield_inventaires() for l in inv_db.list_lignes_inventaire(inv["id"], with_article=False))
             txt = f"Total achats : {achats}\n"
             txt += f"Total mouvements entrée : {mvts_entree}\n"
             txt += f"Total mouvements sortie : {mvts_sortie}\n"
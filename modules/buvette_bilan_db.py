@@ -7,12 +7,12 @@ STANDARDIZATION (PR copilot/audit-db-access-standardization):
 - Added docstrings and error handling
 
 TODO (audit/fixes-buvette):
-- All functions normalized to return dicts via rows_to_dicts/row_to_dict
+- All functions normalized to return dicts via fetch_dicts/row_to_dict
 - Review reports/TODOs.md for additional audit findings
 """
 
 from db.db import get_connection
-from utils.db_helpers import rows_to_dicts, row_to_dict
+from utils.db_helpers import row_to_dict, fetch_dicts
 from utils.app_logger import get_logger
 import sqlite3
 
@@ -27,8 +27,7 @@ def list_evenements():
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("SELECT id, name, date FROM events ORDER BY date DESC").fetchall()
-        return rows_to_dicts(rows)
+        return fetch_dicts(conn, "SELECT id, name, date FROM events ORDER BY date DESC")
     finally:
         if conn:
             conn.close()
@@ -59,14 +58,13 @@ def get_lignes_inventaire(inv_id):
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("""
+        return fetch_dicts(conn, """
             SELECT l.*, a.name as article_name, a.categorie, a.unite
             FROM buvette_inventaire_lignes l
             LEFT JOIN buvette_articles a ON l.article_id = a.id
             WHERE l.inventaire_id=?
             ORDER BY a.name
-        """, (inv_id,)).fetchall()
-        return rows_to_dicts(rows)
+        """, (inv_id,))
     finally:
         if conn:
             conn.close()
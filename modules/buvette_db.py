@@ -20,14 +20,25 @@ STANDARDIZATION (PR copilot/audit-db-access-standardization):
 - Centralized error handling
 
 TODO (audit/fixes-buvette):
-- All functions normalized to return dicts via rows_to_dicts/row_to_dict
+- All functions normalized to return dicts via fetch_dicts/row_to_dict
 - Review reports/TODOs.md for additional audit findings
 """
 
+import os
+
 from db.db import get_connection
-from utils.db_helpers import rows_to_dicts, row_to_dict
+from modules.db_api import read_connection, transaction
+from utils.db_helpers import row_to_dict, fetch_dicts
 from utils.app_logger import get_logger
-from modules.stock_db import adjust_stock
+from modules.stock_db import adjust_stock, register_stock_change_hook, notify_stock_changed
+from modules import stock_db
+from modules.stock_tab import invalidate_stock_listing
+# Mouvement listings live in buvette_mouvements_db, re-exported here for the UI
+from modules.buvette_mouvements_db import (  # noqa: F401  (re-export)
+    yield_mouvements, list_mouvements, list_mouvements_ids_only,
+    get_mouvement_by_id, get_mouvements_by_ids
+)
+from modules.dropdowns import invalidate_articles
 import sqlite3
 
 logger = get_logger("buvette_db")
@@ -42,9 +53,8 @@ def get_conn():
 
 def _get_cache_key(table_name):
     """Generate cache key based on database path and table name."""
-    import os
-    db_path = os.environ.get("APP_DB_PATH", "association.db")
-    return f"{db_path}:{table_name}"
+    # Read on each call: db.set_db_file() switches APP_DB_PATH at runtime
+    return f"{os.environ.get('APP_DB_PATH', 'association.db')}:{table_name}"
 
 def _get_table_columns(conn, table_name):
     """
@@ -90,6 +100,24 @@ def clear_schema_cache():
     """Clear the schema cache. Useful for testing or after database migrations."""
     global _schema_cache
     _schema_cache = {}
+    stock_db.clear_schema_cache()
+
+# get_article_stock() read cache: database cache key -> {article_id: stock}
+_stock_cache = {}
+
+def clear_stock_cache(article_id=None):
+    """
+    Clear the get_article_stock() read cache.
+
+    Called after every stock write (also registered as a stock_db hook so that
+    inventory snapshots and recomputations invalidate it). Only the given
+    article is evicted, in every database; None drops the whole cache.
+    """
+    if article_id is None:
+        _stock_cache.clear()
+        return
+    for stocks in _stock_cache.values():
+        stocks.pop(article_id, None)
 
 # ----- ARTICLES -----
 def list_articles():
@@ -97,8 +125,7 @@ def list_articles():
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("SELECT * FROM buvette_articles ORDER BY name").fetchall()
-        return rows_to_dicts(rows)
+        return fetch_dicts(conn, "SELECT * FROM buvette_articles ORDER BY name")
     finally:
         if conn:
             conn.close()
@@ -142,6 +169,8 @@ def insert_article(name, categorie, unite, commentaire, contenance, purchase_pri
             """, (name, categorie, unite, commentaire, contenance, purchase_price))
         
         conn.commit()
+        invalidate_articles()
+        invalidate_stock_listing()
     finally:
         if conn:
             conn.close()
@@ -174,6 +203,8 @@ def update_article(article_id, name, categorie, unite, commentaire, contenance,
             """, (name, categorie, unite, commentaire, contenance, purchase_price, article_id))
         
         conn.commit()
+        invalidate_articles()
+        invalidate_stock_listing()
     finally:
         if conn:
             conn.close()
@@ -185,23 +216,36 @@ def delete_article(article_id):
         conn = get_conn()
         conn.execute("DELETE FROM buvette_articles WHERE id=?", (article_id,))
         conn.commit()
+        clear_stock_cache(article_id)
+        invalidate_articles()
+        invalidate_stock_listing()
     finally:
         if conn:
             conn.close()
 
 # ----- ACHATS -----
-def list_achats():
-    """List all achats with article info, returns list of dicts."""
+def list_achats(with_article=True):
+    """
+    List all achats with article info, returns list of dicts.
+
+    Args:
+        with_article: When False, skip the join on buvette_articles and return
+                      only the achat columns (article_id included). Useful when
+                      the caller already holds list_articles() in memory.
+    """
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("""
-            SELECT a.*, ar.name AS article_name, ar.contenance AS article_contenance
-            FROM buvette_achats a
-            LEFT JOIN buvette_articles ar ON a.article_id = ar.id
-            ORDER BY a.date_achat DESC
-        """).fetchall()
-        return rows_to_dicts(rows)
+        if with_article:
+            sql = """
+                SELECT a.*, ar.name AS article_name, ar.contenance AS article_contenance
+                FROM buvette_achats a
+                LEFT JOIN buvette_articles ar ON a.article_id = ar.id
+                ORDER BY a.date_achat DESC
+            """
+        else:
+            sql = "SELECT a.* FROM buvette_achats a ORDER BY a.date_achat DESC"
+        return fetch_dicts(conn, sql)
     finally:
         if conn:
             conn.close()
@@ -235,31 +279,31 @@ def insert_achat(article_id, date_achat, quantite, prix_unitaire, fournisseur, f
     conn = None
     try:
         conn = get_conn()
-        conn.execute("""
-            INSERT INTO buvette_achats (article_id, date_achat, quantite, prix_unitaire, fournisseur, facture, exercice)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (article_id, date_achat, quantite, prix_unitaire, fournisseur, facture, exercice))
-        
-        # Update article's purchase_price if prix_unitaire is provided
-        if prix_unitaire is not None:
+        # Achat row, purchase price and stock commit together
+        with transaction(conn, immediate=True):
+            conn.execute("""
+                INSERT INTO buvette_achats (article_id, date_achat, quantite, prix_unitaire, fournisseur, facture, exercice)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (article_id, date_achat, quantite, prix_unitaire, fournisseur, facture, exercice))
+            
+            # Update article's purchase_price if prix_unitaire is provided
+            if prix_unitaire is not None:
+                try:
+                    conn.execute("""
+                        UPDATE buvette_articles 
+                        SET purchase_price = ? 
+                        WHERE id = ?
+                    """, (prix_unitaire, article_id))
+                    logger.info(f"Updated purchase_price for article {article_id} to {prix_unitaire}")
+                except Exception as e:
+                    logger.warning(f"Could not update purchase_price for article {article_id}: {e}")
+            
+            # Adjust stock: add purchased quantity (one clamped UPDATE, no read)
             try:
-                conn.execute("""
-                    UPDATE buvette_articles 
-                    SET purchase_price = ? 
-                    WHERE id = ?
-                """, (prix_unitaire, article_id))
-                logger.info(f"Updated purchase_price for article {article_id} to {prix_unitaire}")
+                adjust_stock(conn, article_id, quantite, reason=f"Achat: facture {facture}")
+                logger.info(f"Adjusted stock for article {article_id} by +{quantite} (purchase)")
             except Exception as e:
-                logger.warning(f"Could not update purchase_price for article {article_id}: {e}")
-        
-        conn.commit()
-        
-        # Adjust stock: add purchased quantity
-        try:
-            adjust_stock(article_id, quantite, reason=f"Achat: facture {facture}")
-            logger.info(f"Adjusted stock for article {article_id} by +{quantite} (purchase)")
-        except Exception as e:
-            logger.warning(f"Could not adjust stock after purchase: {e}")
+                logger.warning(f"Could not adjust stock after purchase: {e}")
     finally:
         if conn:
             conn.close()
@@ -306,73 +350,33 @@ def delete_achat(achat_id):
     try:
         conn = get_conn()
         
-        # Get achat details before deletion to revert stock
-        row = conn.execute(
-            "SELECT article_id, quantite FROM buvette_achats WHERE id=?",
-            (achat_id,)
-        ).fetchone()
-        
-        if row:
-            article_id = row[0]
-            quantite = row[1]
-            
-            # Delete the achat
-            conn.execute("DELETE FROM buvette_achats WHERE id=?", (achat_id,))
-            conn.commit()
+        # Read, delete and revert in one write transaction: no other writer
+        # can change the achat between the SELECT and the stock adjustment
+        with transaction(conn, immediate=True):
+            # Get achat details before deletion to revert stock
+            row = conn.execute(
+                "SELECT article_id, quantite FROM buvette_achats WHERE id=?",
+                (achat_id,)
+            ).fetchone()
             
-            # Revert stock: subtract the purchased quantity
-            try:
-                adjust_stock(article_id, -quantite, reason=f"Suppression achat #{achat_id}")
-                logger.info(f"Adjusted stock for article {article_id} by -{quantite} (delete purchase)")
-            except Exception as e:
-                logger.warning(f"Could not revert stock after deleting purchase: {e}")
+            if row:
+                article_id = row[0]
+                quantite = row[1]
+                
+                # Delete the achat
+                conn.execute("DELETE FROM buvette_achats WHERE id=?", (achat_id,))
+                
+                # Revert stock: subtract the purchased quantity
+                try:
+                    adjust_stock(conn, article_id, -quantite, reason=f"Suppression achat #{achat_id}")
+                    logger.info(f"Adjusted stock for article {article_id} by -{quantite} (delete purchase)")
+                except Exception as e:
+                    logger.warning(f"Could not revert stock after deleting purchase: {e}")
     finally:
         if conn:
             conn.close()
 
 # ----- MOUVEMENTS -----
-def list_mouvements():
-    """List all mouvements with article info, returns list of dicts."""
-    conn = None
-    try:
-        conn = get_conn()
-        rows = conn.execute("""
-            SELECT m.*, 
-                   m.date_mouvement AS date, 
-                   m.type_mouvement AS type,
-                   m.motif AS commentaire,
-                   ar.name AS article_name, 
-                   ar.contenance AS article_contenance
-            FROM buvette_mouvements m
-            LEFT JOIN buvette_articles ar ON m.article_id = ar.id
-            ORDER BY m.date_mouvement DESC
-        """).fetchall()
-        return rows_to_dicts(rows)
-    finally:
-        if conn:
-            conn.close()
-
-def get_mouvement_by_id(mvt_id):
-    """Get mouvement by ID with article info, returns dict or None."""
-    conn = None
-    try:
-        conn = get_conn()
-        row = conn.execute("""
-            SELECT m.*, 
-                   m.date_mouvement AS date, 
-                   m.type_mouvement AS type,
-                   m.motif AS commentaire,
-                   ar.name AS article_name, 
-                   ar.contenance AS article_contenance
-            FROM buvette_mouvements m
-            LEFT JOIN buvette_articles ar ON m.article_id = ar.id
-            WHERE m.id=?
-        """, (mvt_id,)).fetchone()
-        return row_to_dict(row)
-    finally:
-        if conn:
-            conn.close()
-
 def insert_mouvement(date_mouvement, article_id, type_mouvement, quantite, motif):
     """Insert new mouvement."""
     conn = None
@@ -413,19 +417,32 @@ def delete_mouvement(mvt_id):
             conn.close()
 
 # ----- INVENTAIRE LIGNES -----
-def list_lignes_inventaire(inventaire_id):
-    """List inventory lines for a specific inventory, returns list of dicts."""
+def list_lignes_inventaire(inventaire_id, with_article=True):
+    """
+    List inventory lines for a specific inventory, returns list of dicts.
+
+    Args:
+        inventaire_id: ID of the inventory
+        with_article: When False, skip the join on buvette_articles
+    """
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("""
-            SELECT l.*, ar.name AS article_name, ar.contenance AS article_contenance
-            FROM buvette_inventaire_lignes l
-            LEFT JOIN buvette_articles ar ON l.article_id = ar.id
-            WHERE l.inventaire_id=?
-            ORDER BY l.id
-        """, (inventaire_id,)).fetchall()
-        return rows_to_dicts(rows)
+        if with_article:
+            sql = """
+                SELECT l.*, ar.name AS article_name, ar.contenance AS article_contenance
+                FROM buvette_inventaire_lignes l
+                LEFT JOIN buvette_articles ar ON l.article_id = ar.id
+                WHERE l.inventaire_id=?
+                ORDER BY l.id
+            """
+        else:
+            sql = """
+                SELECT l.* FROM buvette_inventaire_lignes l
+                WHERE l.inventaire_id=?
+                ORDER BY l.id
+            """
+        return fetch_dicts(conn, sql, (inventaire_id,))
     finally:
         if conn:
             conn.close()
@@ -475,8 +492,7 @@ def list_articles_names():
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("SELECT id, name, contenance FROM buvette_articles ORDER BY name").fetchall()
-        return rows_to_dicts(rows)
+        return fetch_dicts(conn, "SELECT id, name, contenance FROM buvette_articles ORDER BY name")
     finally:
         if conn:
             conn.close()
@@ -485,21 +501,28 @@ def ensure_stock_column():
     """
     Migration non destructive: Ajoute la colonne 'stock' à buvette_articles si elle n'existe pas.
     Cette fonction doit être appelée au démarrage de l'application ou lors de la mise à jour de la DB.
+    
+    Les colonnes sont lues via _get_table_columns(): une fois la colonne
+    vérifiée, les appels suivants pour la même base ne relancent pas le
+    PRAGMA table_info (cache mémoire, vidé par clear_schema_cache()).
     """
     conn = None
     try:
         conn = get_conn()
         # Vérifier si la colonne stock existe déjà
-        cursor = conn.execute("PRAGMA table_info(buvette_articles)")
-        columns = [row["name"] for row in cursor.fetchall()]
+        columns = _get_table_columns(conn, "buvette_articles")
+        if "stock" in columns:
+            return False  # Colonne existait déjà
         
-        if "stock" not in columns:
-            conn.execute("ALTER TABLE buvette_articles ADD COLUMN stock INTEGER DEFAULT 0")
-            conn.commit()
-            logger.info("Column 'stock' added to buvette_articles")
-            return True  # Colonne ajoutée
-        return False  # Colonne existait déjà
+        conn.execute("ALTER TABLE buvette_articles ADD COLUMN stock INTEGER DEFAULT 0")
+        conn.commit()
+        
+        _schema_cache[_get_cache_key("buvette_articles")] = columns + ["stock"]
+        clear_stock_cache()
+        logger.info("Column 'stock' added to buvette_articles")
+        return True  # Colonne ajoutée
     except Exception as e:
+        _schema_cache.pop(_get_cache_key("buvette_articles"), None)
         if conn:
             conn.rollback()
         logger.error(f"Error ensuring stock column: {e}")
@@ -523,6 +546,8 @@ def set_article_stock(article_id, stock):
         conn = get_conn()
         conn.execute("UPDATE buvette_articles SET stock=? WHERE id=?", (stock, article_id))
         conn.commit()
+        # Stock hooks: clear_stock_cache(article_id) and the stock_tab listing
+        notify_stock_changed(article_id)
     finally:
         if conn:
             conn.close()
@@ -531,24 +556,30 @@ def get_article_stock(article_id):
     """
     Récupère le stock actuel d'un article.
     
+    Les lectures sont mises en cache par base et par article; le cache est
+    invalidé à chaque écriture de stock (voir clear_stock_cache()).
+    
     Args:
         article_id: ID de l'article
         
     Returns:
         int: Stock actuel de l'article (0 si la colonne n'existe pas ou si l'article n'existe pas)
     """
-    conn = None
-    try:
-        conn = get_conn()
-        # Vérifier si la colonne stock existe
-        cursor = conn.execute("PRAGMA table_info(buvette_articles)")
-        columns = [row["name"] for row in cursor.fetchall()]
-        
-        if "stock" in columns:
+    # Cache key includes the database path so test databases don't collide
+    stocks = _stock_cache.setdefault(_get_cache_key("buvette_articles"), {})
+    stock = stocks.get(article_id)
+    if stock is None:
+        stock = stocks[article_id] = _read_article_stock(article_id)
+    return stock
+
+def _read_article_stock(article_id):
+    """Uncached stock read behind get_article_stock()."""
+    with read_connection() as conn:
+        try:
             row = conn.execute("SELECT stock FROM buvette_articles WHERE id=?", (article_id,)).fetchone()
-            return row_to_dict(row).get("stock", 0) if row else 0
-        else:
+        except sqlite3.OperationalError:
+            # Colonne stock absente (base non migrée)
             return 0
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        return row[0] if row and row[0] is not None else 0
+
+register_stock_change_hook(clear_stock_cache)
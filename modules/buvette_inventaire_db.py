@@ -10,40 +10,78 @@ STOCK MANAGEMENT (PR fix/stock-and-unite):
 - Added revert_inventory_effect call in delete_inventaire to prevent FK constraint failures
 - Added apply_inventory_snapshot_wrapper helper for inventory create/update flows
 
+TRANSACTIONS:
+- Writers run inside write_transaction() instead of committing per call;
+  nested in an outer write_transaction() block they join it, which is how
+  the inventory dialog commits the header and its lines together
+
 TODO (audit/fixes-buvette):
-- All functions normalized to return dicts via rows_to_dicts/row_to_dict
+- All functions normalized to return dicts via fetch_dicts/row_to_dict
 - Review reports/TODOs.md for additional audit findings
 """
 
-from db.db import get_connection
-from utils.db_helpers import rows_to_dicts, row_to_dict
+import os
+import sqlite3
+from modules.db_api import pool, transaction
+from utils.db_helpers import row_to_dict, iter_dicts, iter_chunks, fetch_dicts
 from utils.app_logger import get_logger
+from modules.dropdowns import get_articles, get_events
 from modules.stock_db import (
-    revert_inventory_effect, apply_inventory_snapshot, recompute_stock_for_article
+    revert_inventory_effect, apply_inventory_snapshot, recompute_stock_for_article,
+    write_lock
 )
 
 logger = get_logger("buvette_inventaire_db")
 
+# DELETE statements used by delete_inventaire, keyed by (database path,
+# PRAGMA schema_version) so any schema change triggers a new FK discovery
+_delete_plan_cache = {}
+
 def get_conn():
-    conn = get_connection()
-    return conn
+    """Return this thread's pooled connection; give it back with release_conn()."""
+    return pool.acquire()
+
+def release_conn(conn):
+    """Release a connection obtained from get_conn() (the connection stays open)."""
+    pool.release(conn)
+
+def write_transaction():
+    """
+    Context manager yielding a pooled connection inside a single transaction.
+
+    The pool hands back the same connection on this thread, so the writers
+    below called inside the block join its transaction instead of committing.
+
+    Example:
+        >>> with write_transaction():
+        >>>     inv_id = insert_inventaire("2025-01-01", None, "hors_evenement", "")
+        >>>     upsert_lignes_inventaire_bulk(inv_id, rows)
+    """
+    return pool.transaction()
 
 # ----- INVENTAIRES -----
-def list_inventaires():
-    """List all inventaires with event info, returns list of dicts."""
+def yield_inventaires(batch_size=500):
+    """Iterate over all inventaires with event info, one dict at a time.
+    
+    The pooled connection is released when the generator is exhausted or closed.
+    """
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("""
+        cur = conn.execute("""
             SELECT i.*, e.name as event_name, e.date as event_date
             FROM buvette_inventaires i
             LEFT JOIN events e ON i.event_id = e.id
             ORDER BY date_inventaire DESC
-        """).fetchall()
-        return rows_to_dicts(rows)
+        """)
+        yield from iter_dicts(cur, batch_size)
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
+
+def list_inventaires():
+    """List all inventaires with event info, returns list of dicts."""
+    return list(yield_inventaires())
 
 def get_inventaire_by_id(inv_id):
     """Get inventaire by ID with event info, returns dict or None."""
@@ -59,53 +97,134 @@ def get_inventaire_by_id(inv_id):
         return row_to_dict(row)
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
 
-def insert_inventaire(date_inventaire, event_id, type_inventaire, commentaire):
-    """Insert new inventaire, returns ID of created record."""
+def get_inventaires_by_ids(ids):
+    """
+    Get several inventaires by ID in batched IN (...) queries.
+
+    Args:
+        ids: iterable of inventaire IDs
+
+    Returns:
+        dict: {id: inventaire dict with event info} for the IDs that exist
+    """
+    result = {}
     conn = None
     try:
         conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO buvette_inventaires (date_inventaire, event_id, type_inventaire, commentaire)
-            VALUES (?, ?, ?, ?)
-        """, (date_inventaire, event_id, type_inventaire, commentaire))
-        inv_id = cur.lastrowid
-        conn.commit()
-        return inv_id
+        for chunk in iter_chunks(set(ids)):
+            placeholders = ",".join("?" * len(chunk))
+            rows = fetch_dicts(conn, f"""
+                SELECT i.*, e.name as event_name, e.date as event_date
+                FROM buvette_inventaires i
+                LEFT JOIN events e ON i.event_id = e.id
+                WHERE i.id IN ({placeholders})
+            """, chunk)
+            for row in rows:
+                result[row["id"]] = row
+        return result
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
+
+_INSERT_INVENTAIRE_SQL = """
+    INSERT INTO buvette_inventaires (date_inventaire, event_id, type_inventaire, commentaire)
+    VALUES (?, ?, ?, ?)
+"""
+
+_INSERT_LIGNE_SQL = """
+    INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite, commentaire)
+    VALUES (?, ?, ?, ?)
+"""
+
+def _insert_inventaire_returning(conn, params, returning):
+    """
+    Run the inventaire INSERT with a RETURNING clause and return the new row.
+
+    SQLite older than 3.35 has no RETURNING: the plain INSERT is run instead
+    and the row is read back by lastrowid.
+    """
+    try:
+        rows = conn.execute(_INSERT_INVENTAIRE_SQL + " RETURNING " + returning, params).fetchall()
+        return rows[0]
+    except sqlite3.OperationalError as e:
+        if "RETURNING" not in str(e).upper():
+            raise
+        cur = conn.execute(_INSERT_INVENTAIRE_SQL, params)
+        return conn.execute(
+            "SELECT " + returning + " FROM buvette_inventaires WHERE id=?", (cur.lastrowid,)
+        ).fetchone()
+
+def insert_inventaire(date_inventaire, event_id, type_inventaire, commentaire):
+    """Insert new inventaire, returns ID of created record."""
+    with write_transaction() as conn:
+        row = _insert_inventaire_returning(
+            conn, (date_inventaire, event_id, type_inventaire, commentaire), "id"
+        )
+        return row[0]
+
+def insert_inventaire_returning_row(date_inventaire, event_id, type_inventaire, commentaire):
+    """
+    Insert new inventaire, returns the created record as a dict.
+
+    The row (including column defaults) comes back from the INSERT itself, so
+    no follow-up get_inventaire_by_id() is needed. Unlike get_inventaire_by_id(),
+    the dict has no event_name/event_date.
+    """
+    with write_transaction() as conn:
+        row = _insert_inventaire_returning(
+            conn, (date_inventaire, event_id, type_inventaire, commentaire), "*"
+        )
+        return row_to_dict(row)
+
+def create_inventaire_with_lignes(date_inventaire, event_id, type_inventaire, commentaire, lignes):
+    """
+    Create an inventaire and its lines in a single transaction.
+
+    SQLite does not accept INSERT ... RETURNING inside a WITH clause, so the
+    header is inserted with RETURNING id and the lines follow with one
+    executemany on the same connection; both are committed once.
+
+    Args:
+        lignes: iterable of (article_id, quantite, commentaire) tuples
+
+    Returns:
+        int: ID of the created inventaire
+    """
+    with write_transaction() as conn:
+        inv_id = _insert_inventaire_returning(
+            conn, (date_inventaire, event_id, type_inventaire, commentaire), "id"
+        )[0]
+        conn.executemany(_INSERT_LIGNE_SQL, ((inv_id, article_id, quantite, ligne_commentaire)
+                                             for (article_id, quantite, ligne_commentaire) in lignes))
+        return inv_id
 
 def update_inventaire(inv_id, date_inventaire, event_id, type_inventaire, commentaire):
     """Update existing inventaire."""
-    conn = None
-    try:
-        conn = get_conn()
+    with write_transaction() as conn:
         conn.execute("""
             UPDATE buvette_inventaires SET date_inventaire=?, event_id=?, type_inventaire=?, commentaire=?
             WHERE id=?
         """, (date_inventaire, event_id, type_inventaire, commentaire, inv_id))
-        conn.commit()
-    finally:
-        if conn:
-            conn.close()
 
 def _find_referencing_tables(conn, parent_table):
     """Return list of tuples (table_name, from_column) for tables that have a FK to parent_table.
     
     Note: Table names come from sqlite_master and are trusted. Column names come from PRAGMA.
     """
+    # A single cursor is reused for every PRAGMA below
     cur = conn.cursor()
     try:
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        cur.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+        )
         tables = [r[0] for r in cur.fetchall()]
         refs = []
         for t in tables:
             # Table name comes from sqlite_master system table, is safe to use in PRAGMA
             try:
-                fk_rows = conn.execute(f"PRAGMA foreign_key_list({t})").fetchall()
+                fk_rows = cur.execute(f"PRAGMA foreign_key_list({t})").fetchall()
             except Exception:
                 fk_rows = []
             # fk_rows columns: (id, seq, table, from, to, on_update, on_delete, match)
@@ -124,6 +243,24 @@ def _find_referencing_tables(conn, parent_table):
     finally:
         cur.close()
 
+def _get_delete_plan(conn):
+    """Return the DELETE statements for one inventaire: child tables first, parent last.
+
+    FK discovery scans every table of the database, so the resulting statements
+    are built once and reused until the schema changes.
+    """
+    schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    cache_key = (os.environ.get("APP_DB_PATH", "association.db"), schema_version)
+    plan = _delete_plan_cache.get(cache_key)
+    if plan is None:
+        refs = _find_referencing_tables(conn, "buvette_inventaires")
+        # Table and column names come from sqlite_master/PRAGMA, are trusted system sources
+        plan = tuple(
+            f"DELETE FROM {table} WHERE {fk_col} = ?" for (table, fk_col) in refs
+        ) + ("DELETE FROM buvette_inventaires WHERE id = ?",)
+        _delete_plan_cache[cache_key] = plan
+    return plan
+
 def delete_inventaire(inv_id):
     """
     Supprime un inventaire de façon sûre: annule les effets stock, supprime les lignes enfants, 
@@ -152,105 +289,108 @@ def delete_inventaire(inv_id):
         except Exception as e:
             logger.warning(f"Could not get affected articles for inventory {inv_id}: {e}")
         
-        # Step 2: Revert inventory effects on stock to maintain consistency
-        try:
-            revert_inventory_effect(conn, inv_id)
-            logger.info(f"Reverted stock effects for inventory {inv_id}")
-        except Exception as e:
-            logger.warning(
-                f"Could not revert stock effects for inventory {inv_id}: {e}"
-            )
-
-        # Ensure foreign keys enforcement (defensive)
+        # Ensure foreign keys enforcement (defensive, no effect inside a transaction)
         try:
             conn.execute("PRAGMA foreign_keys = ON;")
         except Exception:
             pass
 
-        # Step 3: Discover tables referencing the parent table
-        refs = _find_referencing_tables(conn, "buvette_inventaires")
+        # Step 3 first: DELETE statements for child tables + parent (cached FK discovery)
+        plan = _get_delete_plan(conn)
 
-        # Step 4: Begin explicit transaction for deletion
-        cur = conn.cursor()
-        try:
-            cur.execute("BEGIN")
-            # Delete from child tables first
-            for (table, fk_col) in refs:
-                logger.info("Deleting child rows in %s where %s = %s", table, fk_col, str(inv_id))
-                # Table and column names come from sqlite_master/PRAGMA, are trusted system sources
-                cur.execute(f"DELETE FROM {table} WHERE {fk_col} = ?", (inv_id,))
-            # Finally delete the parent
-            cur.execute("DELETE FROM buvette_inventaires WHERE id = ?", (inv_id,))
-            conn.commit()
-            logger.info("Deleted inventaire id=%s and %d child table deletions", inv_id, len(refs))
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            cur.close()
-        
-        # Step 5: Recompute stock for each affected article
-        # This ensures stock reflects reality after inventory deletion
-        for article_id in affected_article_ids:
+        # Steps 2, 4 and 5 share one write transaction: a single commit for
+        # the whole deletion instead of one per statement / per article.
+        # The stock write lock is taken before BEGIN IMMEDIATE, in the same
+        # order as stock_db's writers, so the two cannot deadlock
+        params = (inv_id,)
+        with write_lock(), transaction(conn, immediate=True):
+            # Step 2: Revert inventory effects on stock to maintain consistency.
+            # revert_inventory_effect joins this transaction, so a failed
+            # revert (e.g. no stock tables) is undone up to a savepoint
+            # instead of committing a half-reverted stock with the deletion
+            conn.execute("SAVEPOINT revert_inventory")
             try:
-                recompute_stock_for_article(conn, article_id)
-                logger.info(f"Recomputed stock for article {article_id} after inventory deletion")
+                revert_inventory_effect(conn, inv_id)
+                logger.info(f"Reverted stock effects for inventory {inv_id}")
             except Exception as e:
-                logger.error(
-                    f"Failed to recompute stock for article {article_id}: {e}"
+                conn.execute("ROLLBACK TO revert_inventory")
+                logger.warning(
+                    f"Could not revert stock effects for inventory {inv_id}: {e}"
                 )
-        
-        conn.commit()
+            finally:
+                conn.execute("RELEASE revert_inventory")
+
+            # Step 4: Delete child tables first, parent last
+            for sql in plan:
+                conn.execute(sql, params)
+            logger.info("Deleted inventaire id=%s and %d child table deletions", inv_id, len(plan) - 1)
+
+            # Step 5: Recompute stock for each affected article
+            # This ensures stock reflects reality after inventory deletion
+            recomputed = 0
+            for article_id in affected_article_ids:
+                try:
+                    recompute_stock_for_article(conn, article_id)
+                    recomputed += 1
+                except Exception as e:
+                    logger.error(
+                        f"Failed to recompute stock for article {article_id}: {e}"
+                    )
+            logger.info(
+                "Recomputed stock for %d/%d articles after deleting inventaire %s",
+                recomputed, len(affected_article_ids), inv_id
+            )
         
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
 
 # ----- LIGNES D'INVENTAIRE -----
-def list_lignes_inventaire(inventaire_id):
-    """List inventory lines for specific inventory with article names, returns list of dicts."""
+def list_lignes_inventaire(inventaire_id, with_article=True):
+    """List inventory lines for specific inventory with article names, returns list of dicts.
+
+    Article names come from the cached dropdown list (modules.dropdowns)
+    instead of a join on buvette_articles; rows are then sorted by name,
+    unknown articles first (as ORDER BY a.name on the LEFT JOIN did).
+
+    With with_article=False no article_name is attached and rows are
+    ordered by line id.
+    """
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("""
-            SELECT l.*, a.name as article_name
-            FROM buvette_inventaire_lignes l
-            LEFT JOIN buvette_articles a ON l.article_id = a.id
+        lignes = fetch_dicts(conn, """
+            SELECT l.* FROM buvette_inventaire_lignes l
             WHERE l.inventaire_id=?
-            ORDER BY a.name
-        """, (inventaire_id,)).fetchall()
-        return rows_to_dicts(rows)
+            ORDER BY l.id
+        """, (inventaire_id,))
+        if with_article and lignes:
+            names = {a["id"]: a["name"] for a in get_articles(conn)}
+            for ligne in lignes:
+                ligne["article_name"] = names.get(ligne["article_id"])
+            lignes.sort(key=lambda ligne: (ligne["article_name"] is not None, ligne["article_name"] or ""))
+        return lignes
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
+
+_UPDATE_LIGNE_BY_ARTICLE_SQL = """
+    UPDATE buvette_inventaire_lignes SET quantite=?, commentaire=?
+    WHERE inventaire_id=? AND article_id=?
+"""
 
 def insert_ligne_inventaire(inventaire_id, article_id, quantite, commentaire=None):
     """Insert new inventory line."""
-    conn = None
-    try:
-        conn = get_conn()
-        conn.execute("""
-            INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite, commentaire)
-            VALUES (?, ?, ?, ?)
-        """, (inventaire_id, article_id, quantite, commentaire))
-        conn.commit()
-    finally:
-        if conn:
-            conn.close()
+    with write_transaction() as conn:
+        conn.execute(_INSERT_LIGNE_SQL, (inventaire_id, article_id, quantite, commentaire))
 
 def update_ligne_inventaire(ligne_id, article_id, quantite, commentaire=None):
     """Update existing inventory line."""
-    conn = None
-    try:
-        conn = get_conn()
+    with write_transaction() as conn:
         conn.execute("""
             UPDATE buvette_inventaire_lignes SET article_id=?, quantite=?, commentaire=?
             WHERE id=?
         """, (article_id, quantite, commentaire, ligne_id))
-        conn.commit()
-    finally:
-        if conn:
-            conn.close()
 
 def delete_ligne_inventaire(ligne_id):
     """
@@ -285,60 +425,98 @@ def delete_ligne_inventaire(ligne_id):
         
         article_id = row[0]
         
-        # Delete the line
-        conn.execute("DELETE FROM buvette_inventaire_lignes WHERE id=?", (ligne_id,))
-        conn.commit()
-        logger.info(f"Deleted inventory line {ligne_id} for article {article_id}")
-        
-        # Recompute stock for the affected article (from modules.stock_db)
-        # This recalculates stock by aggregating all movements
-        if article_id:
-            try:
-                recompute_stock_for_article(conn, article_id)
-                logger.info(f"Recomputed stock for article {article_id} after line deletion")
-            except Exception as e:
-                logger.error(f"Failed to recompute stock for article {article_id}: {e}")
-                # Don't re-raise - deletion succeeded, recomputation is best-effort
+        # Delete the line and recompute the stock in one transaction (one commit),
+        # stock write lock first as in stock_db
+        with write_lock(), transaction(conn, immediate=True):
+            conn.execute("DELETE FROM buvette_inventaire_lignes WHERE id=?", (ligne_id,))
+            logger.info(f"Deleted inventory line {ligne_id} for article {article_id}")
+
+            # Recompute stock for the affected article (from modules.stock_db)
+            # This recalculates stock by aggregating all movements
+            if article_id:
+                try:
+                    recompute_stock_for_article(conn, article_id)
+                    logger.info(f"Recomputed stock for article {article_id} after line deletion")
+                except Exception as e:
+                    logger.error(f"Failed to recompute stock for article {article_id}: {e}")
+                    # Don't re-raise - deletion still commits, recomputation is best-effort
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
 
 def upsert_ligne_inventaire(inventaire_id, article_id, quantite, commentaire=None):
-    """Insert or update inventory line for article in inventory."""
-    conn = None
-    try:
-        conn = get_conn()
+    """Insert or update inventory line for article in inventory.
+
+    Uses a single INSERT ... ON CONFLICT statement, which relies on the unique
+    index idx_buvette_inventaire_lignes_inv_article (created by init_db /
+    upgrade_db_structure). Databases without that index fall back to
+    SELECT then UPDATE or INSERT.
+    """
+    with write_transaction() as conn:
         cur = conn.cursor()
-        cur.execute("""
-            SELECT id FROM buvette_inventaire_lignes WHERE inventaire_id=? AND article_id=?
-        """, (inventaire_id, article_id))
-        row = cur.fetchone()
-        if row:
-            cur.execute("""
-                UPDATE buvette_inventaire_lignes SET quantite=?, commentaire=?
-                WHERE inventaire_id=? AND article_id=?
-            """, (quantite, commentaire, inventaire_id, article_id))
-        else:
+        try:
             cur.execute("""
                 INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite, commentaire)
                 VALUES (?, ?, ?, ?)
+                ON CONFLICT(inventaire_id, article_id) DO UPDATE
+                SET quantite=excluded.quantite, commentaire=excluded.commentaire
             """, (inventaire_id, article_id, quantite, commentaire))
-        conn.commit()
-    finally:
-        if conn:
-            conn.close()
+        except sqlite3.OperationalError:
+            # No unique index on (inventaire_id, article_id)
+            cur.execute("""
+                SELECT id FROM buvette_inventaire_lignes WHERE inventaire_id=? AND article_id=?
+            """, (inventaire_id, article_id))
+            if cur.fetchone():
+                cur.execute(_UPDATE_LIGNE_BY_ARTICLE_SQL, (quantite, commentaire, inventaire_id, article_id))
+            else:
+                cur.execute(_INSERT_LIGNE_SQL, (inventaire_id, article_id, quantite, commentaire))
+
+def insert_lignes_inventaire_bulk(inventaire_id, rows):
+    """
+    Insert many inventory lines in a single transaction.
+
+    Args:
+        inventaire_id: ID of the inventory
+        rows: iterable of (article_id, quantite, commentaire) tuples; a
+              generator is consumed lazily by executemany
+    """
+    with write_transaction() as conn:
+        conn.executemany(_INSERT_LIGNE_SQL, ((inventaire_id, article_id, quantite, commentaire)
+                                             for (article_id, quantite, commentaire) in rows))
+
+def upsert_lignes_inventaire_bulk(inventaire_id, rows):
+    """
+    Insert or update many inventory lines in a single transaction.
+
+    Existing lines are looked up once, then new lines are inserted and
+    existing ones updated with one executemany each.
+
+    Args:
+        inventaire_id: ID of the inventory
+        rows: iterable of (article_id, quantite, commentaire) tuples
+    """
+    with write_transaction() as conn:
+        existing = {r[0] for r in conn.execute(
+            "SELECT article_id FROM buvette_inventaire_lignes WHERE inventaire_id=?",
+            (inventaire_id,)
+        ).fetchall()}
+        inserts = []
+        updates = []
+        for (article_id, quantite, commentaire) in rows:
+            if article_id in existing:
+                updates.append((quantite, commentaire, inventaire_id, article_id))
+            else:
+                inserts.append((inventaire_id, article_id, quantite, commentaire))
+                # A repeated article in rows updates the line inserted above
+                existing.add(article_id)
+        if inserts:
+            conn.executemany(_INSERT_LIGNE_SQL, inserts)
+        if updates:
+            conn.executemany(_UPDATE_LIGNE_BY_ARTICLE_SQL, updates)
 
 # ----- EVENEMENTS UTILITY -----
-def list_events():
-    """List events for dropdown, returns list of dicts."""
-    conn = None
-    try:
-        conn = get_conn()
-        rows = conn.execute("SELECT id, name FROM events ORDER BY date DESC").fetchall()
-        return rows_to_dicts(rows)
-    finally:
-        if conn:
-            conn.close()
+# Cached dropdown query shared with buvette_mouvements_db
+list_events = get_events
 
 
 # ----- STOCK INTEGRATION -----
@@ -373,4 +551,4 @@ def apply_inventory_snapshot_wrapper(inv_id):
         raise
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
@@ -258,21 +258,19 @@ class InventaireDialog(tk.Toplevel):
                 pass
         
         try:
-            # Insert or update inventory
-            if self.inventaire_id:
-                db.update_inventaire(self.inventaire_id, date_inv, event_id, type_inv, commentaire)
-                inv_id = self.inventaire_id
-            else:
-                inv_id = db.insert_inventaire(date_inv, event_id, type_inv, commentaire)
-            
-            # Save lines
+            lines = []
             for item in self.lines_tree.get_children():
                 values = self.lines_tree.item(item)["values"]
-                article_id = values[0]
-                quantite = values[4]
-                
-                # Upsert line
-                db.upsert_ligne_inventaire(inv_id, article_id, quantite)
+                lines.append((values[0], values[4], None))
+            
+            # Inventory header and lines are committed together
+            with db.write_transaction():
+                if self.inventaire_id:
+                    db.update_inventaire(self.inventaire_id, date_inv, event_id, type_inv, commentaire)
+                    inv_id = self.inventaire_id
+                else:
+                    inv_id = db.insert_inventaire(date_inv, event_id, type_inv, commentaire)
+                db.upsert_lignes_inventaire_bulk(inv_id, lines)
             
             # Apply inventory snapshot to update stock and record in journal
             try:
@@ -306,7 +304,7 @@ class InventaireDialog(tk.Toplevel):
             
             if "quantite" not in columns:
                 logger.info("buvette_articles table does not have quantite field, skipping stock update")
-                conn.close()
+                db.release_conn(conn)
                 return
             
             # Update stock for each line
@@ -321,7 +319,7 @@ class InventaireDialog(tk.Toplevel):
                 )
             
             conn.commit()
-            conn.close()
+            db.release_conn(conn)
             logger.info("Article stock updated successfully")
         
         except Exception as e:
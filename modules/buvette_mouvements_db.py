@@ -9,48 +9,134 @@ STANDARDIZATION (PR copilot/audit-db-access-standardization):
 TODO (audit/fixes-buvette): 
 - Added SELECT aliases for UI compatibility (date_mouvement AS date, etc.)
 - Review reports/TODOs.md for additional changes
+
+CONSOLIDATION:
+- list_mouvements / list_mouvements_ids_only / get_mouvement_by_id are defined
+  here only; modules.buvette_db re-exports them
+
+TRANSACTIONS:
+- insert/update/delete_mouvement run inside write_transaction() instead of
+  committing per call; called inside an outer write_transaction() block they
+  join it, so several writes commit (or roll back) together
 """
 
-from db.db import get_connection
-from utils.db_helpers import rows_to_dicts, row_to_dict
+from modules.db_api import pool
+from utils.db_helpers import row_to_dict, iter_dicts, iter_chunks, fetch_dicts
 from utils.app_logger import get_logger
+from modules.dropdowns import get_articles, get_events
 import sqlite3
 
+__all__ = [
+    "get_conn", "release_conn", "write_transaction",
+    "yield_mouvements", "list_mouvements", "list_mouvements_ids_only",
+    "get_mouvement_by_id", "get_mouvements_by_ids",
+    "insert_mouvement", "insert_mouvements_bulk", "update_mouvement", "delete_mouvement",
+    "list_articles", "list_events",
+]
+
 logger = get_logger("buvette_mouvements_db")
 
 def get_conn():
-    conn = get_connection()
-    return conn
+    """Return this thread's pooled connection; give it back with release_conn()."""
+    return pool.acquire()
+
+def release_conn(conn):
+    """Release a connection obtained from get_conn() (the connection stays open)."""
+    pool.release(conn)
 
 # ----- MOUVEMENTS -----
-def list_mouvements():
-    """List all mouvements with article and event info, returns list of dicts.
+# Single source of the mouvements SELECT (also re-exported by buvette_db).
+# Raw column names are kept next to the UI aliases (date/type/commentaire)
+# so both the buvette tab and the mouvement dialogs can read the same rows.
+# Statements are module-level constants: each function passes the same
+# string object to conn.execute, which hits the connection's statement cache.
+_MOUVEMENT_COLUMNS = """
+    SELECT m.id, m.article_id, m.quantite, m.event_id,
+           m.date_mouvement, m.type_mouvement, m.motif,
+           m.date_mouvement AS date, 
+           m.type_mouvement AS type, 
+           m.motif AS commentaire,
+           a.name AS article_name, 
+           a.contenance AS article_contenance,
+           e.name AS event_name, 
+           e.date AS event_date
+    FROM buvette_mouvements m
+    LEFT JOIN buvette_articles a ON m.article_id = a.id
+    LEFT JOIN events e ON m.event_id = e.id
+"""
+
+_LIST_MOUVEMENTS_SQL = _MOUVEMENT_COLUMNS + "ORDER BY m.date_mouvement DESC"
+
+_LIST_MOUVEMENTS_NO_ARTICLE_SQL = """
+    SELECT m.id, m.article_id, m.quantite, m.event_id,
+           m.date_mouvement, m.type_mouvement, m.motif,
+           m.date_mouvement AS date, 
+           m.type_mouvement AS type, 
+           m.motif AS commentaire,
+           e.name AS event_name, 
+           e.date AS event_date
+    FROM buvette_mouvements m
+    LEFT JOIN events e ON m.event_id = e.id
+    ORDER BY m.date_mouvement DESC
+"""
+
+_GET_MOUVEMENT_SQL = _MOUVEMENT_COLUMNS + "WHERE m.id=?"
+
+# Filled with one "?" per ID of the chunk
+_GET_MOUVEMENTS_BY_IDS_SQL = _MOUVEMENT_COLUMNS + "WHERE m.id IN ({placeholders})"
+
+_INSERT_MOUVEMENT_SQL = """
+    INSERT INTO buvette_mouvements (article_id, date_mouvement, type_mouvement, quantite, motif, event_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_UPDATE_MOUVEMENT_SQL = """
+    UPDATE buvette_mouvements SET article_id=?, date_mouvement=?, type_mouvement=?, quantite=?, motif=?, event_id=?
+    WHERE id=?
+"""
+
+_DELETE_MOUVEMENT_SQL = "DELETE FROM buvette_mouvements WHERE id=?"
+
+def yield_mouvements(with_article=True, batch_size=500):
+    """Iterate over all mouvements with article and event info, one dict at a time.
     
     TODO (audit/fixes-buvette): Added aliases for UI compatibility
     - m.date_mouvement AS date
     - m.type_mouvement AS type  
     - m.motif AS commentaire
+    
+    Rows are fetched batch_size at a time; the pooled connection is released
+    when the generator is exhausted or closed.
+    
+    Args:
+        with_article: When False, skip the join on buvette_articles; rows keep
+                      article_id but no article_name/article_contenance.
+        batch_size: Number of rows fetched per round trip.
     """
     conn = None
     try:
         conn = get_conn()
-        rows = conn.execute("""
-            SELECT m.id, m.article_id, m.quantite, m.event_id,
-                   m.date_mouvement AS date, 
-                   m.type_mouvement AS type, 
-                   m.motif AS commentaire,
-                   a.name AS article_name, 
-                   e.name AS event_name, 
-                   e.date AS event_date
-            FROM buvette_mouvements m
-            LEFT JOIN buvette_articles a ON m.article_id = a.id
-            LEFT JOIN events e ON m.event_id = e.id
-            ORDER BY m.date_mouvement DESC
-        """).fetchall()
-        return rows_to_dicts(rows)
+        sql = _LIST_MOUVEMENTS_SQL if with_article else _LIST_MOUVEMENTS_NO_ARTICLE_SQL
+        yield from iter_dicts(conn.execute(sql), batch_size)
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
+
+def list_mouvements(with_article=True):
+    """List all mouvements with article and event info, returns list of dicts.
+    
+    List-returning wrapper around yield_mouvements().
+    """
+    return list(yield_mouvements(with_article))
+
+def list_mouvements_ids_only():
+    """
+    List all mouvements without article info, returns list of dicts.
+
+    Join-free variant of list_mouvements(): resolve names via
+    articles_by_id[row["article_id"]] from a cached list_articles().
+    """
+    return list_mouvements(with_article=False)
 
 def get_mouvement_by_id(mvt_id):
     """Get mouvement by ID with article and event info, returns dict or None.
@@ -60,82 +146,74 @@ def get_mouvement_by_id(mvt_id):
     conn = None
     try:
         conn = get_conn()
-        row = conn.execute("""
-            SELECT m.id, m.article_id, m.quantite, m.event_id,
-                   m.date_mouvement AS date, 
-                   m.type_mouvement AS type, 
-                   m.motif AS commentaire,
-                   a.name AS article_name, 
-                   e.name AS event_name, 
-                   e.date AS event_date
-            FROM buvette_mouvements m
-            LEFT JOIN buvette_articles a ON m.article_id = a.id
-            LEFT JOIN events e ON m.event_id = e.id
-            WHERE m.id=?
-        """, (mvt_id,)).fetchone()
+        row = conn.execute(_GET_MOUVEMENT_SQL, (mvt_id,)).fetchone()
         return row_to_dict(row)
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
 
-def insert_mouvement(article_id, date_mouvement, type_mouvement, quantite, motif, event_id):
-    """Insert new mouvement."""
+def get_mouvements_by_ids(ids):
+    """Get several mouvements by ID in batched IN (...) queries.
+    
+    Replaces a loop of get_mouvement_by_id() calls with one query per 500 IDs.
+    
+    Args:
+        ids: iterable of mouvement IDs
+        
+    Returns:
+        dict: {id: mouvement dict} for the IDs that exist (same columns as
+              get_mouvement_by_id)
+    """
+    result = {}
     conn = None
     try:
         conn = get_conn()
-        conn.execute("""
-            INSERT INTO buvette_mouvements (article_id, date_mouvement, type_mouvement, quantite, motif, event_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (article_id, date_mouvement, type_mouvement, quantite, motif, event_id))
-        conn.commit()
+        for chunk in iter_chunks(set(ids)):
+            sql = _GET_MOUVEMENTS_BY_IDS_SQL.format(placeholders=",".join("?" * len(chunk)))
+            for row in fetch_dicts(conn, sql, chunk):
+                result[row["id"]] = row
+        return result
     finally:
         if conn:
-            conn.close()
+            release_conn(conn)
+
+def write_transaction():
+    """
+    Context manager yielding a pooled connection inside a single transaction.
+
+    The pool hands back the same connection on this thread, so the writers
+    below called inside the block join its transaction instead of committing.
+    """
+    return pool.transaction()
+
+def insert_mouvement(article_id, date_mouvement, type_mouvement, quantite, motif, event_id):
+    """Insert new mouvement."""
+    with write_transaction() as conn:
+        conn.execute(_INSERT_MOUVEMENT_SQL, (article_id, date_mouvement, type_mouvement, quantite, motif, event_id))
+
+def insert_mouvements_bulk(rows):
+    """
+    Insert many mouvements in a single transaction.
+
+    Args:
+        rows: iterable of (article_id, date_mouvement, type_mouvement, quantite,
+              motif, event_id) tuples, same order as insert_mouvement(); a
+              generator is consumed lazily by executemany
+    """
+    with write_transaction() as conn:
+        conn.executemany(_INSERT_MOUVEMENT_SQL, rows)
 
 def update_mouvement(mvt_id, article_id, date_mouvement, type_mouvement, quantite, motif, event_id):
     """Update existing mouvement."""
-    conn = None
-    try:
-        conn = get_conn()
-        conn.execute("""
-            UPDATE buvette_mouvements SET article_id=?, date_mouvement=?, type_mouvement=?, quantite=?, motif=?, event_id=?
-            WHERE id=?
-        """, (article_id, date_mouvement, type_mouvement, quantite, motif, event_id, mvt_id))
-        conn.commit()
-    finally:
-        if conn:
-            conn.close()
+    with write_transaction() as conn:
+        conn.execute(_UPDATE_MOUVEMENT_SQL, (article_id, date_mouvement, type_mouvement, quantite, motif, event_id, mvt_id))
 
 def delete_mouvement(mvt_id):
     """Delete mouvement by ID."""
-    conn = None
-    try:
-        conn = get_conn()
-        conn.execute("DELETE FROM buvette_mouvements WHERE id=?", (mvt_id,))
-        conn.commit()
-    finally:
-        if conn:
-            conn.close()
+    with write_transaction() as conn:
+        conn.execute(_DELETE_MOUVEMENT_SQL, (mvt_id,))
 
 # ----- UTILITY -----
-def list_articles():
-    """List articles for dropdown, returns list of dicts."""
-    conn = None
-    try:
-        conn = get_conn()
-        rows = conn.execute("SELECT id, name FROM buvette_articles ORDER BY name").fetchall()
-        return rows_to_dicts(rows)
-    finally:
-        if conn:
-            conn.close()
-
-def list_events():
-    """List events for dropdown, returns list of dicts."""
-    conn = None
-    try:
-        conn = get_conn()
-        rows = conn.execute("SELECT id, name FROM events ORDER BY date DESC").fetchall()
-        return rows_to_dicts(rows)
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+# Dropdown queries are cached in modules.dropdowns; old names kept here
+list_articles = get_articles
+list_events = get_events
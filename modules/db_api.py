@@ -4,33 +4,95 @@ Central Database API Module
 Provides centralized database connection management with:
 - WAL mode for better concurrency
 - Busy timeout to reduce lock errors
-- Query helper functions (query_one, query_all)
+- Query helper functions (query_one, query_all, executemany_query)
 - Transaction context manager
+- ConnectionPool: long-lived per-thread connections (shared `pool`)
 
 This module is the recommended way to interact with the database
 across the application, ensuring consistent connection configuration
 and error handling.
 """
 
+import os
 import sqlite3
+import threading
 import time
-from typing import Optional, List, Dict, Any, Callable, Tuple
+from typing import Optional, List, Dict, Any, Callable, Iterable, Tuple
 from contextlib import contextmanager
 from db.db import get_db_file
+from db.db import get_connection as _open_app_connection
 from utils.app_logger import get_logger
 from modules.db_row_utils import _row_to_dict, _rows_to_dicts
 
 logger = get_logger("db_api")
 
+# Number of compiled statements kept per connection by sqlite3 (keyed by SQL
+# text). Query helpers run on pooled connections, so repeated SQL is only
+# rebound, not re-parsed.
+STATEMENT_CACHE_SIZE = 512
+
+# How long SQLite itself waits (sleeping inside its busy handler, on the same
+# connection) for a competing writer before raising "database is locked".
+# execute()'s retries are only a fallback once this has expired.
+BUSY_TIMEOUT_MS = 15000
+
+# Per-connection tuning, applied once when a connection is opened. With WAL,
+# synchronous=NORMAL only fsyncs at checkpoints; temp tables and sorts stay in
+# memory; the page cache is 64 MiB and reads go through a 256 MiB mmap.
+TUNING_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA cache_size=-65536;",
+    "PRAGMA mmap_size=268435456;",
+    "PRAGMA wal_autocheckpoint=1000;",
+)
+
+
+# (path, (device, inode)) of database files already switched to WAL by
+# get_connection(); a replaced file gets a new identity and is switched again
+_wal_databases = set()
+
+# Connection -> {key: callback} for each outermost transaction() block in
+# progress; the callbacks run once that block has committed (see on_commit)
+_after_commit = {}
+
+
+def apply_tuning_pragmas(conn: sqlite3.Connection) -> None:
+    """
+    Apply TUNING_PRAGMAS to a freshly opened connection.
+    
+    Failures are logged and ignored: the connection stays usable with
+    SQLite's defaults.
+    
+    Args:
+        conn: Database connection
+    """
+    try:
+        for pragma in TUNING_PRAGMAS:
+            conn.execute(pragma)
+    except Exception as pragma_exc:
+        logger.warning(f"Failed to set tuning PRAGMAs: {pragma_exc}")
+
+
+def _open_pooled_connection() -> sqlite3.Connection:
+    """Open an application connection for the shared pool, with tuning PRAGMAs."""
+    conn = _open_app_connection()
+    apply_tuning_pragmas(conn)
+    return conn
+
 
 def get_connection(row_factory: Optional[Any] = sqlite3.Row) -> sqlite3.Connection:
     """
     Get a database connection with optimal settings.
     
     Sets:
-    - PRAGMA journal_mode=WAL (Write-Ahead Logging for better concurrency)
-    - PRAGMA busy_timeout=5000 (Wait up to 5 seconds if DB is locked)
+    - PRAGMA journal_mode=WAL (Write-Ahead Logging for better concurrency),
+      once per database file since the mode is persistent
+    - busy timeout of BUSY_TIMEOUT_MS (wait up to 15 seconds if DB is locked)
     - row_factory=sqlite3.Row by default (for named column access)
+    - cached_statements=STATEMENT_CACHE_SIZE (compiled statement cache)
+    - TUNING_PRAGMAS (synchronous, temp_store, cache_size, mmap_size, ...)
+    - detect_types=0 (DATE/TIMESTAMP columns are returned as stored)
     
     Args:
         row_factory: Factory for row objects (default: sqlite3.Row)
@@ -50,20 +112,28 @@ def get_connection(row_factory: Optional[Any] = sqlite3.Row) -> sqlite3.Connecti
         db_file = get_db_file()
         conn = sqlite3.connect(
             db_file, 
-            timeout=10, 
-            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+            timeout=BUSY_TIMEOUT_MS / 1000, 
+            # No type detection: values come back as stored (TEXT dates stay
+            # strings), with no per-column converter lookup on each row
+            detect_types=0,
+            cached_statements=STATEMENT_CACHE_SIZE
         )
         
         # Set row factory for named column access
         if row_factory is not None:
             conn.row_factory = row_factory
         
-        # Set pragmas for better concurrency and reliability
-        try:
-            conn.execute("PRAGMA journal_mode=WAL;")
-            conn.execute("PRAGMA busy_timeout=5000;")
-        except Exception as pragma_exc:
-            logger.warning(f"Failed to set PRAGMAs: {pragma_exc}")
+        # journal_mode=WAL is persistent in the database file: switch it only
+        # once per file (busy_timeout is already set by `timeout` above)
+        wal_key = (str(db_file), ConnectionPool._file_identity(str(db_file)))
+        if wal_key not in _wal_databases:
+            try:
+                mode = conn.execute("PRAGMA journal_mode=WAL;").fetchone()
+                if mode and str(mode[0]).lower() == "wal":
+                    _wal_databases.add(wal_key)
+            except Exception as pragma_exc:
+                logger.warning(f"Failed to set PRAGMAs: {pragma_exc}")
+        apply_tuning_pragmas(conn)
         
         return conn
     except Exception as e:
@@ -97,7 +167,7 @@ def query_one(
     
     conn = None
     try:
-        conn = get_connection()
+        conn = _query_pool.acquire()
         cursor = conn.cursor()
         
         if params:
@@ -123,7 +193,7 @@ def query_one(
         raise
     finally:
         if conn:
-            conn.close()
+            _query_pool.release(conn)
 
 
 def query_all(
@@ -153,7 +223,7 @@ def query_all(
     
     conn = None
     try:
-        conn = get_connection()
+        conn = _query_pool.acquire()
         cursor = conn.cursor()
         
         if params:
@@ -176,19 +246,28 @@ def query_all(
         raise
     finally:
         if conn:
-            conn.close()
+            _query_pool.release(conn)
 
 
 @contextmanager
-def transaction(conn: Optional[sqlite3.Connection] = None):
+def transaction(conn: Optional[sqlite3.Connection] = None, immediate: bool = False):
     """
     Context manager for database transactions.
     
     Automatically commits on success, rolls back on exception.
-    If no connection provided, creates one.
+    If no connection provided, creates one. On autocommit connections
+    (isolation_level=None, e.g. pooled ones) an explicit BEGIN is issued so
+    all statements of the block share a single commit. If such a connection
+    is already inside a transaction opened by an outer transaction() block,
+    the inner block joins it: the outer block commits or rolls back.
+    Callbacks registered with on_commit() run after the outermost block
+    commits, and are dropped if it rolls back.
     
     Args:
         conn: Optional existing connection to use
+        immediate: Start with BEGIN IMMEDIATE (autocommit connections only):
+                   the write lock is taken up front, so a transaction that
+                   reads before writing cannot fail upgrading its lock
     
     Yields:
         sqlite3.Connection: Database connection for transaction
@@ -212,7 +291,20 @@ def transaction(conn: Optional[sqlite3.Connection] = None):
     else:
         close_after = False
     
+    if conn.isolation_level is None and conn.in_transaction:
+        # Nested block: the outer transaction() owns commit/rollback
+        yield conn
+        return
+    
+    # An inner block on a connection in implicit-transaction mode still
+    # commits, but leaves the after-commit callbacks to the outer block
+    owner = conn not in _after_commit
+    if owner:
+        _after_commit[conn] = {}
+    callbacks = None
     try:
+        if conn.isolation_level is None:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
         yield conn
         conn.commit()
     except Exception as e:
@@ -220,8 +312,39 @@ def transaction(conn: Optional[sqlite3.Connection] = None):
         conn.rollback()
         raise
     finally:
+        if owner:
+            callbacks = _after_commit.pop(conn, None)
         if close_after:
             conn.close()
+    
+    # Only reached once committed
+    for callback in (callbacks or {}).values():
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"After-commit callback failed: {e}")
+
+
+def on_commit(conn: sqlite3.Connection, callback: Callable[[], None], key: Any = None) -> None:
+    """
+    Run callback() once the transaction() block in progress on conn commits.
+    
+    Nothing runs if the block rolls back. Outside any transaction() block
+    the callback runs immediately: on an autocommit connection the write
+    is already committed; otherwise the commit is the caller's and this
+    module cannot see it.
+    
+    Args:
+        conn: Connection the write was made on
+        callback: Function called without arguments
+        key: Callbacks registered with the same key in one transaction
+             run only once (default: the callback itself)
+    """
+    callbacks = _after_commit.get(conn)
+    if callbacks is None:
+        callback()
+        return
+    callbacks[callback if key is None else key] = callback
 
 
 def execute_query(
@@ -249,7 +372,7 @@ def execute_query(
     """
     conn = None
     try:
-        conn = get_connection()
+        conn = _query_pool.acquire()
         cursor = conn.cursor()
         
         if params:
@@ -273,7 +396,46 @@ def execute_query(
         raise
     finally:
         if conn:
-            conn.close()
+            _query_pool.release(conn)
+
+
+def executemany_query(
+    query: str,
+    seq_of_params: Iterable[Tuple]
+) -> int:
+    """
+    Execute one statement for every parameter tuple, in a single transaction.
+    
+    The rows are driven by cursor.executemany() (one BEGIN, one commit).
+    seq_of_params may be a generator: it is consumed lazily, so only one
+    parameter tuple needs to exist at a time.
+    
+    Args:
+        query: SQL statement (INSERT, UPDATE, DELETE) with placeholders
+        seq_of_params: Iterable of parameter tuples
+    
+    Returns:
+        int: Number of rows affected
+        
+    Example:
+        >>> rows = executemany_query(
+        ...     "UPDATE articles SET stock = ? WHERE id = ?",
+        ...     ((stock, article_id) for article_id, stock in counted.items())
+        ... )
+    """
+    conn = None
+    try:
+        conn = _query_pool.acquire()
+        with transaction(conn):
+            cursor = conn.executemany(query, seq_of_params)
+        return cursor.rowcount
+    except Exception as e:
+        logger.error(f"Error executing query: {e}")
+        logger.error(f"Query: {query}")
+        raise
+    finally:
+        if conn:
+            _query_pool.release(conn)
 
 
 def execute(
@@ -286,8 +448,9 @@ def execute(
     """
     Execute a query with retry logic for database lock errors.
     
-    This function attempts to execute a query multiple times if it encounters
-    a "database is locked" error, with exponential backoff between retries.
+    Lock contention is normally absorbed by SQLite's busy handler
+    (BUSY_TIMEOUT_MS). If a "database is locked" error still surfaces, the
+    query is retried on the same pooled connection with exponential backoff.
     
     Args:
         query: SQL query string (INSERT, UPDATE, DELETE)
@@ -325,7 +488,7 @@ def execute(
     for attempt in range(retries):
         conn = None
         try:
-            conn = get_connection()
+            conn = _query_pool.acquire()
             cursor = conn.cursor()
             
             if params:
@@ -351,12 +514,8 @@ def execute(
                     f"Database locked on attempt {attempt + 1}/{retries}. "
                     f"Retrying in {delay}s... Query: {query[:100]}"
                 )
-                if conn:
-                    try:
-                        conn.close()
-                    except sqlite3.Error:
-                        # Ignore errors when closing connection
-                        pass
+                # Retry on the same pooled connection: release() rolls back
+                # the failed attempt, reopening would only start a cold handle
                 time.sleep(delay)
                 delay *= 2  # Exponential backoff
                 continue
@@ -387,11 +546,314 @@ def execute(
             raise
         finally:
             if conn:
-                try:
-                    conn.close()
-                except sqlite3.Error:
-                    # Ignore errors when closing connection
-                    pass
+                _query_pool.release(conn)
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of long-lived SQLite connections.
+    
+    Each thread gets its own dedicated connection per database path (SQLite
+    connections must not be shared across threads), created once by
+    `connect` with its PRAGMAs already applied. Connections stay open between
+    calls so the page cache remains warm.
+    
+    acquire()/release() calls may be nested within a thread: the same
+    connection is handed out and only the outermost release() finalizes it,
+    rolling back any transaction left open (as close() would have done).
+    
+    With readonly=True every connection gets PRAGMA query_only=1: under WAL
+    these readers never block the writer (see read_connection()).
+    
+    Args:
+        connect: Callable returning a new configured connection
+                 (default: db.db.get_connection + TUNING_PRAGMAS)
+        db_path: Callable returning the database path `connect` opens
+                 (default: APP_DB_PATH, falling back to get_db_file())
+        readonly: Open query_only connections
+    
+    Example:
+        >>> conn = pool.acquire()
+        >>> try:
+        >>>     conn.execute("SELECT 1")
+        >>> finally:
+        >>>     pool.release(conn)
+    """
+    
+    def __init__(
+        self,
+        connect: Optional[Callable[[], sqlite3.Connection]] = None,
+        db_path: Optional[Callable[[], str]] = None,
+        readonly: bool = False
+    ):
+        self._connect = connect or _open_pooled_connection
+        self._db_path = db_path or self._app_db_path
+        self._readonly = readonly
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[sqlite3.Connection] = []
+        self.total_acquisitions = 0
+        self.connections_opened = 0
+    
+    @staticmethod
+    def _app_db_path() -> str:
+        """Database path currently targeted by db.db.get_connection()."""
+        return os.getenv("APP_DB_PATH", get_db_file())
+    
+    @staticmethod
+    def _file_identity(path: str) -> Optional[Tuple[int, int]]:
+        """(device, inode) of the database file, None if it does not exist yet."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_dev, st.st_ino)
+    
+    def _slots(self) -> Dict[str, list]:
+        slots = getattr(self._local, "slots", None)
+        if slots is None:
+            slots = self._local.slots = {}
+        return slots
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Return this thread's connection for the current database path."""
+        path = self._db_path()
+        identity = self._file_identity(path)
+        slots = self._slots()
+        slot = slots.get(path)
+        self.total_acquisitions += 1
+        
+        if slot is not None:
+            conn, conn_identity, depth = slot
+            try:
+                # Attribute read, no SQL: raises ProgrammingError once closed
+                _ = conn.total_changes
+                alive = True
+            except sqlite3.ProgrammingError:
+                alive = False
+            if alive and conn_identity == identity:
+                slot[2] = depth + 1
+                return conn
+            # Closed by a caller, or the file was replaced: open a fresh one
+            self._close(conn)
+        
+        conn = self._connect()
+        if self._readonly:
+            conn.execute("PRAGMA query_only=1;")
+        with self._lock:
+            self._all.append(conn)
+            self.connections_opened += 1
+        slots[path] = [conn, self._file_identity(path), 1]
+        return conn
+    
+    def current(self) -> Optional[sqlite3.Connection]:
+        """This thread's connection for the current path if checked out, else None."""
+        slot = self._slots().get(self._db_path())
+        if slot is not None and slot[2] > 0:
+            return slot[0]
+        return None
+    
+    def stats(self) -> Dict[str, int]:
+        """Usage counters: acquire() calls, connections opened, connections open now."""
+        with self._lock:
+            open_now = len(self._all)
+        return {
+            "total_acquisitions": self.total_acquisitions,
+            "connections_opened": self.connections_opened,
+            "open_connections": open_now,
+        }
+    
+    def release(self, conn: Optional[sqlite3.Connection]) -> None:
+        """Give back a connection obtained from acquire()."""
+        if conn is None:
+            return
+        for slot in self._slots().values():
+            if slot[0] is conn:
+                slot[2] -= 1
+                if slot[2] <= 0:
+                    slot[2] = 0
+                    try:
+                        if conn.in_transaction:
+                            conn.rollback()
+                    except sqlite3.Error as e:
+                        logger.warning(f"Failed to reset pooled connection: {e}")
+                return
+        # Not a pooled connection for this thread
+        conn.close()
+    
+    @contextmanager
+    def pooled(self):
+        """Context manager yielding a pooled connection."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+    
+    @contextmanager
+    def transaction(self):
+        """Context manager yielding a pooled connection inside transaction()."""
+        with self.pooled() as conn:
+            with transaction(conn):
+                yield conn
+    
+    def discard(self, conn: sqlite3.Connection) -> None:
+        """Drop and close a connection (e.g. after an error); next acquire() reopens."""
+        slots = self._slots()
+        for path, slot in list(slots.items()):
+            if slot[0] is conn:
+                del slots[path]
+        self._close(conn)
+    
+    def _close(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if conn in self._all:
+                self._all.remove(conn)
+        _optimize_and_close(conn)
+    
+    def close_all(self) -> None:
+        """Close every pooled connection (all threads). Useful for tests/shutdown."""
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            _optimize_and_close(conn)
+        self._local = threading.local()
+
+
+def _optimize_and_close(conn: sqlite3.Connection) -> None:
+    """
+    Close a long-lived connection, running PRAGMA optimize first.
+    
+    optimize refreshes the planner statistics (ANALYZE) of the tables this
+    connection queried, when SQLite judges them stale. Errors are ignored:
+    the connection may already be closed or belong to another thread.
+    """
+    try:
+        conn.execute("PRAGMA optimize;")
+    except sqlite3.Error:
+        pass
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+# Shared pool used by the buvette DB modules
+pool = ConnectionPool()
+
+# Read-only (query_only) connections for hot read paths, see read_connection()
+read_pool = ConnectionPool(readonly=True)
+
+
+@contextmanager
+def read_connection():
+    """
+    Context manager yielding a connection for read-only queries.
+    
+    Uses read_pool, so reads do not go through the thread's write connection.
+    While that write connection holds an open transaction it is used
+    instead, so the caller still sees its own uncommitted writes.
+    
+    Example:
+        >>> with read_connection() as conn:
+        >>>     conn.execute("SELECT stock FROM buvette_articles WHERE id=?", (1,))
+    """
+    writer = pool.current()
+    source = pool if writer is not None and writer.in_transaction else read_pool
+    with source.pooled() as conn:
+        yield conn
+
+# Pool behind query_one/query_all/execute_query/execute: connections come
+# from get_connection() (looked up at call time) for the get_db_file() path
+_query_pool = ConnectionPool(lambda: get_connection(), db_path=lambda: get_db_file())
+
+
+# Seconds between two background maintenance passes, see start_maintenance()
+MAINTENANCE_INTERVAL_S = 60
+
+# Busy timeout of the TRUNCATE checkpoint attempt. While it waits for readers
+# it holds the write lock, so it must give up quickly rather than after
+# BUSY_TIMEOUT_MS; run_maintenance() then falls back to a PASSIVE checkpoint.
+MAINTENANCE_BUSY_TIMEOUT_MS = 100
+
+_maintenance_started = False
+_maintenance_lock = threading.Lock()
+
+
+def run_maintenance(conn: sqlite3.Connection) -> bool:
+    """
+    Checkpoint (and if possible truncate) the WAL file and refresh planner
+    statistics.
+    
+    Tries PRAGMA wal_checkpoint(TRUNCATE) with a busy timeout of
+    MAINTENANCE_BUSY_TIMEOUT_MS, so writers are held up for that long at
+    most. If readers or writers keep the database busy, a PASSIVE checkpoint
+    copies what it can without waiting, and the WAL is truncated on a later
+    pass. PRAGMA optimize runs in both cases. Databases not in WAL mode are
+    left alone.
+    
+    Args:
+        conn: Connection to the database to maintain
+    
+    Returns:
+        bool: True if the maintenance ran, False if the database is not in WAL mode
+    """
+    mode = conn.execute("PRAGMA journal_mode;").fetchone()[0]
+    if str(mode).lower() != "wal":
+        return False
+    timeout = conn.execute("PRAGMA busy_timeout;").fetchone()[0]
+    conn.execute(f"PRAGMA busy_timeout={MAINTENANCE_BUSY_TIMEOUT_MS};")
+    try:
+        busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE);").fetchone()[0]
+    except sqlite3.OperationalError as e:
+        logger.debug(f"TRUNCATE checkpoint failed: {e}")
+        busy = 1
+    finally:
+        conn.execute(f"PRAGMA busy_timeout={int(timeout)};")
+    if busy:
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE);").fetchone()
+    conn.execute("PRAGMA optimize;")
+    return True
+
+
+def _maintenance_loop(interval_s: float) -> None:
+    # Dedicated pool: this thread gets its own connection, reopened when the
+    # application switches to another database file
+    maintenance_pool = ConnectionPool()
+    while True:
+        time.sleep(interval_s)
+        try:
+            with maintenance_pool.pooled() as conn:
+                run_maintenance(conn)
+        except Exception as e:
+            logger.warning(f"Background database maintenance failed: {e}")
+
+
+def start_maintenance(interval_s: float = MAINTENANCE_INTERVAL_S) -> bool:
+    """
+    Start the background maintenance thread (at most once per process).
+    
+    Every interval_s seconds a daemon thread runs run_maintenance() on its
+    own connection. Its TRUNCATE checkpoint can still hold up a UI write for
+    up to MAINTENANCE_BUSY_TIMEOUT_MS; when the database stays busy it falls
+    back to a PASSIVE checkpoint, which never waits.
+    
+    Args:
+        interval_s: Seconds between two maintenance passes
+    
+    Returns:
+        bool: True if the thread was started, False if it was already running
+    """
+    global _maintenance_started
+    with _maintenance_lock:
+        if _maintenance_started:
+            return False
+        _maintenance_started = True
+    threading.Thread(
+        target=_maintenance_loop, args=(interval_s,), name="db-maintenance", daemon=True
+    ).start()
+    logger.info(f"Background database maintenance every {interval_s}s")
+    return True
 
 
 # Convenience aliases
@@ -0,0 +1,89 @@
+"""
+Listes déroulantes partagées (événements, articles de la buvette).
+
+Les dialogues buvette (inventaires, mouvements) remplissent leurs listes
+déroulantes à chaque ouverture. Les résultats sont mis en cache par base de
+données et invalidés explicitement par les chemins d'écriture :
+- événements : modules.events, dialogs.edit_event_dialog
+- articles : modules.buvette_db (insert/update/delete_article),
+  lib.db_articles.create_article
+
+modules.buvette_inventaire_db et modules.buvette_mouvements_db ré-exportent
+get_events / get_articles sous leurs anciens noms list_events / list_articles.
+"""
+
+import os
+
+from db.db import get_db_file
+from modules.db_api import read_connection
+
+__all__ = [
+    "get_events", "get_articles",
+    "invalidate_events", "invalidate_articles", "invalidate_dropdowns",
+]
+
+
+def _db_key():
+    """Database targeted by the pool, so each test/base gets its own entries."""
+    return os.getenv("APP_DB_PATH", str(get_db_file()))
+
+
+def _fetch(sql, conn=None):
+    if conn is not None:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return tuple({"id": row[0], "name": row[1]} for row in cursor.execute(sql).fetchall())
+    with read_connection() as conn:
+        return _fetch(sql, conn)
+
+
+_EVENTS_SQL = "SELECT id, name FROM events ORDER BY date DESC"
+_ARTICLES_SQL = "SELECT id, name FROM buvette_articles ORDER BY name"
+
+# db_key -> tuple of {"id", "name"} dicts
+_events_cache = {}
+_articles_cache = {}
+
+
+def _cached(cache, sql, conn):
+    key = _db_key()
+    rows = cache.get(key)
+    if rows is None:
+        rows = cache[key] = _fetch(sql, conn)
+    return [dict(row) for row in rows]
+
+
+def get_events(conn=None):
+    """
+    List events (id, name) for dropdowns, most recent first; returns list of dicts.
+
+    Args:
+        conn: Optional open connection used on a cache miss (default: read_connection())
+    """
+    return _cached(_events_cache, _EVENTS_SQL, conn)
+
+
+def get_articles(conn=None):
+    """
+    List articles (id, name) for dropdowns, sorted by name; returns list of dicts.
+
+    Args:
+        conn: Optional open connection used on a cache miss (default: read_connection())
+    """
+    return _cached(_articles_cache, _ARTICLES_SQL, conn)
+
+
+def invalidate_events():
+    """Drop cached events; call after inserting, updating or deleting an event."""
+    _events_cache.clear()
+
+
+def invalidate_articles():
+    """Drop cached articles; call after inserting, renaming or deleting an article."""
+    _articles_cache.clear()
+
+
+def invalidate_dropdowns():
+    """Drop every cached dropdown list (e.g. after switching or restoring the database)."""
+    invalidate_events()
+    invalidate_articles()
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from db.db import get_connection
+from modules.dropdowns import invalidate_events
 from modules.event_modules import EventModulesWindow
 from modules.event_payments import PaymentsWindow
 from modules.event_caisses import EventCaissesWindow
@@ -134,6 +135,7 @@ class EventsWindow(tk.Toplevel):
             conn.execute("DELETE FROM events WHERE id = ?", (eid,))
             conn.commit()
             conn.close()
+            invalidate_events()
             logger.info(f"Événement supprimé id {eid}")
             self.refresh_events()
         except Exception as e:
@@ -241,6 +243,7 @@ class EventDialog(tk.Toplevel):
                 )
             conn.commit()
             conn.close()
+            invalidate_events()
             if self.on_save:
                 self.on_save()
             self.destroy()
@@ -39,7 +39,7 @@ def load_inventory_lines(inventaire_id: int) -> List[Dict[str, Any]]:
         - article_id: article ID
         - quantite: quantity counted
         - commentaire: optional comment
-        - article_name: article name (from JOIN)
+        - article_name: article name (from the cached article list)
         
     Raises:
         Exception: Re-raises any exception after writing an error report
@@ -10,31 +10,230 @@ Ce module fournit:
   enregistre les deltas
 - revert_inventory_effect(inv_id): annule les effets d'un inventaire
 - inventory_stock_journal(inv_id): récupère l'historique des modifications
+  (iter_inventory_stock_journal pour le parcourir par lots)
 - create_purchase_batch(): enregistre un lot d'achat avec prix unitaire
 - consume_purchase_batches_fifo(): consomme des lots en FIFO pour calculer le coût
+- estimate_fifo_cost(): même coût FIFO, en lecture seule (une requête SQL)
 
 Toutes les opérations sont transactionnelles.
+
+ensure_stock_tables() configure aussi la connexion (_configure): mode WAL,
+persistant pour le fichier, et PRAGMAs de réglage de modules.db_api.
+Sans connexion fournie, il utilise la connexion partagée du thread
+(modules.db_api.pool) au lieu d'ouvrir et fermer une connexion à chaque appel.
+Les autres fonctions reçoivent la connexion de l'appelant.
+
+Écrivain unique : SQLite ne verrouille pas par ligne, et deux threads qui
+appliquent ou annulent un inventaire en même temps entrelaceraient leurs
+lectures/écritures. Les écritures de stock en plusieurs requêtes
+(apply_inventory_snapshot, revert_inventory_effect,
+consume_purchase_batches_fifo, recompute_stock_for_article) sont donc
+sérialisées par un verrou de module (_write_lock, réentrant pour les appels
+imbriqués). set_stock et adjust_stock ne le prennent pas : une seule requête,
+atomique pour SQLite, et la transaction de l'appelant se poursuit après
+elles, qu'un verrou limité à la requête ne couvrirait pas.
+Ordre des verrous : _write_lock d'abord, puis le verrou d'écriture SQLite
+(BEGIN IMMEDIATE). Un appelant qui ouvre sa propre transaction autour de ces
+fonctions prend write_lock() avant, sinon deux threads s'interbloquent.
+Les lectures ne le prennent pas : en WAL elles ne bloquent pas l'écrivain.
+Le verrou ne couvre que ce processus ; l'application n'ouvre qu'un processus
+écrivain par base.
 """
 
-from db.db import get_connection
-from utils.db_helpers import rows_to_dicts
+import sqlite3
+import threading
+from contextlib import nullcontext
+from itertools import chain
+
+from modules.db_api import pool, transaction, on_commit, apply_tuning_pragmas, BUSY_TIMEOUT_MS
+from utils.db_helpers import fetch_dicts, iter_dicts, iter_chunks
 from utils.app_logger import get_logger
 
 logger = get_logger("stock_db")
 
+# Page size of a newly created database file: larger pages mean fewer page
+# reads per journal scan. SQLite only honours it before the first table exists.
+PAGE_SIZE = 8192
+
+# SQL of the hot paths, defined once: sqlite3 caches compiled statements per
+# connection by SQL text, so each call only rebinds parameters
+_SQL_GET_STOCK = "SELECT stock FROM buvette_articles WHERE id=?"
+_SQL_SET_STOCK = "UPDATE buvette_articles SET stock=? WHERE id=?"
+_SQL_ADJUST_STOCK = "UPDATE buvette_articles SET stock = MAX(0, COALESCE(stock, 0) + ?) WHERE id=?"
+_SQL_INSERT_JOURNAL = """
+    INSERT INTO inventory_stock_journal
+    (inventaire_id, article_id, delta, scope)
+    VALUES (?, ?, ?, 'buvette')
+"""
+_SQL_INVENTORY_JOURNAL = """
+    SELECT j.*, a.name as article_name
+    FROM inventory_stock_journal j
+    LEFT JOIN buvette_articles a ON j.article_id = a.id
+    WHERE j.inventaire_id=?
+    ORDER BY j.created_at
+"""
+_SQL_INSERT_BATCH = """
+    INSERT INTO article_purchase_batches
+    (article_id, quantity, remaining_quantity, unit_price, achat_id, scope)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+_SQL_FIFO_BATCHES = """
+    SELECT id, remaining_quantity, unit_price
+    FROM article_purchase_batches
+    WHERE article_id = ? AND scope = ? AND remaining_quantity > 0
+    ORDER BY purchase_date ASC, id ASC
+"""
+# Signed sum of an article's movements in one scan: 'entrée', 'inventaire'
+# and 'achat' add, 'sortie' subtracts, other types are neutral and listed
+_SQL_RECOMPUTE_STOCK = """
+    SELECT
+        COALESCE(SUM(CASE
+            WHEN type_mouvement IN ('entrée', 'inventaire', 'achat') THEN quantite
+            WHEN type_mouvement = 'sortie' THEN -quantite
+            ELSE 0
+        END), 0),
+        COUNT(*),
+        GROUP_CONCAT(DISTINCT CASE
+            WHEN type_mouvement NOT IN ('entrée', 'inventaire', 'achat', 'sortie')
+                 OR type_mouvement IS NULL
+            THEN COALESCE(type_mouvement, 'NULL')
+        END)
+    FROM buvette_mouvements
+    WHERE article_id = ?
+"""
+# FIFO cost without consuming: each batch gives MIN(remaining, qty - units
+# available in the older batches), computed with a running SUM window
+_SQL_ESTIMATE_FIFO_COST = """
+    SELECT
+        COALESCE(SUM(MIN(remaining_quantity, :qty - prev_cum) * unit_price), 0.0),
+        COALESCE(SUM(MIN(remaining_quantity, :qty - prev_cum)), 0)
+    FROM (
+        SELECT remaining_quantity, unit_price,
+               COALESCE(SUM(remaining_quantity) OVER (
+                   ORDER BY purchase_date, id
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ), 0) AS prev_cum
+        FROM article_purchase_batches
+        WHERE article_id = :article_id AND scope = :scope AND remaining_quantity > 0
+    )
+    WHERE prev_cum < :qty
+"""
+_SQL_SET_BATCH_REMAINING = """
+    UPDATE article_purchase_batches
+    SET remaining_quantity = ?
+    WHERE id = ?
+"""
+
+# Serializes multi-statement stock writers in this process (see module
+# docstring). Reentrant: a snapshot applied inside an outer writer takes it
+# again on the same thread.
+_write_lock = threading.RLock()
+
+
+def write_lock():
+    """
+    Verrou des écritures de stock, à prendre avant d'ouvrir une transaction
+    qui appelle revert_inventory_effect, recompute_stock_for_article, etc.
+
+    Exemple:
+        with write_lock(), transaction(conn, immediate=True):
+            revert_inventory_effect(conn, inv_id)
+    """
+    return _write_lock
+
+
+# Callbacks invoked with the article_id once a stock write is committed,
+# so that read caches (e.g. buvette_db.get_article_stock) can be invalidated.
+_stock_change_hooks = []
+
+
+def register_stock_change_hook(callback):
+    """
+    Enregistre un callback appelé à chaque écriture de stock.
+
+    Args:
+        callback: Fonction appelée avec l'article_id modifié (None = tous)
+    """
+    if callback not in _stock_change_hooks:
+        _stock_change_hooks.append(callback)
+
+
+def notify_stock_changed(article_id=None):
+    """
+    Notifie les callbacks enregistrés qu'un stock a été modifié.
+
+    Args:
+        article_id: ID de l'article modifié, ou None si plusieurs articles
+                    ont pu changer
+    """
+    for callback in _stock_change_hooks:
+        try:
+            callback(article_id)
+        except Exception as e:
+            logger.warning(f"Stock change hook failed for article {article_id}: {e}")
+
+
+def _notify_after_commit(conn, article_id=None):
+    """
+    notify_stock_changed(article_id) une fois la transaction de conn validée.
+
+    Notifier avant le COMMIT laisserait un lecteur (autre connexion)
+    recharger un cache avec l'ancienne valeur ; rien n'est notifié en cas
+    de ROLLBACK. Voir modules.db_api.on_commit.
+    """
+    on_commit(conn, lambda: notify_stock_changed(article_id),
+              key=("stock_changed", article_id))
+
+
+def _configure(conn):
+    """
+    Passe la base en mode WAL et applique les PRAGMAs de réglage.
+
+    Sur un fichier encore vide, page_size est d'abord fixé à PAGE_SIZE (il ne
+    peut plus changer une fois la base créée et passée en WAL).
+    journal_mode=WAL est persistant (une fois par fichier suffit) ; les autres
+    PRAGMAs (synchronous, temp_store, cache_size, mmap_size, busy_timeout)
+    valent pour la connexion. Best-effort : si WAL n'est pas disponible (ex.
+    partage réseau), la connexion reste utilisable avec le journal par défaut.
+
+    Args:
+        conn: Database connection
+    """
+    try:
+        if conn.execute("PRAGMA page_count;").fetchone()[0] == 0:
+            conn.execute(f"PRAGMA page_size={PAGE_SIZE};")
+    except sqlite3.Error as e:
+        logger.warning(f"Could not set page_size: {e}")
+    try:
+        mode = conn.execute("PRAGMA journal_mode=WAL;").fetchone()
+        if mode and str(mode[0]).lower() != "wal":
+            logger.warning(f"WAL unavailable, journal_mode stays {mode[0]}")
+    except sqlite3.Error as e:
+        logger.warning(f"Could not enable WAL journal mode: {e}")
+    apply_tuning_pragmas(conn)
+    try:
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS};")
+    except sqlite3.Error as e:
+        logger.warning(f"Could not set busy_timeout: {e}")
+
 
 def ensure_stock_tables(conn=None):
     """
     Crée les tables nécessaires pour le journal de stock et les lots d'achat.
     
+    La connexion est d'abord configurée par _configure() (WAL, PRAGMAs).
+    
     Args:
-        conn: Optional database connection. If None, creates a new connection.
+        conn: Optional database connection. If None, uses this thread's pooled
+              connection (modules.db_api.pool), which stays open afterwards.
     """
     conn_provided = conn is not None
     if not conn_provided:
-        conn = get_connection()
+        conn = pool.acquire()
     
     try:
+        _configure(conn)
+        
         # Create inventory stock journal table
         conn.execute("""
             CREATE TABLE IF NOT EXISTS inventory_stock_journal (
@@ -50,6 +249,20 @@ def ensure_stock_tables(conn=None):
             )
         """)
         
+        # Journal lookups filter by inventaire_id (revert, history, DELETE).
+        # The index also carries delta, so revert_inventory_effect's
+        # SUM(delta) per (inventaire_id, article_id) is read from the index
+        # alone; it supersedes idx_isj_inv_article (same leading columns)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_isj_inv_article_delta
+            ON inventory_stock_journal(inventaire_id, article_id, delta)
+        """)
+        conn.execute("DROP INDEX IF EXISTS idx_isj_inv_article")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_isj_article
+            ON inventory_stock_journal(article_id)
+        """)
+        
         # Create article purchase batches table for FIFO costing
         conn.execute("""
             CREATE TABLE IF NOT EXISTS article_purchase_batches (
@@ -64,6 +277,14 @@ def ensure_stock_tables(conn=None):
                 FOREIGN KEY (article_id) REFERENCES buvette_articles(id)
             )
         """)
+        # FIFO scan of consume_purchase_batches_fifo: range scan in
+        # (purchase_date, id) order, no sort. Partial: consumed batches
+        # (remaining_quantity = 0) leave the index
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_apb_fifo
+            ON article_purchase_batches(article_id, scope, purchase_date, id)
+            WHERE remaining_quantity > 0
+        """)
         
         if not conn_provided:
             conn.commit()
@@ -75,7 +296,7 @@ def ensure_stock_tables(conn=None):
         raise
     finally:
         if not conn_provided and conn:
-            conn.close()
+            pool.release(conn)
 
 
 def get_stock(conn, article_id):
@@ -90,10 +311,7 @@ def get_stock(conn, article_id):
         int: Stock actuel (0 si l'article n'existe pas ou n'a pas de stock)
     """
     try:
-        row = conn.execute(
-            "SELECT stock FROM buvette_articles WHERE id=?",
-            (article_id,)
-        ).fetchone()
+        row = conn.execute(_SQL_GET_STOCK, (article_id,)).fetchone()
         if row:
             return row[0] if row[0] is not None else 0
         return 0
@@ -110,13 +328,15 @@ def set_stock(conn, article_id, qty):
         conn: Database connection
         article_id: ID de l'article
         qty: Nouvelle quantité en stock
+
+    Ne valide pas : plusieurs écritures groupées dans transaction() de
+    l'appelant partagent un seul commit.
     """
     try:
-        conn.execute(
-            "UPDATE buvette_articles SET stock=? WHERE id=?",
-            (qty, article_id)
-        )
-        logger.debug(f"Set stock for article {article_id} to {qty}")
+        conn.execute(_SQL_SET_STOCK, (qty, article_id))
+        _notify_after_commit(conn, article_id)
+        # Lazy %-formatting: nothing is built while DEBUG is disabled
+        logger.debug("Set stock for article %s to %s", article_id, qty)
     except Exception as e:
         logger.error(f"Error setting stock for article {article_id}: {e}")
         raise
@@ -131,11 +351,14 @@ def adjust_stock(conn, article_id, delta, reason=None):
         article_id: ID de l'article
         delta: Quantité à ajouter (positif) ou retirer (négatif)
         reason: Motif de l'ajustement (optionnel)
+
+    Le stock résultant ne descend jamais sous 0. Comme set_stock, ne valide
+    pas : le commit revient à l'appelant.
     """
     try:
-        current_stock = get_stock(conn, article_id)
-        new_stock = max(0, current_stock + delta)
-        set_stock(conn, article_id, new_stock)
+        # Read, clamp and write in one statement: no race with another writer
+        conn.execute(_SQL_ADJUST_STOCK, (delta, article_id))
+        _notify_after_commit(conn, article_id)
         logger.info(
             f"Adjusted stock for article {article_id} by {delta} "
             f"(reason: {reason})"
@@ -145,6 +368,183 @@ def adjust_stock(conn, article_id, delta, reason=None):
         raise
 
 
+# UPDATE ... FROM needs SQLite 3.33+
+_HAS_UPDATE_FROM = sqlite3.sqlite_version_info >= (3, 33, 0)
+
+
+# Whitelist of allowed inventory line tables for security
+_ALLOWED_LINES_TABLES = frozenset({'buvette_inventaire_lignes', 'inventaire_lignes'})
+
+# Existing line tables per (database file of the connection, candidates).
+# Only non-empty results are kept, so a table created later is still found;
+# clear_schema_cache() drops the entries after a migration that renames or
+# drops a table. In-memory databases have no file and are not cached.
+_lines_tables_cache = {}
+
+
+def clear_schema_cache():
+    """Clear the resolved inventory line tables. Useful for testing or after database migrations."""
+    _lines_tables_cache.clear()
+
+
+def _resolve_lines_tables(conn, candidates):
+    """
+    Retourne les tables candidates autorisées et existantes, dans l'ordre.
+
+    La liste blanche et sqlite_master ne sont consultés qu'au premier appel
+    pour une base et une liste de candidates ; les appels suivants ne lancent
+    que PRAGMA database_list. La base est le fichier « main » de conn, et non
+    APP_DB_PATH : l'appelant peut travailler sur une autre base.
+    """
+    db_file = next((row[2] for row in conn.execute("PRAGMA database_list")
+                    if row[1] == "main"), "")
+    cache_key = (db_file, tuple(candidates)) if db_file else None
+    tables = _lines_tables_cache.get(cache_key) if cache_key else None
+    if tables is None:
+        found = []
+        for table_name in candidates:
+            # Validate table name against whitelist
+            if table_name not in _ALLOWED_LINES_TABLES:
+                logger.warning(f"Table '{table_name}' not in whitelist, skipping")
+                continue
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                (table_name,)
+            ).fetchone()
+            if exists:
+                found.append(table_name)
+        tables = tuple(found)
+        if tables and cache_key:
+            _lines_tables_cache[cache_key] = tables
+    return tables
+
+
+def _stock_transaction(conn):
+    """
+    Transaction englobant une écriture de stock en plusieurs requêtes.
+
+    Sur une connexion autocommit (isolation_level=None, ex. celles du pool),
+    BEGIN IMMEDIATE ... COMMIT (ROLLBACK en cas d'erreur), ou rattachement à
+    la transaction déjà ouverte par l'appelant. Sur une connexion en mode
+    transactionnel implicite, le commit reste à la charge de l'appelant.
+    """
+    if conn.isolation_level is None:
+        return transaction(conn, immediate=True)
+    return nullcontext(conn)
+
+
+# Rows per VALUES batch of the set-based snapshot: 2 parameters per row plus
+# the inventaire_id stays under SQLite's historical 999-parameter limit
+_SNAPSHOT_BATCH_ROWS = 256
+
+# VALUES-list row count -> (journal INSERT, stock UPDATE) SQL
+_snapshot_sql_cache = {}
+
+# IN-list size -> stock lookup SQL of the executemany snapshot path
+_stocks_in_sql_cache = {}
+
+
+def _values_bucket(n):
+    """Smallest power of two >= n: VALUES batches are padded up to it."""
+    return 1 << (n - 1).bit_length()
+
+
+def _snapshot_sql(bucket):
+    """
+    SQL du snapshot set-based pour un VALUES de `bucket` lignes.
+
+    Les lots sont complétés jusqu'à une puissance de deux en répétant leur
+    première ligne ; le SELECT DISTINCT de la CTE élimine ces doublons. Seules
+    une dizaine de variantes du texte SQL existent ainsi, et le cache de
+    requêtes préparées de sqlite3 les réutilise d'un appel à l'autre.
+    """
+    sql = _snapshot_sql_cache.get(bucket)
+    if sql is None:
+        values_cte = (
+            "WITH p(id, q) AS (VALUES " + ",".join(["(?,?)"] * bucket) + "), "
+            "v AS (SELECT DISTINCT id, q FROM p) "
+        )
+        sql = _snapshot_sql_cache[bucket] = (
+            values_cte + """
+            INSERT INTO inventory_stock_journal (inventaire_id, article_id, delta, scope)
+            SELECT ?, v.id, v.q - COALESCE(a.stock, 0), 'buvette'
+            FROM v LEFT JOIN buvette_articles a ON a.id = v.id
+            WHERE v.q IS NOT COALESCE(a.stock, 0)
+            """,
+            values_cte + """
+            UPDATE buvette_articles SET stock = v.q
+            FROM v WHERE buvette_articles.id = v.id
+              AND v.q IS NOT COALESCE(buvette_articles.stock, 0)
+            """,
+        )
+    return sql
+
+
+def _apply_snapshot_set_based(conn, inventaire_id, snapshot):
+    """
+    Journalise puis applique un snapshot (articles distincts) en SQL pur.
+
+    Par lot, les lignes sont passées dans une CTE VALUES (_snapshot_sql) :
+    l'INSERT du journal calcule les deltas contre le stock actuel, puis un
+    UPDATE ... FROM pose les nouvelles quantités. Les articles dont le stock
+    ne change pas ne sont ni journalisés ni réécrits.
+
+    Returns:
+        int: Nombre de lignes ayant modifié un stock
+    """
+    changed = 0
+    for chunk in iter_chunks(snapshot, _SNAPSHOT_BATCH_ROWS):
+        bucket = _values_bucket(len(chunk))
+        insert_sql, update_sql = _snapshot_sql(bucket)
+        params = list(chain.from_iterable(chunk))
+        params.extend(chunk[0] * (bucket - len(chunk)))
+        changed += conn.execute(insert_sql, params + [inventaire_id]).rowcount
+        conn.execute(update_sql, params)
+    return changed
+
+
+def _apply_snapshot_executemany(conn, inventaire_id, snapshot, article_ids):
+    """
+    Journalise puis applique un snapshot avec un SELECT et deux executemany.
+
+    Utilisé quand un article apparaît plusieurs fois dans le snapshot ou
+    quand SQLite ne connaît pas UPDATE ... FROM. Les lignes de delta nul sont
+    écartées avant les executemany.
+
+    Returns:
+        int: Nombre de lignes ayant modifié un stock
+    """
+    # Current stock of every article in one SELECT per chunk of distinct ids;
+    # chunks are padded to a power of two (repeated ids are harmless in IN)
+    # so the statement text, and its prepared statement, is reused
+    stocks = {}
+    for chunk in iter_chunks(list(dict.fromkeys(article_ids))):
+        bucket = _values_bucket(len(chunk))
+        sql = _stocks_in_sql_cache.get(bucket)
+        if sql is None:
+            sql = _stocks_in_sql_cache[bucket] = (
+                "SELECT id, COALESCE(stock, 0) FROM buvette_articles WHERE id IN ("
+                + ",".join("?" * bucket) + ")"
+            )
+        stocks.update(conn.execute(sql, chunk + [chunk[0]] * (bucket - len(chunk))).fetchall())
+
+    # Deltas are computed in order, so a repeated article is measured
+    # against the quantity set by its previous line
+    updates = []
+    journal = []
+    for article_id, new_quantity in snapshot:
+        delta = new_quantity - stocks.get(article_id, 0)
+        if delta == 0:
+            continue
+        stocks[article_id] = new_quantity
+        updates.append((new_quantity, article_id))
+        journal.append((inventaire_id, article_id, delta))
+
+    conn.executemany(_SQL_SET_STOCK, updates)
+    conn.executemany(_SQL_INSERT_JOURNAL, journal)
+    return len(journal)
+
+
 def apply_inventory_snapshot(conn, inventaire_id, lines_table_candidates=None):
     """
     Applique un snapshot d'inventaire et enregistre les deltas.
@@ -159,87 +559,58 @@ def apply_inventory_snapshot(conn, inventaire_id, lines_table_candidates=None):
     1. Récupère les lignes d'inventaire depuis les tables candidates
     2. Calcule le delta entre le stock actuel et la quantité inventoriée
     3. Met à jour le stock de chaque article
-    4. Enregistre les deltas dans inventory_stock_journal pour annulation
+    4. Enregistre les deltas non nuls dans inventory_stock_journal pour annulation
+       (les articles inchangés ne sont ni réécrits ni journalisés)
+
+    Les étapes 2 à 4 s'exécutent en SQL (_apply_snapshot_set_based), ou via
+    executemany si un article est répété (_apply_snapshot_executemany).
     """
-    # Whitelist of allowed table names for security
-    ALLOWED_TABLES = {
-        'buvette_inventaire_lignes': True,
-        'inventaire_lignes': True,
-    }
-    
     if lines_table_candidates is None:
         lines_table_candidates = ['buvette_inventaire_lignes']
     
     try:
-        cursor = conn.cursor()
+        with _write_lock, _stock_transaction(conn):
+            # The only explicit cursor: it returns the lines as plain
+            # (article_id, quantite) tuples; the writes go through conn
+            lines_cursor = conn.cursor()
+            lines_cursor.row_factory = None
         
-        # Find inventory lines from candidate tables
-        snapshot = []
-        for table_name in lines_table_candidates:
-            # Validate table name against whitelist
-            if table_name not in ALLOWED_TABLES:
-                logger.warning(
-                    f"Table '{table_name}' not in whitelist, skipping"
-                )
-                continue
-            
-            try:
-                # Verify table exists in database
-                check_table = cursor.execute(
-                    "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-                    (table_name,)
-                ).fetchone()
-                if not check_table:
-                    continue
-                    
-                # Table name is validated against whitelist and confirmed to exist
-                rows = cursor.execute(f"""
-                    SELECT article_id, quantite
-                    FROM {table_name}
-                    WHERE inventaire_id=?
-                """, (inventaire_id,)).fetchall()
+            # Find inventory lines from candidate tables
+            snapshot = []
+            for table_name in _resolve_lines_tables(conn, lines_table_candidates):
+                try:
+                    # Table name is validated against whitelist and confirmed to exist
+                    rows = lines_cursor.execute(f"""
+                        SELECT article_id, quantite
+                        FROM {table_name}
+                        WHERE inventaire_id=?
+                    """, (inventaire_id,)).fetchall()
                 
-                for row in rows:
-                    snapshot.append({"article_id": row[0], "quantite": row[1]})
-            except Exception as e:
-                logger.warning(f"Could not query table {table_name}: {e}")
-                continue
-
-        if not snapshot:
-            logger.warning(
-                f"No inventory lines found for inventory {inventaire_id} "
-                f"in tables {lines_table_candidates}"
-            )
-            return
-
-        for item in snapshot:
-            article_id = item.get("article_id")
-            new_quantity = item.get("quantite", 0)
-
-            # Get current stock
-            current_stock = get_stock(conn, article_id)
-
-            # Calculate delta
-            delta = new_quantity - current_stock
-
-            # Update stock
-            set_stock(conn, article_id, new_quantity)
+                    # Rows are (article_id, quantite) pairs, kept as-is
+                    snapshot.extend(rows)
+                except Exception as e:
+                    logger.warning(f"Could not query table {table_name}: {e}")
+                    continue
 
-            # Record in journal
-            cursor.execute("""
-                INSERT INTO inventory_stock_journal
-                (inventaire_id, article_id, delta, scope)
-                VALUES (?, ?, ?, 'buvette')
-            """, (inventaire_id, article_id, delta))
+            if not snapshot:
+                logger.warning(
+                    f"No inventory lines found for inventory {inventaire_id} "
+                    f"in tables {lines_table_candidates}"
+                )
+                return
 
-            logger.debug(
-                f"Applied inventory snapshot for article {article_id}: "
-                f"{current_stock} -> {new_quantity} (delta: {delta})"
-            )
+            # Unpacked once; the helpers never index the rows again
+            article_ids = next(zip(*snapshot))
+            if _HAS_UPDATE_FROM and len(set(article_ids)) == len(article_ids):
+                changed = _apply_snapshot_set_based(conn, inventaire_id, snapshot)
+            else:
+                changed = _apply_snapshot_executemany(conn, inventaire_id, snapshot, article_ids)
+            if changed:
+                _notify_after_commit(conn)
 
         logger.info(
             f"Applied inventory snapshot for inventory {inventaire_id} "
-            f"with {len(snapshot)} items"
+            f"with {len(snapshot)} items ({len(snapshot) - changed} unchanged, skipped)"
         )
     except Exception as e:
         logger.error(f"Error applying inventory snapshot for inventory {inventaire_id}: {e}")
@@ -255,42 +626,38 @@ def revert_inventory_effect(conn, inventaire_id):
         inventaire_id: ID de l'inventaire dont il faut annuler les effets
 
     Cette fonction:
-    1. Récupère tous les deltas enregistrés pour cet inventaire
-    2. Applique l'inverse de chaque delta au stock actuel
-    3. Supprime les entrées du journal pour cet inventaire
+    1. Retranche du stock de chaque article la somme de ses deltas
+       enregistrés pour cet inventaire (minimum 0), en une seule requête ;
+       les articles dont les deltas s'annulent ne sont pas réécrits
+    2. Supprime les entrées du journal pour cet inventaire
     """
     try:
-        cursor = conn.cursor()
-
-        # Get all deltas for this inventory
-        rows = cursor.execute("""
-            SELECT article_id, delta FROM inventory_stock_journal
-            WHERE inventaire_id=?
-        """, (inventaire_id,)).fetchall()
-
-        for row in rows:
-            article_id = row[0]
-            delta = row[1]
-
-            # Revert the delta
-            current_stock = get_stock(conn, article_id)
-            new_stock = max(0, current_stock - delta)
-
-            set_stock(conn, article_id, new_stock)
-            logger.debug(
-                f"Reverted stock for article {article_id}: "
-                f"{current_stock} -> {new_stock} (delta: -{delta})"
-            )
+        with _write_lock, _stock_transaction(conn):
+            # Subtract each article's summed deltas, clamped at 0, in one statement;
+            # articles whose deltas sum to 0 (e.g. legacy 0 rows) are not rewritten
+            updated = conn.execute("""
+                UPDATE buvette_articles
+                SET stock = MAX(0, COALESCE(stock, 0) - (
+                    SELECT SUM(j.delta) FROM inventory_stock_journal j
+                    WHERE j.inventaire_id=? AND j.article_id=buvette_articles.id
+                ))
+                WHERE id IN (
+                    SELECT article_id FROM inventory_stock_journal WHERE inventaire_id=?
+                    GROUP BY article_id HAVING SUM(delta) != 0
+                )
+            """, (inventaire_id, inventaire_id)).rowcount
+            if updated:
+                _notify_after_commit(conn)
 
-        # Delete journal entries for this inventory
-        cursor.execute(
-            "DELETE FROM inventory_stock_journal WHERE inventaire_id=?",
-            (inventaire_id,)
-        )
+            # Delete journal entries for this inventory
+            deleted = conn.execute(
+                "DELETE FROM inventory_stock_journal WHERE inventaire_id=?",
+                (inventaire_id,)
+            ).rowcount
 
         logger.info(
             f"Reverted inventory effects for inventory {inventaire_id} "
-            f"({len(rows)} items)"
+            f"({deleted} journal entries, {updated} articles)"
         )
     except Exception as e:
         logger.error(f"Error reverting inventory effects for inventory {inventaire_id}: {e}")
@@ -309,19 +676,28 @@ def inventory_stock_journal(conn, inv_id):
         list: Liste de dicts avec article_id, delta, created_at
     """
     try:
-        rows = conn.execute("""
-            SELECT j.*, a.name as article_name
-            FROM inventory_stock_journal j
-            LEFT JOIN buvette_articles a ON j.article_id = a.id
-            WHERE j.inventaire_id=?
-            ORDER BY j.created_at
-        """, (inv_id,)).fetchall()
-        return rows_to_dicts(rows)
+        # Rows are converted straight from tuples, without sqlite3.Row objects
+        return fetch_dicts(conn, _SQL_INVENTORY_JOURNAL, (inv_id,))
     except Exception as e:
         logger.error(f"Error getting stock journal for inventory {inv_id}: {e}")
         return []
 
 
+def iter_inventory_stock_journal(conn, inv_id, batch_size=1024):
+    """
+    Parcourt l'historique d'un inventaire par lots, sans tout charger en mémoire.
+
+    Args:
+        conn: Database connection
+        inv_id: ID de l'inventaire
+        batch_size: Nombre de lignes lues par fetchmany()
+
+    Yields:
+        dict: Une entrée du journal (mêmes clés que inventory_stock_journal())
+    """
+    yield from iter_dicts(conn.execute(_SQL_INVENTORY_JOURNAL, (inv_id,)), batch_size)
+
+
 def create_purchase_batch(conn, article_id, quantity, unit_price, achat_id=None, scope='buvette'):
     """
     Enregistre un lot d'achat avec prix unitaire pour le calcul FIFO.
@@ -339,11 +715,7 @@ def create_purchase_batch(conn, article_id, quantity, unit_price, achat_id=None,
     """
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO article_purchase_batches
-            (article_id, quantity, remaining_quantity, unit_price, achat_id, scope)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (article_id, quantity, quantity, unit_price, achat_id, scope))
+        cursor.execute(_SQL_INSERT_BATCH, (article_id, quantity, quantity, unit_price, achat_id, scope))
         
         batch_id = cursor.lastrowid
         logger.info(
@@ -375,55 +747,44 @@ def consume_purchase_batches_fifo(conn, article_id, consume_quantity, scope='buv
         }
     """
     try:
-        cursor = conn.cursor()
-        
-        # Get available batches in FIFO order (oldest first)
-        rows = cursor.execute("""
-            SELECT id, remaining_quantity, unit_price
-            FROM article_purchase_batches
-            WHERE article_id = ? AND scope = ? AND remaining_quantity > 0
-            ORDER BY purchase_date ASC, id ASC
-        """, (article_id, scope)).fetchall()
+        # Read and write the batches in one locked transaction (one commit)
+        with _write_lock, _stock_transaction(conn):
+            # Get available batches in FIFO order (oldest first)
+            rows = conn.execute(_SQL_FIFO_BATCHES, (article_id, scope)).fetchall()
         
-        total_cost = 0.0
-        consumed_batches = []
-        remaining_to_consume = consume_quantity
+            total_cost = 0.0
+            consumed_batches = []
+            batch_updates = []
+            remaining_to_consume = consume_quantity
         
-        for row in rows:
-            if remaining_to_consume <= 0:
-                break
+            for row in rows:
+                if remaining_to_consume <= 0:
+                    break
                 
-            batch_id = row[0]
-            batch_remaining = row[1]
-            batch_unit_price = row[2]
+                batch_id = row[0]
+                batch_remaining = row[1]
+                batch_unit_price = row[2]
             
-            # Consume from this batch
-            consumed_from_batch = min(remaining_to_consume, batch_remaining)
-            cost_from_batch = consumed_from_batch * batch_unit_price
+                # Consume from this batch
+                consumed_from_batch = min(remaining_to_consume, batch_remaining)
+                cost_from_batch = consumed_from_batch * batch_unit_price
             
-            # Update batch remaining quantity
-            new_remaining = batch_remaining - consumed_from_batch
-            cursor.execute("""
-                UPDATE article_purchase_batches
-                SET remaining_quantity = ?
-                WHERE id = ?
-            """, (new_remaining, batch_id))
+                # New remaining quantity, written for all batches at once below
+                batch_updates.append((batch_remaining - consumed_from_batch, batch_id))
             
-            # Track this consumption
-            consumed_batches.append({
-                'batch_id': batch_id,
-                'consumed_quantity': consumed_from_batch,
-                'unit_price': batch_unit_price,
-                'cost': cost_from_batch
-            })
+                # Track this consumption
+                consumed_batches.append({
+                    'batch_id': batch_id,
+                    'consumed_quantity': consumed_from_batch,
+                    'unit_price': batch_unit_price,
+                    'cost': cost_from_batch
+                })
             
-            total_cost += cost_from_batch
-            remaining_to_consume -= consumed_from_batch
-            
-            logger.debug(
-                f"Consumed {consumed_from_batch} from batch {batch_id} "
-                f"at unit_price={batch_unit_price}, cost={cost_from_batch}"
-            )
+                total_cost += cost_from_batch
+                remaining_to_consume -= consumed_from_batch
+
+            # One executemany for every consumed batch instead of an UPDATE per batch
+            conn.executemany(_SQL_SET_BATCH_REMAINING, batch_updates)
         
         if remaining_to_consume > 0:
             logger.warning(
@@ -455,6 +816,35 @@ def consume_purchase_batches_fifo(conn, article_id, consume_quantity, scope='buv
         raise
 
 
+def estimate_fifo_cost(conn, article_id, quantity, scope='buvette'):
+    """
+    Calcule le coût FIFO d'une quantité sans consommer les lots.
+
+    Variante lecture seule de consume_purchase_batches_fifo() pour les
+    rapports : une seule requête (SUM fenêtrée), aucun UPDATE ni verrou.
+    La quantité non couverte par les lots est estimée au coût moyen, comme
+    dans consume_purchase_batches_fifo().
+
+    Args:
+        conn: Database connection
+        article_id: ID de l'article
+        quantity: Quantité à valoriser
+        scope: Portée du stock (default='buvette')
+
+    Returns:
+        float: coût total estimé
+    """
+    if quantity <= 0:
+        return 0.0
+    total_cost, covered = conn.execute(
+        _SQL_ESTIMATE_FIFO_COST,
+        {'qty': quantity, 'article_id': article_id, 'scope': scope},
+    ).fetchone()
+    if 0 < covered < quantity:
+        total_cost += (quantity - covered) * (total_cost / covered)
+    return total_cost
+
+
 def recompute_stock_for_article(conn, article_id):
     """
     Recalcule le stock d'un article en agrégeant tous les mouvements signés.
@@ -482,46 +872,30 @@ def recompute_stock_for_article(conn, article_id):
         See reports/TODOs.md for implementation review.
     """
     try:
-        cursor = conn.cursor()
-        
-        # Get all movements for this article
-        # type_mouvement can be: 'entrée', 'sortie', 'inventaire', etc.
-        rows = cursor.execute("""
-            SELECT type_mouvement, quantite
-            FROM buvette_mouvements
-            WHERE article_id = ?
-            ORDER BY date_mouvement ASC, id ASC
-        """, (article_id,)).fetchall()
-        
-        calculated_stock = 0
-        
-        for row in rows:
-            type_mouvement = row[0]
-            quantite = row[1] if row[1] is not None else 0
-            
-            # Map movement types to signed quantities
-            # 'entrée' and 'inventaire' add to stock
-            # 'sortie' reduces stock
-            if type_mouvement in ('entrée', 'inventaire', 'achat'):
-                calculated_stock += quantite
-            elif type_mouvement == 'sortie':
-                calculated_stock -= quantite
-            else:
-                # Unknown type - log warning but don't fail
+        # Read and write in one locked transaction, like the other stock writers
+        with _write_lock, _stock_transaction(conn):
+            # Signed sum computed by SQLite: no movement row reaches Python
+            total, movement_count, unknown_types = conn.execute(
+                _SQL_RECOMPUTE_STOCK, (article_id,)
+            ).fetchone()
+
+            if unknown_types:
+                # Unknown types - log warning but don't fail
                 logger.warning(
-                    f"Unknown movement type '{type_mouvement}' for article {article_id}, "
-                    f"treating as neutral (quantity: {quantite})"
+                    f"Unknown movement type(s) {unknown_types} for article {article_id}, "
+                    f"treated as neutral"
                 )
         
-        # Stock cannot be negative
-        calculated_stock = max(0, calculated_stock)
+            # Stock cannot be negative
+            calculated_stock = max(0, total)
         
-        # Update the article's stock
-        set_stock(conn, article_id, calculated_stock)
+            # Update the article's stock
+            set_stock(conn, article_id, calculated_stock)
         
-        logger.info(
-            f"Recomputed stock for article {article_id}: "
-            f"{len(rows)} movements processed, final stock = {calculated_stock}"
+        # Called once per article by bulk paths, which log their own summary
+        logger.debug(
+            "Recomputed stock for article %s: %s movements processed, final stock = %s",
+            article_id, movement_count, calculated_stock
         )
         
         return calculated_stock
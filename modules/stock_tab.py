@@ -3,10 +3,22 @@ Module UI helper pour l'affichage du stock.
 
 Ce module fournit des fonctions utilitaires pour récupérer et formater
 les données de stock pour l'interface utilisateur.
+
+get_stock_listing() garde son résultat en cache par base et par scope. Le
+cache est vidé par chaque écriture de stock (hook de modules.stock_db) et par
+les écritures d'articles (invalidate_stock_listing()) ; LISTING_TTL_S borne
+la durée de vie d'une entrée pour les écritures faites hors de ces chemins.
+
+yield_stock_listing() renvoie les mêmes lignes en flux (fetchmany par lots)
+pour les gros catalogues : il ne remplit pas le cache.
 """
 
-from db.db import get_connection
-from utils.db_helpers import rows_to_dicts
+import os
+import time
+
+from modules.db_api import read_connection
+from modules.stock_db import register_stock_change_hook
+from utils.db_helpers import fetch_dicts, iter_dicts
 from utils.app_logger import get_logger
 
 logger = get_logger("stock_tab")
@@ -15,12 +27,20 @@ logger = get_logger("stock_tab")
 # Note: Cache is per-database-path to handle different test databases
 _schema_cache = {}
 
+# "db_path:scope" -> complete SELECT of get_stock_listing for that schema
+_select_cache = {}
+
+# Seconds a cached stock listing stays valid without any invalidation
+LISTING_TTL_S = 30.0
+
+# "db_path:scope" -> (monotonic time of the read, tuple of row dicts)
+_listing_cache = {}
+
 
 def _get_cache_key(table_name):
     """Generate cache key based on database path and table name."""
-    import os
-    db_path = os.environ.get("APP_DB_PATH", "association.db")
-    return f"{db_path}:{table_name}"
+    # Read on each call: db.set_db_file() switches APP_DB_PATH at runtime
+    return f"{os.environ.get('APP_DB_PATH', 'association.db')}:{table_name}"
 
 
 def _get_table_columns(conn, table_name):
@@ -53,16 +73,119 @@ def _get_table_columns(conn, table_name):
 
 def clear_schema_cache():
     """Clear the schema cache. Useful for testing or after database migrations."""
-    global _schema_cache
+    global _schema_cache, _select_cache
     _schema_cache = {}
+    _select_cache = {}
+    _listing_cache.clear()
+
+
+def _build_buvette_select(conn):
+    """
+    Build the listing SELECT for buvette_articles from its current columns.
+
+    Args:
+        conn: Database connection
+
+    Returns:
+        str: SELECT statement with whitelisted columns only
+
+    Raises:
+        ValueError: If a selected column is not in the whitelist
+    """
+    # Check which columns exist for backward compatibility (cached for performance)
+    columns = _get_table_columns(conn, 'buvette_articles')
+    
+    # Build SELECT clause based on available columns
+    select_parts = ['id', 'name', 'categorie', 'stock']
+    
+    # Handle unite vs quantite/unite_type migration
+    if 'quantite' in columns:
+        select_parts.append('quantite')
+    if 'unite_type' in columns:
+        select_parts.append('unite_type')
+    elif 'unite' in columns:
+        # Legacy schema - provide compatibility
+        select_parts.append('unite')
+    
+    select_parts.extend(['contenance', 'commentaire'])
+    
+    # Filter to only columns that exist
+    select_parts = [col for col in select_parts if col in columns]
+    
+    # Whitelist of allowed column names for security
+    ALLOWED_COLUMNS = {
+        'id', 'name', 'categorie', 'stock', 'quantite',
+        'unite_type', 'unite', 'contenance', 'commentaire'
+    }
+    
+    # Validate all column names against whitelist
+    for col in select_parts:
+        if col not in ALLOWED_COLUMNS:
+            raise ValueError(f"Column '{col}' not in whitelist")
+    
+    select_clause = ', '.join(select_parts)
+    # Column names are validated against whitelist, safe to use in query
+    return f"SELECT {select_clause} FROM buvette_articles ORDER BY name"
+
+
+def invalidate_stock_listing(article_id=None):
+    """
+    Vide le cache de get_stock_listing().
+
+    Enregistré comme hook de modules.stock_db (appelé à chaque écriture de
+    stock) ; à appeler aussi après la création, la modification ou la
+    suppression d'un article.
+
+    Args:
+        article_id: Ignoré (signature des hooks de stock) ; tout le cache est vidé
+    """
+    _listing_cache.clear()
+
 
+def _listing_select(conn, cache_key):
+    """SELECT of the stock listing, built once per database and scope."""
+    sql = _select_cache.get(cache_key)
+    if sql is None:
+        sql = _select_cache[cache_key] = _build_buvette_select(conn)
+    return sql
 
-def get_stock_listing(scope='buvette'):
+
+def yield_stock_listing(scope='buvette', batch_size=200):
+    """
+    Itère sur la liste des articles avec leur stock, un dict à la fois.
+
+    Mêmes lignes que get_stock_listing(). Une liste en cache encore valide est
+    servie telle quelle ; sinon les lignes sont lues par lots de batch_size
+    et la connexion de lecture est rendue quand le générateur est épuisé ou
+    fermé. Le résultat n'est pas mis en cache.
+
+    Args:
+        scope: Filter by scope (default='buvette'). Currently only 'buvette' is supported.
+        batch_size: Number of rows fetched per round trip.
+    """
+    cache_key = _get_cache_key(scope)
+    cached = _listing_cache.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < LISTING_TTL_S:
+        for row in cached[1]:
+            yield dict(row)
+        return
+    if scope != 'buvette':
+        logger.warning(f"Unsupported scope: {scope}, returning empty list")
+        return
+    with read_connection() as conn:
+        yield from iter_dicts(conn.execute(_listing_select(conn, cache_key)), batch_size)
+
+
+def get_stock_listing(scope='buvette', fresh=False):
     """
     Récupère la liste des articles avec leur stock pour l'UI.
 
+    Le résultat est servi depuis le cache tant qu'aucune écriture ne l'a
+    invalidé et qu'il a moins de LISTING_TTL_S secondes.
+
     Args:
         scope: Filter by scope (default='buvette'). Currently only 'buvette' is supported.
+        fresh: Ignore the cached listing and read the database again
 
     Returns:
         list: Liste de dicts avec les informations des articles et stock.
@@ -73,57 +196,27 @@ def get_stock_listing(scope='buvette'):
               it will be returned. After migration, 'quantite' and 'unite_type' 
               columns will be returned instead.
     """
-    conn = None
+    cache_key = _get_cache_key(scope)
+    cached = None if fresh else _listing_cache.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < LISTING_TTL_S:
+        return [dict(row) for row in cached[1]]
+
+    # For now, we only support 'buvette' scope which maps to buvette_articles table
+    # In the future, other scopes could be added (e.g., 'materiel' for stock table)
+    if scope != 'buvette':
+        logger.warning(f"Unsupported scope: {scope}, returning empty list")
+        return []
     try:
-        conn = get_connection()
-        # For now, we only support 'buvette' scope which maps to buvette_articles table
-        # In the future, other scopes could be added (e.g., 'materiel' for stock table)
-        if scope == 'buvette':
-            # Check which columns exist for backward compatibility (cached for performance)
-            columns = _get_table_columns(conn, 'buvette_articles')
-            
-            # Build SELECT clause based on available columns
-            select_parts = ['id', 'name', 'categorie', 'stock']
-            
-            # Handle unite vs quantite/unite_type migration
-            if 'quantite' in columns:
-                select_parts.append('quantite')
-            if 'unite_type' in columns:
-                select_parts.append('unite_type')
-            elif 'unite' in columns:
-                # Legacy schema - provide compatibility
-                select_parts.append('unite')
-            
-            select_parts.extend(['contenance', 'commentaire'])
-            
-            # Filter to only columns that exist
-            select_parts = [col for col in select_parts if col in columns]
-            
-            # Whitelist of allowed column names for security
-            ALLOWED_COLUMNS = {
-                'id', 'name', 'categorie', 'stock', 'quantite',
-                'unite_type', 'unite', 'contenance', 'commentaire'
-            }
-            
-            # Validate all column names against whitelist
-            for col in select_parts:
-                if col not in ALLOWED_COLUMNS:
-                    raise ValueError(f"Column '{col}' not in whitelist")
-            
-            select_clause = ', '.join(select_parts)
-            # Column names are validated against whitelist, safe to use in query
-            rows = conn.execute(f"""
-                SELECT {select_clause}
-                FROM buvette_articles
-                ORDER BY name
-            """).fetchall()
-        else:
-            logger.warning(f"Unsupported scope: {scope}, returning empty list")
-            rows = []
-        return rows_to_dicts(rows)
+        # Pooled read connection: stays open (and its page cache warm) between refreshes
+        with read_connection() as conn:
+            sql = _listing_select(conn, cache_key)
+            # Plain-tuple fetch converted straight to dicts (no sqlite3.Row per row)
+            listing = fetch_dicts(conn, sql)
+        _listing_cache[cache_key] = (time.monotonic(), tuple(listing))
+        return [dict(row) for row in listing]
     except Exception as e:
         logger.error(f"Error getting stock listing for scope {scope}: {e}")
         return []
-    finally:
-        if conn:
-            conn.close()
+
+
+register_stock_change_hook(invalidate_stock_listing)
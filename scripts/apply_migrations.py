@@ -10,6 +10,7 @@ Usage:
     python scripts/apply_migrations.py --dry-run     # Show what would be applied
     python scripts/apply_migrations.py --status      # Show migration status
     python scripts/apply_migrations.py --force FILE  # Force re-run a migration
+    python scripts/apply_migrations.py --baseline    # Mark pending migrations as applied
 
 Features:
     - Idempotent: Tracks applied migrations
@@ -20,16 +21,53 @@ Features:
 
 import sqlite3
 import argparse
+import os
+import re
 import sys
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 from typing import List, Tuple
-import shutil
 
 
 MIGRATIONS_DIR = Path("migrations")
 MIGRATIONS_TABLE = "_migrations"
 
+# Migration connection settings. WAL (the application's journal mode) appends
+# each migration commit to the -wal file instead of writing a rollback
+# journal, and with synchronous=NORMAL it is only fsynced at checkpoints;
+# temporary tables/indexes stay in memory and the page cache is 64 MiB.
+MIGRATION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+)
+
+# Consecutive single-row INSERTs of a migration are fused into multi-row
+# INSERTs of at most this many rows (one statement to prepare and run
+# instead of one per row)
+INSERT_BATCH_ROWS = 50
+
+# Values of a row without parentheses: plain characters (no quote, ';',
+# newline or comment start) around '-', '/' and one-line string literals.
+# Written as an unrolled loop, with no two ways to match the same text, so
+# that a line which does not match fails in linear time
+_SQL_PLAIN = r"""[^()'"\n;/-]*"""
+_SQL_VALUES = rf"""{_SQL_PLAIN}(?:(?:-(?!-)|/(?!\*)|'[^'\n]*(?:''[^'\n]*)*'(?!')){_SQL_PLAIN})*"""
+# (1, 'a', lower('B')): function calls may be nested one level; a subquery,
+# whose parenthesis follows no function name or starts with SELECT, may not
+_SQL_ROW = rf"\({_SQL_VALUES}(?:(?<=\w)\((?![ \t]*(?i:select)\b){_SQL_VALUES}\){_SQL_VALUES})*\)"
+# Two or more consecutive lines `INSERT [OR ...] INTO t [(cols)] VALUES (row);`
+# with the same head, written identically
+_RE_INSERT_RUN = re.compile(
+    r"^(?P<head>(?i:insert)[ \t]+(?:(?i:or)[ \t]+\w+[ \t]+)?(?i:into)[ \t][^\n;'\"]*?(?i:values)[ \t]*)"
+    rf"{_SQL_ROW};(?P<eol>\r?\n)"
+    rf"(?:(?P=head){_SQL_ROW};(?P=eol))+",
+    re.MULTILINE,
+)
+
 
 def get_db_path() -> Path:
     """Get the database file path."""
@@ -43,16 +81,41 @@ def get_db_path() -> Path:
     raise FileNotFoundError("Database file not found")
 
 
-def backup_database(db_path: Path) -> Path:
+def configure_connection(conn: sqlite3.Connection):
+    """Apply MIGRATION_PRAGMAS; a PRAGMA that fails leaves SQLite's default."""
+    for pragma in MIGRATION_PRAGMAS:
+        try:
+            conn.execute(pragma)
+        except sqlite3.Error as e:
+            print(f"Warning: {pragma} failed: {e}")
+
+
+def backup_database(db_path: Path, conn: sqlite3.Connection = None) -> Path:
     """
-    Create a backup of the database.
+    Create a backup of the database with SQLite's online backup API.
+    
+    Pages are copied by SQLite itself, so the backup is consistent even
+    when committed changes are still in the -wal file; pages already in the
+    source connection's cache are not read again.
+    
+    Args:
+        db_path: Database to back up
+        conn: Open connection to it (default: a connection opened for the backup)
     
     Returns:
         Path to backup file
     """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     backup_path = db_path.parent / f"{db_path.stem}.bak.{timestamp}{db_path.suffix}"
-    shutil.copy2(db_path, backup_path)
+    source = conn if conn is not None else sqlite3.connect(str(db_path))
+    dest = sqlite3.connect(str(backup_path))
+    try:
+        # 1024 pages per step: about 4-8 MiB, the lock is released between steps
+        source.backup(dest, pages=1024)
+    finally:
+        dest.close()
+        if conn is None:
+            source.close()
     return backup_path
 
 
@@ -71,21 +134,73 @@ def init_migrations_table(conn: sqlite3.Connection):
 
 def get_applied_migrations(conn: sqlite3.Connection) -> set:
     """Get set of already-applied migration filenames."""
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT filename FROM {MIGRATIONS_TABLE}")
-    return {row[0] for row in cursor.fetchall()}
+    return {row[0] for row in conn.execute(f"SELECT filename FROM {MIGRATIONS_TABLE}")}
+
+
+@lru_cache(maxsize=None)
+def _list_migration_files(directory: str) -> Tuple[Path, ...]:
+    """SQL files of a migrations directory sorted by name, listed once per run."""
+    if not os.path.isdir(directory):
+        return ()
+    with os.scandir(directory) as entries:
+        names = sorted(entry.name for entry in entries
+                       if entry.name.endswith(".sql") and entry.is_file())
+    return tuple(Path(directory, name) for name in names)
 
 
 def get_migration_files() -> List[Path]:
     """Get all migration SQL files, sorted by filename."""
-    if not MIGRATIONS_DIR.exists():
-        return []
+    return list(_list_migration_files(str(MIGRATIONS_DIR)))
+
+
+def read_migration_sql(migration_file: Path) -> str:
+    """
+    Read a migration script as UTF-8 (a leading BOM is dropped).
     
-    migrations = sorted(
-        MIGRATIONS_DIR.glob("*.sql"),
-        key=lambda p: p.name
-    )
-    return migrations
+    One read and one decode, whatever the platform's locale encoding
+    (read_text() would use cp1252 on a French Windows).
+    """
+    with open(migration_file, 'rb') as f:
+        return f.read().decode('utf-8-sig')
+
+
+def _fuse_run(run: str, head: str, eol: str, batch_rows: int) -> str:
+    """Join the INSERT lines of a run `batch_rows` at a time into multi-row INSERTs."""
+    lines = run.split(eol)[:-1]
+    separator = ";" + eol + head
+    batches = (eol.join(lines[i:i + batch_rows]).replace(separator, "," + eol)
+               for i in range(0, len(lines), batch_rows))
+    return eol.join(batches) + eol
+
+
+def fuse_insert_statements(sql: str, batch_rows: int = INSERT_BATCH_ROWS) -> str:
+    """
+    Rewrite runs of single-row INSERTs as multi-row INSERTs of at most
+    `batch_rows` rows.
+    
+    A run is two or more consecutive lines, each holding one
+    `INSERT [OR ...] INTO t [(cols)] VALUES (...);` with the same head,
+    written identically. Values spanning lines, comments and subqueries end
+    a run, as does any other statement; runs inside a string literal or a
+    trigger body are left alone. Migrations run in one transaction, so a
+    failing row rolls everything back either way.
+    """
+    parts = []
+    last = 0
+    for match in _RE_INSERT_RUN.finditer(sql):
+        start = match.start()
+        run = match.group()
+        # The run must start a statement: the text before it is complete
+        # statements and comments only
+        if not sqlite3.complete_statement(sql[:start] + ";"):
+            continue
+        parts.append(sql[last:start])
+        parts.append(_fuse_run(run, match.group('head'), match.group('eol'), batch_rows))
+        last = match.end()
+    if not parts:
+        return sql
+    parts.append(sql[last:])
+    return ''.join(parts)
 
 
 def apply_migration(conn: sqlite3.Connection, migration_file: Path, dry_run: bool = False) -> bool:
@@ -98,20 +213,36 @@ def apply_migration(conn: sqlite3.Connection, migration_file: Path, dry_run: boo
     print(f"\nApplying: {migration_file.name}")
     
     try:
-        sql = migration_file.read_text()
-        
         if dry_run:
+            # Show first 10 lines; only 11 lines are read from the file
+            with open(migration_file, 'r', encoding='utf-8-sig') as f:
+                head = [line.rstrip('\n') for line in islice(f, 11)]
             print(f"  [DRY-RUN] Would execute:")
-            print("  " + "\n  ".join(sql.split('\n')[:10]))  # Show first 10 lines
-            if len(sql.split('\n')) > 10:
+            print("  " + "\n  ".join(head[:10]))
+            if len(head) > 10:
                 print("  ...")
             return True
         
-        # Execute in transaction
-        conn.execute("BEGIN")
+        sql = read_migration_sql(migration_file)
+        
+        # Foreign keys are not checked row by row while the script copies or
+        # rebuilds tables, but once before commit. The PRAGMA is a no-op
+        # inside a transaction, so it is switched before BEGIN.
+        foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+        if foreign_keys:
+            conn.execute("PRAGMA foreign_keys=OFF")
         try:
-            # Execute the migration SQL
-            conn.executescript(sql)
+            # executescript() commits any pending transaction before running:
+            # BEGIN is part of the script so that the migration and its
+            # _migrations row are committed (or rolled back) together
+            conn.executescript("BEGIN;\n" + fuse_insert_statements(sql))
+            
+            if foreign_keys:
+                violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    raise sqlite3.IntegrityError(
+                        f"{len(violations)} foreign key violation(s), first: {tuple(violations[0])}"
+                    )
             
             # Record migration as applied
             conn.execute(
@@ -127,16 +258,50 @@ def apply_migration(conn: sqlite3.Connection, migration_file: Path, dry_run: boo
             conn.rollback()
             print(f"  ✗ Error applying migration: {e}")
             return False
+        finally:
+            if foreign_keys:
+                conn.execute("PRAGMA foreign_keys=ON")
             
     except Exception as e:
         print(f"  ✗ Error reading migration file: {e}")
         return False
 
 
-def show_status(conn: sqlite3.Connection):
-    """Show status of all migrations."""
-    migrations = get_migration_files()
-    applied = get_applied_migrations(conn)
+def baseline_migrations(conn: sqlite3.Connection, migrations: List[Path]) -> int:
+    """
+    Mark migrations as applied without executing them.
+    
+    Used for a database whose schema already contains these changes (e.g.
+    created by init_db). All rows are inserted with one executemany in a
+    single transaction, so one commit whatever the number of migrations.
+    
+    Returns:
+        Number of migrations marked as applied
+    """
+    applied_at = datetime.now().isoformat()
+    rows = [(migration.name, applied_at) for migration in migrations]
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(
+            f"INSERT INTO {MIGRATIONS_TABLE} (filename, applied_at) VALUES (?, ?)",
+            rows
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(rows)
+
+
+def show_status(conn: sqlite3.Connection, migrations: List[Path] = None):
+    """Show status of all migrations (default: get_migration_files())."""
+    if migrations is None:
+        migrations = get_migration_files()
+    # filename -> applied_at, read in one pass over the cursor
+    applied_details = dict(
+        conn.execute(f"SELECT filename, applied_at FROM {MIGRATIONS_TABLE} ORDER BY id")
+    )
+    applied = applied_details.keys()
     
     print("\n" + "=" * 70)
     print("MIGRATION STATUS")
@@ -151,13 +316,9 @@ def show_status(conn: sqlite3.Connection):
     print("-" * 70)
     
     # Show applied migrations with timestamps
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT filename, applied_at FROM {MIGRATIONS_TABLE} ORDER BY id")
-    applied_details = {row[0]: row[1] for row in cursor.fetchall()}
-    
     for migration in migrations:
         if migration.name in applied:
-            applied_at = applied_details.get(migration.name, 'Unknown')
+            applied_at = applied_details[migration.name]
             # Shorten timestamp for display
             if 'T' in applied_at:
                 applied_at = applied_at.split('T')[0]
@@ -181,6 +342,8 @@ def main():
                        help='Show migration status')
     parser.add_argument('--force', metavar='FILE',
                        help='Force re-run a specific migration')
+    parser.add_argument('--baseline', action='store_true',
+                       help='Mark pending migrations as applied without running them')
     args = parser.parse_args()
     
     try:
@@ -191,6 +354,7 @@ def main():
     
     # Connect to database
     conn = sqlite3.connect(str(db_path))
+    configure_connection(conn)
     
     try:
         # Initialize migrations table
@@ -220,7 +384,7 @@ def main():
                 conn.commit()
                 
                 # Create backup
-                backup_path = backup_database(db_path)
+                backup_path = backup_database(db_path, conn)
                 print(f"Backup created: {backup_path}")
             
             success = apply_migration(conn, force_file, dry_run=args.dry_run)
@@ -236,6 +400,17 @@ def main():
             print("✓ All migrations are up to date!")
             return 0
         
+        if args.baseline:
+            # Record pending migrations as applied, without running their SQL
+            for m in pending_migrations:
+                print(f"  - {m.name}")
+            if args.dry_run:
+                print(f"\n[DRY-RUN] Would mark {len(pending_migrations)} migration(s) as applied")
+                return 0
+            count = baseline_migrations(conn, pending_migrations)
+            print(f"\n✓ Marked {count} migration(s) as applied (baseline)")
+            return 0
+        
         # Mode banner
         if args.dry_run:
             print("=" * 70)
@@ -248,7 +423,7 @@ def main():
             
             # Create backup before applying
             print(f"\nCreating backup...")
-            backup_path = backup_database(db_path)
+            backup_path = backup_database(db_path, conn)
             print(f"✓ Backup created: {backup_path}")
         
         print(f"\nFound {len(pending_migrations)} pending migration(s):")
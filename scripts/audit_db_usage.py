@@ -13,14 +13,309 @@ This script helps identify areas where sqlite3.Row objects are used with .get()
 method (which causes AttributeError) and need to be converted to dicts.
 """
 
+import ast
+import io
+import json
 import os
 import re
 import sys
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, TextIO
 from datetime import datetime
 
 
+# Every fallback pattern in one alternation, so a file is scanned once;
+# the name of the matching group (match.lastgroup) is the kind of hit
+_RE_DB_USAGE = re.compile(
+    r'(?P<sqlite_import>import\s+sqlite3)'
+    r'|(?P<get_conn>(?:\w+\.)?get_connection\(\))'
+    r'|(?P<fetch>\.fetch(?:one\(\)|all\(\)|many\())'
+    # var.get('...') or var[<int>]: row_index holds the index of a positional access
+    r'|(?P<row_access>(?P<row_var>\w+)(?:\.get\(["\']|\[(?P<row_index>\d+)\]))'
+    r'|(?P<execute>\.execute\()'
+    r'|(?P<connect>sqlite3\.connect\()'
+)
+_RE_NEWLINE = re.compile(r'\n')
+
+# A file holds no DB usage unless it contains one of these substrings, or a
+# match of _RE_ROW_ANCHOR (any .get( call or integer subscript)
+_ANCHORS = ('sqlite3', 'get_connection', 'fetch', 'execute')
+_RE_ROW_ANCHOR = re.compile(r'\bget\s*\(|\[\s*\d')
+
+# Directories to skip
+_SKIP_DIRS = {'.git', '__pycache__', 'venv', 'env', '.pytest_cache', 'node_modules', 'dist', 'build'}
+
+# Below this many files, starting worker processes costs more than it saves
+_PARALLEL_MIN_FILES = 64
+
+# Bump when the scan changes, so results cached by an older version are dropped
+_SCAN_CACHE_VERSION = 2
+
+
+# Variable names reported as rows, besides any name containing "row"
+_ROW_LIKE = frozenset({'row', 'r', 'res', 'result', 'item', 'data'})
+
+
+def _is_row_like(var_name: str) -> bool:
+    """Whether a variable name looks like it holds a database row."""
+    return var_name in _ROW_LIKE or 'row' in var_name.lower()
+
+
+def _name_of(node: ast.AST):
+    """Name a value is accessed through: `row` for row / self.row, else None."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+class _DBUsageVisitor(ast.NodeVisitor):
+    """
+    Collects DB usage hits of a module in one walk of its AST.
+
+    Each hit is (line, column, category, extra) where category is a key of
+    DBUsageAuditor.results. Lines are those of the attribute or subscript
+    itself (`.fetchone()` on the last line of a chained call, as with the
+    regex scan).
+    """
+
+    def __init__(self):
+        self.hits = []
+
+    def _hit(self, node, category, **extra):
+        self.hits.append((node.end_lineno, node.end_col_offset, category, extra))
+
+    def visit_Import(self, node):
+        if any(alias.name.split('.')[0] == 'sqlite3' for alias in node.names):
+            self.hits.append((node.lineno, node.col_offset, 'sqlite3_imports', {}))
+
+    def visit_ImportFrom(self, node):
+        if node.module and node.module.split('.')[0] == 'sqlite3':
+            self.hits.append((node.lineno, node.col_offset, 'sqlite3_imports', {}))
+
+    def visit_Call(self, node):
+        func = node.func
+        no_args = not node.args and not node.keywords
+        if isinstance(func, ast.Name):
+            if func.id == 'get_connection' and no_args:
+                self._hit(func, 'get_connection_calls')
+        elif isinstance(func, ast.Attribute):
+            attr = func.attr
+            if attr == 'get_connection' and no_args:
+                self._hit(func, 'get_connection_calls')
+            elif attr in ('fetchone', 'fetchall') and no_args:
+                self._hit(func, 'fetch_patterns', pattern=f'.{attr}()')
+            elif attr == 'fetchmany':
+                self._hit(func, 'fetch_patterns', pattern='.fetchmany(')
+            elif attr == 'execute':
+                self._hit(func, 'execute_patterns')
+            elif attr == 'connect' and isinstance(func.value, ast.Name) and func.value.id == 'sqlite3':
+                self._hit(func, 'connection_patterns')
+            elif (attr == 'get' and node.args
+                  and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str)):
+                var_name = _name_of(func.value)
+                if var_name and _is_row_like(var_name):
+                    self._hit(func, 'row_get_usage', variable=var_name)
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node):
+        index = node.slice
+        if (isinstance(index, ast.Constant) and type(index.value) is int and index.value >= 0):
+            var_name = _name_of(node.value)
+            if var_name and _is_row_like(var_name):
+                self._hit(node.value, 'positional_indexing', variable=var_name, index=str(index.value))
+        self.generic_visit(node)
+
+
+def _line_number(line_starts: List[int], char_pos: int) -> int:
+    """Get line number from character position (binary search, no slicing)."""
+    return bisect_right(line_starts, char_pos)
+
+
+class _LineReader:
+    """
+    Text of a file's lines, extracted on demand instead of splitting the file.
+    
+    Lines must be requested in non-decreasing order (hits are sorted): a
+    cursor moves forward through the content with str.find.
+    """
+    
+    def __init__(self, content: str):
+        self.content = content
+        self.line_num = 1  # line that starts at self.start
+        self.start = 0
+    
+    def get(self, line_num: int, count: int = 1) -> str:
+        """Lines line_num .. line_num+count-1 joined by spaces, stripped; '' past the end."""
+        content = self.content
+        while self.line_num < line_num:
+            newline = content.find('\n', self.start)
+            if newline == -1:
+                return ''
+            self.start = newline + 1
+            self.line_num += 1
+        end = self.start
+        for _ in range(count):
+            newline = content.find('\n', end)
+            if newline == -1:
+                end = len(content)
+                break
+            end = newline + 1
+        return ' '.join(content[self.start:end].split('\n')).strip()
+
+
+# _RE_DB_USAGE group -> results category, for the kinds without extra fields
+_SIMPLE_KINDS = {
+    'sqlite_import': 'sqlite3_imports',
+    'get_conn': 'get_connection_calls',
+    'execute': 'execute_patterns',
+    'connect': 'connection_patterns',
+}
+
+
+def _regex_hits(content: str) -> List[Tuple]:
+    """Regex scan used for files that do not parse; same hits as _DBUsageVisitor."""
+    # Offset of the first character of each line, for _line_number
+    line_starts = [0, *(match.end() for match in _RE_NEWLINE.finditer(content))]
+    hits = []
+    
+    for match in _RE_DB_USAGE.finditer(content):
+        kind = match.lastgroup
+        start = match.start()
+        if kind == 'row_access':
+            # row.get(' and row[0], row[1], etc. (positional indexing)
+            var_name = match.group('row_var')
+            if not _is_row_like(var_name):
+                continue
+            index = match.group('row_index')
+            if index is None:
+                category, extra = 'row_get_usage', {'variable': var_name}
+            else:
+                category, extra = 'positional_indexing', {'variable': var_name, 'index': index}
+        elif kind == 'fetch':
+            category, extra = 'fetch_patterns', {'pattern': match.group()}
+        else:
+            category, extra = _SIMPLE_KINDS[kind], {}
+        hits.append((_line_number(line_starts, start), start, category, extra))
+    
+    return hits
+
+
+def scan_file_results(filepath, rel_path: str) -> Dict[str, List[Dict]]:
+    """
+    Scan one Python file; return its results by category (no shared state).
+    
+    Args:
+        filepath: path of the file to read
+        rel_path: path reported in the results (relative to the audited root)
+        
+    Returns:
+        dict: category (key of DBUsageAuditor.results) -> list of matches;
+              empty if the file cannot be read
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except (UnicodeDecodeError, PermissionError) as e:
+        return {}
+    
+    # Substring checks run in C: most files are dismissed without parsing
+    if not any(anchor in content for anchor in _ANCHORS) and not _RE_ROW_ANCHOR.search(content):
+        return {}
+    
+    # One parse and one walk; strings and comments are not reported
+    try:
+        visitor = _DBUsageVisitor()
+        visitor.visit(ast.parse(content, filename=str(filepath)))
+        hits = visitor.hits
+    except (SyntaxError, ValueError):
+        # Not parseable by this interpreter: fall back to the regex scan
+        hits = _regex_hits(content)
+    
+    # Source order within each category
+    hits.sort(key=lambda hit: hit[:2])
+    file_results = {}
+    lines = _LineReader(content)
+    positional_lines = set()
+    for line_num, _, category, extra in hits:
+        items = file_results.setdefault(category, [])
+        if category == 'sqlite3_imports':
+            # Only the first import of the file is reported
+            if not items:
+                items.append({'file': rel_path, 'line': line_num})
+            continue
+        if category == 'positional_indexing':
+            # One entry per line: row[0], row[1], row[2] is a single item
+            if line_num in positional_lines:
+                continue
+            positional_lines.add(line_num)
+        if category == 'execute_patterns':
+            # Get the full statement (might span multiple lines)
+            code = lines.get(line_num, 3)
+        else:
+            code = lines.get(line_num)
+        items.append({'file': rel_path, 'line': line_num, **extra, 'code': code})
+    return file_results
+
+
+def _scan_job(job: Tuple[str, str]) -> Dict[str, List[Dict]]:
+    """scan_file_results() for a (filepath, rel_path) job of the process pool."""
+    return scan_file_results(*job)
+
+
+def _iter_py_files(directory) -> str:
+    """
+    Yield the paths of the .py files under directory, skipping _SKIP_DIRS.
+    
+    os.scandir entries carry the file type read with the directory, so no
+    Path object or extra stat() is needed per entry. Symlinked directories
+    are not followed.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in _SKIP_DIRS:
+                    yield from _iter_py_files(entry.path)
+            elif entry.name.endswith('.py'):
+                yield entry.path
+
+
+def _load_scan_cache(cache_path: Path) -> Dict[str, list]:
+    """Per-file results of a previous run: rel_path -> [[mtime_ns, size], results]."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('version') != _SCAN_CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def _save_scan_cache(cache_path: Path, files: Dict[str, list]):
+    """Write the scan cache atomically; a read-only checkout simply gets no cache."""
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': _SCAN_CACHE_VERSION, 'files': files}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def _group_by_file(items: List[Dict]) -> List[Tuple[str, List[Dict]]]:
+    """Group result items by file, sorted by file name; items keep their scan order."""
+    groups = defaultdict(list)
+    for item in items:
+        groups[item['file']].append(item)
+    return sorted(groups.items())
+
+
 class DBUsageAuditor:
     """Auditor for database access patterns in Python codebase."""
     
@@ -38,245 +333,165 @@ class DBUsageAuditor:
         
     def scan_file(self, filepath: Path) -> Dict:
         """Scan a single Python file for DB usage patterns."""
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-        except (UnicodeDecodeError, PermissionError) as e:
-            return {}
-        
-        rel_path = filepath.relative_to(self.root_dir)
-        file_results = {}
-        
-        # Pattern: import sqlite3
-        if re.search(r'import\s+sqlite3', content):
-            self.results['sqlite3_imports'].append({
-                'file': str(rel_path),
-                'line': self._find_line_number(lines, r'import\s+sqlite3')
-            })
-        
-        # Pattern: get_connection()
-        for match in re.finditer(r'(\w+\.)?get_connection\(\)', content):
-            line_num = self._get_line_number(content, match.start())
-            self.results['get_connection_calls'].append({
-                'file': str(rel_path),
-                'line': line_num,
-                'code': lines[line_num - 1].strip() if line_num <= len(lines) else ''
-            })
-        
-        # Pattern: fetchone(), fetchall(), fetchmany()
-        for pattern in [r'\.fetchone\(\)', r'\.fetchall\(\)', r'\.fetchmany\(']:
-            for match in re.finditer(pattern, content):
-                line_num = self._get_line_number(content, match.start())
-                self.results['fetch_patterns'].append({
-                    'file': str(rel_path),
-                    'line': line_num,
-                    'pattern': match.group(),
-                    'code': lines[line_num - 1].strip() if line_num <= len(lines) else ''
-                })
-        
-        # Pattern: row.get( or row.get('
-        for match in re.finditer(r'(\w+)\.get\(["\']', content):
-            line_num = self._get_line_number(content, match.start())
-            var_name = match.group(1)
-            # Check if this might be a row variable
-            if var_name in ['row', 'r', 'res', 'result', 'item', 'data'] or 'row' in var_name.lower():
-                self.results['row_get_usage'].append({
-                    'file': str(rel_path),
-                    'line': line_num,
-                    'variable': var_name,
-                    'code': lines[line_num - 1].strip() if line_num <= len(lines) else ''
-                })
-        
-        # Pattern: row[0], row[1], etc. (positional indexing)
-        for match in re.finditer(r'(\w+)\[(\d+)\]', content):
-            line_num = self._get_line_number(content, match.start())
-            var_name = match.group(1)
-            index = match.group(2)
-            # Check if this might be a row variable
-            if var_name in ['row', 'r', 'res', 'result', 'item', 'data'] or 'row' in var_name.lower():
-                self.results['positional_indexing'].append({
-                    'file': str(rel_path),
-                    'line': line_num,
-                    'variable': var_name,
-                    'index': index,
-                    'code': lines[line_num - 1].strip() if line_num <= len(lines) else ''
-                })
-        
-        # Pattern: .execute(
-        for match in re.finditer(r'\.execute\(', content):
-            line_num = self._get_line_number(content, match.start())
-            # Get the full statement (might span multiple lines)
-            code_snippet = self._get_code_snippet(lines, line_num - 1, 3)
-            self.results['execute_patterns'].append({
-                'file': str(rel_path),
-                'line': line_num,
-                'code': code_snippet
-            })
-        
-        # Pattern: sqlite3.connect(
-        for match in re.finditer(r'sqlite3\.connect\(', content):
-            line_num = self._get_line_number(content, match.start())
-            self.results['connection_patterns'].append({
-                'file': str(rel_path),
-                'line': line_num,
-                'code': lines[line_num - 1].strip() if line_num <= len(lines) else ''
-            })
-        
+        file_results = scan_file_results(filepath, str(filepath.relative_to(self.root_dir)))
+        self._merge(file_results)
         return file_results
     
-    def _find_line_number(self, lines: List[str], pattern: str) -> int:
-        """Find the first line number matching a pattern."""
-        for i, line in enumerate(lines, 1):
-            if re.search(pattern, line):
-                return i
-        return 0
-    
-    def _get_line_number(self, content: str, char_pos: int) -> int:
-        """Get line number from character position."""
-        return content[:char_pos].count('\n') + 1
-    
-    def _get_code_snippet(self, lines: List[str], start_line: int, num_lines: int = 1) -> str:
-        """Get a snippet of code from multiple lines."""
-        end_line = min(start_line + num_lines, len(lines))
-        return ' '.join(lines[start_line:end_line]).strip()
+    def _merge(self, file_results: Dict):
+        """Append the results of one file to self.results."""
+        for category, items in file_results.items():
+            self.results[category].extend(items)
     
-    def scan_directory(self, directory: Path = None):
-        """Recursively scan directory for Python files."""
+    def scan_directory(self, directory: Path = None, workers: int = None,
+                       cache_path: Path = None):
+        """
+        Recursively scan directory for Python files.
+        
+        Files are scanned in worker processes (one per CPU by default, or
+        `workers`) when there are at least _PARALLEL_MIN_FILES of them;
+        results are merged in traversal order, as with a sequential scan.
+        
+        With `cache_path`, the results of each file are kept in that JSON
+        file with its (mtime_ns, size); files unchanged since the previous
+        run are not read again.
+        """
         if directory is None:
             directory = self.root_dir
         
-        # Directories to skip
-        skip_dirs = {'.git', '__pycache__', 'venv', 'env', '.pytest_cache', 'node_modules', 'dist', 'build'}
+        jobs = [(path, os.path.relpath(path, self.root_dir)) for path in _iter_py_files(directory)]
+        cache = _load_scan_cache(cache_path) if cache_path is not None else None
+        file_results = [None] * len(jobs)
+        stamps = [None] * len(jobs)
+        pending = []
+        for i, (filepath, rel_path) in enumerate(jobs):
+            if cache is not None:
+                st = os.stat(filepath)
+                stamps[i] = [st.st_mtime_ns, st.st_size]
+                cached = cache.get(rel_path)
+                if cached is not None and cached[0] == stamps[i]:
+                    file_results[i] = cached[1]
+                    continue
+            pending.append(i)
+        
+        scanned = self._scan_jobs([jobs[i] for i in pending], workers)
+        for i, results in zip(pending, scanned):
+            file_results[i] = results
+        for results in file_results:
+            self._merge(results)
+        
+        if cache is not None:
+            for i, (_, rel_path) in enumerate(jobs):
+                cache[rel_path] = [stamps[i], file_results[i]]
+            _save_scan_cache(cache_path, cache)
+    
+    @staticmethod
+    def _scan_jobs(jobs: List[Tuple[str, str]], workers: int = None):
+        """Results of each (filepath, rel_path) job, in job order."""
+        if (workers or os.cpu_count() or 1) == 1 or len(jobs) < _PARALLEL_MIN_FILES:
+            return [scan_file_results(filepath, rel_path) for filepath, rel_path in jobs]
         
-        for item in directory.iterdir():
-            if item.is_dir():
-                if item.name not in skip_dirs:
-                    self.scan_directory(item)
-            elif item.suffix == '.py':
-                self.scan_file(item)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # chunksize amortizes the pickling of arguments and results
+            return list(executor.map(_scan_job, jobs, chunksize=16))
     
     def generate_sql_access_map(self) -> str:
         """Generate SQL_ACCESS_MAP.md report."""
-        report = []
-        report.append("# SQL Access Map\n")
-        report.append(f"Generated: {datetime.now().isoformat()}\n")
-        report.append("This report maps all database access patterns in the codebase.\n")
+        report = io.StringIO()
+        self.write_sql_access_map(report)
+        return report.getvalue()
+    
+    def write_sql_access_map(self, f: TextIO):
+        """Write the SQL_ACCESS_MAP.md report to `f`, section by section."""
+        results = self.results
+        write = f.write
+        write("# SQL Access Map\n")
+        write(f"Generated: {datetime.now().isoformat()}\n")
+        write("This report maps all database access patterns in the codebase.\n")
         
-        report.append("\n## Summary\n")
-        report.append(f"- sqlite3 imports: {len(self.results['sqlite3_imports'])}\n")
-        report.append(f"- get_connection() calls: {len(self.results['get_connection_calls'])}\n")
-        report.append(f"- fetch patterns: {len(self.results['fetch_patterns'])}\n")
-        report.append(f"- row.get() usage: {len(self.results['row_get_usage'])}\n")
-        report.append(f"- Positional indexing: {len(self.results['positional_indexing'])}\n")
-        report.append(f"- execute() calls: {len(self.results['execute_patterns'])}\n")
-        report.append(f"- sqlite3.connect() calls: {len(self.results['connection_patterns'])}\n")
+        write("\n## Summary\n")
+        write(f"- sqlite3 imports: {len(results['sqlite3_imports'])}\n")
+        write(f"- get_connection() calls: {len(results['get_connection_calls'])}\n")
+        write(f"- fetch patterns: {len(results['fetch_patterns'])}\n")
+        write(f"- row.get() usage: {len(results['row_get_usage'])}\n")
+        write(f"- Positional indexing: {len(results['positional_indexing'])}\n")
+        write(f"- execute() calls: {len(results['execute_patterns'])}\n")
+        write(f"- sqlite3.connect() calls: {len(results['connection_patterns'])}\n")
         
         # sqlite3 imports
-        if self.results['sqlite3_imports']:
-            report.append("\n## SQLite3 Imports\n")
-            for item in self.results['sqlite3_imports']:
-                report.append(f"- `{item['file']}:{item['line']}`\n")
+        if results['sqlite3_imports']:
+            write("\n## SQLite3 Imports\n")
+            for item in results['sqlite3_imports']:
+                write(f"- `{item['file']}:{item['line']}`\n")
         
         # get_connection calls
-        if self.results['get_connection_calls']:
-            report.append("\n## get_connection() Calls\n")
-            files_with_calls = {}
-            for item in self.results['get_connection_calls']:
-                file = item['file']
-                if file not in files_with_calls:
-                    files_with_calls[file] = []
-                files_with_calls[file].append(item)
-            
-            for file, calls in sorted(files_with_calls.items()):
-                report.append(f"\n### {file}\n")
+        if results['get_connection_calls']:
+            write("\n## get_connection() Calls\n")
+            for file, calls in _group_by_file(results['get_connection_calls']):
+                write(f"\n### {file}\n")
                 for call in calls:
-                    report.append(f"- Line {call['line']}: `{call['code']}`\n")
+                    write(f"- Line {call['line']}: `{call['code']}`\n")
         
         # Fetch patterns
-        if self.results['fetch_patterns']:
-            report.append("\n## Fetch Patterns\n")
-            files_with_fetches = {}
-            for item in self.results['fetch_patterns']:
-                file = item['file']
-                if file not in files_with_fetches:
-                    files_with_fetches[file] = []
-                files_with_fetches[file].append(item)
-            
-            for file, fetches in sorted(files_with_fetches.items()):
-                report.append(f"\n### {file}\n")
+        if results['fetch_patterns']:
+            write("\n## Fetch Patterns\n")
+            for file, fetches in _group_by_file(results['fetch_patterns']):
+                write(f"\n### {file}\n")
                 for fetch in fetches:
-                    report.append(f"- Line {fetch['line']} `{fetch['pattern']}`: `{fetch['code']}`\n")
+                    write(f"- Line {fetch['line']} `{fetch['pattern']}`: `{fetch['code']}`\n")
         
         # Row.get usage (CRITICAL - these will crash)
-        if self.results['row_get_usage']:
-            report.append("\n## ⚠️ CRITICAL: row.get() Usage (Will Crash!)\n")
-            report.append("These locations use .get() on sqlite3.Row objects, which will cause AttributeError.\n")
-            report.append("These MUST be fixed by converting rows to dicts first.\n")
-            files_with_get = {}
-            for item in self.results['row_get_usage']:
-                file = item['file']
-                if file not in files_with_get:
-                    files_with_get[file] = []
-                files_with_get[file].append(item)
-            
-            for file, gets in sorted(files_with_get.items()):
-                report.append(f"\n### {file}\n")
+        if results['row_get_usage']:
+            write("\n## ⚠️ CRITICAL: row.get() Usage (Will Crash!)\n")
+            write("These locations use .get() on sqlite3.Row objects, which will cause AttributeError.\n")
+            write("These MUST be fixed by converting rows to dicts first.\n")
+            for file, gets in _group_by_file(results['row_get_usage']):
+                write(f"\n### {file}\n")
                 for get in gets:
-                    report.append(f"- Line {get['line']} (var: `{get['variable']}`): `{get['code']}`\n")
+                    write(f"- Line {get['line']} (var: `{get['variable']}`): `{get['code']}`\n")
         
         # Positional indexing
-        if self.results['positional_indexing']:
-            report.append("\n## Positional Indexing (row[0], row[1], ...)\n")
-            report.append("These use positional access and should continue to work.\n")
-            files_with_pos = {}
-            for item in self.results['positional_indexing']:
-                file = item['file']
-                if file not in files_with_pos:
-                    files_with_pos[file] = []
-                files_with_pos[file].append(item)
-            
-            for file, positions in sorted(files_with_pos.items()):
-                report.append(f"\n### {file}\n")
-                unique_lines = {}
+        if results['positional_indexing']:
+            write("\n## Positional Indexing (row[0], row[1], ...)\n")
+            write("These use positional access and should continue to work.\n")
+            for file, positions in _group_by_file(results['positional_indexing']):
+                write(f"\n### {file}\n")
                 for pos in positions:
-                    line_key = f"{pos['line']}"
-                    if line_key not in unique_lines:
-                        unique_lines[line_key] = pos
-                
-                for pos in unique_lines.values():
-                    report.append(f"- Line {pos['line']}: `{pos['code']}`\n")
-        
-        return ''.join(report)
+                    write(f"- Line {pos['line']}: `{pos['code']}`\n")
     
     def generate_todos(self) -> str:
         """Generate TODOs.md report with action items."""
-        report = []
-        report.append("# Database Access TODOs\n")
-        report.append(f"Generated: {datetime.now().isoformat()}\n")
-        report.append("\nThis report lists action items for fixing database access issues.\n")
+        report = io.StringIO()
+        self.write_todos(report)
+        return report.getvalue()
+    
+    def write_todos(self, f: TextIO):
+        """Write the TODOs.md report to `f`, section by section."""
+        write = f.write
+        write("# Database Access TODOs\n")
+        write(f"Generated: {datetime.now().isoformat()}\n")
+        write("\nThis report lists action items for fixing database access issues.\n")
         
         # Critical fixes needed
         if self.results['row_get_usage']:
-            report.append("\n## 🔴 CRITICAL: Fix row.get() Usage\n")
-            report.append("Priority: **HIGH** - These will cause AttributeError crashes\n")
-            report.append("\nAction: Convert sqlite3.Row to dict before using .get()\n")
-            report.append("Solution: Use `_row_to_dict(row)` or `_rows_to_dicts(rows)` from modules/db_row_utils.py\n")
+            write("\n## 🔴 CRITICAL: Fix row.get() Usage\n")
+            write("Priority: **HIGH** - These will cause AttributeError crashes\n")
+            write("\nAction: Convert sqlite3.Row to dict before using .get()\n")
+            write("Solution: Use `_row_to_dict(row)` or `_rows_to_dicts(rows)` from modules/db_row_utils.py\n")
             
             for item in self.results['row_get_usage']:
-                report.append(f"\n- [ ] {item['file']}:{item['line']}\n")
-                report.append(f"  ```python\n  {item['code']}\n  ```\n")
+                write(f"\n- [ ] {item['file']}:{item['line']}\n")
+                write(f"  ```python\n  {item['code']}\n  ```\n")
         
         # Direct sqlite3.connect usage
         if self.results['connection_patterns']:
-            report.append("\n## 🟡 RECOMMENDED: Standardize Connection Handling\n")
-            report.append("Priority: **MEDIUM** - Should use centralized connection management\n")
-            report.append("\nAction: Use db.get_connection() or modules.db_api.get_connection() instead of direct sqlite3.connect()\n")
-            report.append("Benefit: Automatic WAL mode, busy timeout, and consistent error handling\n")
+            write("\n## 🟡 RECOMMENDED: Standardize Connection Handling\n")
+            write("Priority: **MEDIUM** - Should use centralized connection management\n")
+            write("\nAction: Use db.get_connection() or modules.db_api.get_connection() instead of direct sqlite3.connect()\n")
+            write("Benefit: Automatic WAL mode, busy timeout, and consistent error handling\n")
             
             for item in self.results['connection_patterns']:
-                report.append(f"\n- [ ] {item['file']}:{item['line']}\n")
-                report.append(f"  ```python\n  {item['code']}\n  ```\n")
+                write(f"\n- [ ] {item['file']}:{item['line']}\n")
+                write(f"  ```python\n  {item['code']}\n  ```\n")
         
         # Fetch patterns without conversion
         fetch_files = set(item['file'] for item in self.results['fetch_patterns'])
@@ -285,13 +500,11 @@ class DBUsageAuditor:
         # Files with fetch but no documented .get() issues might still be at risk
         at_risk_files = fetch_files - get_files
         if at_risk_files:
-            report.append("\n## 🟢 LOW PRIORITY: Review Fetch Patterns\n")
-            report.append("These files use fetch patterns but don't show .get() usage in this scan.\n")
-            report.append("Review to ensure they don't need dict conversion.\n")
+            write("\n## 🟢 LOW PRIORITY: Review Fetch Patterns\n")
+            write("These files use fetch patterns but don't show .get() usage in this scan.\n")
+            write("Review to ensure they don't need dict conversion.\n")
             for file in sorted(at_risk_files):
-                report.append(f"- [ ] {file}\n")
-        
-        return ''.join(report)
+                write(f"- [ ] {file}\n")
 
 
 def main():
@@ -308,25 +521,24 @@ def main():
     
     # Create auditor and scan
     auditor = DBUsageAuditor(root_dir)
-    auditor.scan_directory()
+    # Unchanged files are served from the previous run's results
+    auditor.scan_directory(cache_path=root_dir / '.cache' / 'audit_db_usage.json')
     
     # Create reports directory if it doesn't exist
     reports_dir = root_dir / 'reports'
     reports_dir.mkdir(exist_ok=True)
     
-    # Generate and write reports
+    # Generate and write reports, streamed through a 1 MiB buffer
     print("Generating SQL_ACCESS_MAP.md...")
-    sql_map = auditor.generate_sql_access_map()
     sql_map_path = reports_dir / 'SQL_ACCESS_MAP.md'
-    with open(sql_map_path, 'w', encoding='utf-8') as f:
-        f.write(sql_map)
+    with open(sql_map_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        auditor.write_sql_access_map(f)
     print(f"✓ Written to {sql_map_path}")
     
     print("\nGenerating TODOs.md...")
-    todos = auditor.generate_todos()
     todos_path = reports_dir / 'TODOs.md'
-    with open(todos_path, 'w', encoding='utf-8') as f:
-        f.write(todos)
+    with open(todos_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        auditor.write_todos(f)
     print(f"✓ Written to {todos_path}")
     
     print("\n" + "=" * 70)
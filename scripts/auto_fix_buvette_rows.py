@@ -16,17 +16,65 @@ For each matching file it:
 
 Note: This script is designed to be safe and non-destructive. It always creates
 backups before modifying files and generates diff files for human review.
+Files unchanged since they were last processed or fixed are skipped (see
+CACHE_FILENAME); pass --force to process every file again.
 """
 
 import difflib
+import hashlib
+import json
 import os
 import re
 import sys
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
 
+# Patterns compiled once, not looked up in re's cache on every call / line
+_RE_FETCH_ANY = re.compile(r'\.(fetchall|fetchone)\(\)')
+# row.get(, row_var.get(, rows[i].get(, etc.
+_RE_GET = re.compile(r'(row|ligne|line|result)[\w]*\.get\(')
+_RE_DB_ROW_UTILS_IMPORT = re.compile(r'from modules\.db_row_utils import')
+# variable = something.fetchall() / variable = something.fetchone():
+# group 1 is the variable, group 2 the fetch method
+_RE_FETCH_ASSIGN = re.compile(r'(\w+)\s*=\s*.*\.(fetchall|fetchone)\(\)')
+# Conversion injected after each kind of fetch
+_CONVERSIONS = {'fetchall': '_rows_to_dicts', 'fetchone': '_row_to_dict'}
+
+# Below this many files, starting worker processes costs more than it saves
+_PARALLEL_MIN_FILES = 64
+
+# Sidecar of the files already processed, in the base directory:
+# relpath -> [mtime_ns, size, blake2b digest of the content]
+CACHE_FILENAME = '.autofix-cache.json'
+# Bump when the fixes change, so files are processed again
+_CACHE_VERSION = 1
+_CACHED_MESSAGE = "Unchanged since last run (cache)"
+
+
+def _iter_python_files(directory):
+    """
+    Yield the .py files under directory, as os.walk would list them.
+    
+    os.scandir entries carry their file type, so no extra stat() is made per
+    entry; symlinked directories are listed but not entered, and unreadable
+    directories are skipped.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        yield from _iter_python_files(entry.path)
+                elif entry.name.endswith('.py'):
+                    yield entry.path
+    except OSError:
+        return
+
+
 def find_python_files(base_dir, subdirs=None):
     """Find all Python files in specified subdirectories."""
     if subdirs is None:
@@ -34,30 +82,24 @@ def find_python_files(base_dir, subdirs=None):
     
     python_files = []
     for subdir in subdirs:
-        search_path = os.path.join(base_dir, subdir)
-        if os.path.exists(search_path):
-            for root, _, files in os.walk(search_path):
-                for file in files:
-                    if file.endswith('.py'):
-                        python_files.append(os.path.join(root, file))
+        python_files.extend(_iter_python_files(os.path.join(base_dir, subdir)))
     
     return python_files
 
 
 def has_fetchall_or_fetchone(content):
     """Check if file contains fetchall() or fetchone() calls."""
-    return bool(re.search(r'\.(fetchall|fetchone)\(\)', content))
+    return bool(_RE_FETCH_ANY.search(content))
 
 
 def has_get_usage(content):
     """Check if file uses .get() method on potential row objects."""
-    # Look for patterns like: row.get(, row_var.get(, rows[i].get(, etc.
-    return bool(re.search(r'(row|ligne|line|result)[\w]*\.get\(', content))
+    return bool(_RE_GET.search(content))
 
 
 def needs_db_row_utils_import(content):
     """Check if file needs the db_row_utils import."""
-    has_import = re.search(r'from modules\.db_row_utils import', content)
+    has_import = _RE_DB_ROW_UTILS_IMPORT.search(content)
     return not has_import
 
 
@@ -100,32 +142,23 @@ def inject_conversions(content):
     Pattern detection:
     - rows = cursor.fetchall() -> add: rows = _rows_to_dicts(rows)
     - row = cursor.fetchone() -> add: row = _row_to_dict(row)
+    
+    A line with several fetch calls gets the conversion of the last one.
     """
-    lines = content.split('\n')
-    new_lines = []
-    i = 0
+    # No fetch call at all: nothing to split or search line by line
+    if not _RE_FETCH_ANY.search(content):
+        return content
     
-    while i < len(lines):
-        line = lines[i]
+    new_lines = []
+    for line in content.split('\n'):
         new_lines.append(line)
         
-        # Match patterns like: variable = something.fetchall()
-        fetchall_match = re.search(r'(\w+)\s*=\s*.*\.fetchall\(\)', line)
-        if fetchall_match:
-            var_name = fetchall_match.group(1)
-            indent = len(line) - len(line.lstrip())
-            conversion = ' ' * indent + f'{var_name} = _rows_to_dicts({var_name})'
-            new_lines.append(conversion)
-        
-        # Match patterns like: variable = something.fetchone()
-        fetchone_match = re.search(r'(\w+)\s*=\s*.*\.fetchone\(\)', line)
-        if fetchone_match:
-            var_name = fetchone_match.group(1)
+        # One search gives the variable and which fetch it holds
+        match = _RE_FETCH_ASSIGN.search(line)
+        if match:
+            var_name, fetch = match.groups()
             indent = len(line) - len(line.lstrip())
-            conversion = ' ' * indent + f'{var_name} = _row_to_dict({var_name})'
-            new_lines.append(conversion)
-        
-        i += 1
+            new_lines.append(' ' * indent + f'{var_name} = {_CONVERSIONS[fetch]}({var_name})')
     
     return '\n'.join(new_lines)
 
@@ -202,6 +235,102 @@ def process_file(filepath, dry_run=False):
         return False, f"Error: {e}"
 
 
+def _file_digest(filepath):
+    """blake2b digest of a file's content (128 bits, hex)."""
+    with open(filepath, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _file_entry(filepath):
+    """Cache entry of a file: [mtime_ns, size, digest]."""
+    st = os.stat(filepath)
+    return [st.st_mtime_ns, st.st_size, _file_digest(filepath)]
+
+
+def load_cache(cache_path):
+    """Entries of a previous run (see CACHE_FILENAME); empty if missing or outdated."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('version') != _CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def save_cache(cache_path, files):
+    """Write the cache atomically (temporary file + os.replace)."""
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': _CACHE_VERSION, 'files': files}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: cache not saved: {e}")
+
+
+def _unchanged(filepath, entry):
+    """
+    Whether a file still matches its cache entry; refreshes the entry's stamp
+    when only mtime/size differ but the content is the same.
+    """
+    st = os.stat(filepath)
+    if entry[:2] == [st.st_mtime_ns, st.st_size]:
+        # Fast path: same stamp, the file is not read
+        return True
+    if _file_digest(filepath) != entry[2]:
+        return False
+    entry[:2] = [st.st_mtime_ns, st.st_size]
+    return True
+
+
+def process_files(filepaths, dry_run=False, workers=None, cache=None, base_dir='.'):
+    """
+    process_file() for each path; returns the (was_modified, message) results
+    in the order of filepaths.
+    
+    Files are independent, so they are processed in worker processes (one
+    per CPU by default, or `workers`) when there are at least
+    _PARALLEL_MIN_FILES of them.
+    
+    With `cache` (see load_cache, keyed by path relative to base_dir), files
+    unchanged since they were last processed or fixed are skipped, and the
+    entries of the files processed now are updated.
+    """
+    filepaths = list(filepaths)
+    results = [None] * len(filepaths)
+    pending = []
+    for i, filepath in enumerate(filepaths):
+        if cache is not None:
+            entry = cache.get(os.path.relpath(filepath, base_dir))
+            try:
+                if entry is not None and _unchanged(filepath, entry):
+                    results[i] = (False, _CACHED_MESSAGE)
+                    continue
+            except OSError:
+                pass  # reported by process_file
+        pending.append(i)
+    
+    todo = [filepaths[i] for i in pending]
+    if (workers or os.cpu_count() or 1) == 1 or len(todo) < _PARALLEL_MIN_FILES:
+        processed = [process_file(filepath, dry_run) for filepath in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # chunksize amortizes the pickling of arguments and results
+            processed = list(executor.map(partial(process_file, dry_run=dry_run), todo, chunksize=8))
+    
+    for i, (was_modified, message) in zip(pending, processed):
+        results[i] = (was_modified, message)
+        # A file still to be fixed (dry run) or in error is processed again next time
+        if cache is not None and not (was_modified and dry_run) and 'Error' not in message:
+            try:
+                cache[os.path.relpath(filepaths[i], base_dir)] = _file_entry(filepaths[i])
+            except OSError:
+                pass
+    return results
+
+
 def main():
     """Main function to run the auto-fix script."""
     # Determine base directory (repository root)
@@ -221,6 +350,10 @@ def main():
         print("⚠ DRY RUN MODE - No files will be modified")
         print()
     
+    # --force: process every file again, ignoring the previous run's cache
+    cache_path = os.path.join(base_dir, CACHE_FILENAME)
+    cache = {} if '--force' in sys.argv else load_cache(cache_path)
+    
     # Find all Python files in modules/ and ui/
     python_files = find_python_files(base_dir)
     print(f"Found {len(python_files)} Python files in modules/ and ui/")
@@ -231,9 +364,11 @@ def main():
     skipped_count = 0
     error_count = 0
     
-    for filepath in sorted(python_files):
+    python_files.sort()
+    results = process_files(python_files, dry_run, cache=cache, base_dir=base_dir)
+    save_cache(cache_path, cache)
+    for filepath, (was_modified, message) in zip(python_files, results):
         rel_path = os.path.relpath(filepath, base_dir)
-        was_modified, message = process_file(filepath, dry_run)
         
         if was_modified:
             print(f"✓ {rel_path}: {message}")
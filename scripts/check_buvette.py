@@ -155,14 +155,39 @@ def check_buvette_db_file():
             issues.append(f"Ligne {i}: UPDATE utilise 'type=' au lieu de 'type_mouvement='")
             print_error(issues[-1])
     
+    # Les SELECT des mouvements sont définis dans buvette_mouvements_db.py
+    # (buvette_db.py ne fait que les ré-exporter)
+    mvt_file = Path("modules/buvette_mouvements_db.py")
+    mvt_content = mvt_file.read_text() if mvt_file.exists() else ""
+    mvt_lines = mvt_content.split('\n')
+    # Les requêtes sont des constantes de module (_..._SQL) : les alias sont
+    # cherchés dans la fonction et dans les constantes SQL qu'elle utilise
+    sql_constants = {}
+    for match in re.finditer(r'^(_[A-Z_]+_(?:SQL|COLUMNS)) = (.*?)(?=^\S)', mvt_content, re.MULTILINE | re.DOTALL):
+        sql_constants[match.group(1)] = match.group(2)
+    
+    def function_sql_text(start):
+        """Corps de la fonction (30 lignes) + constantes SQL référencées, récursivement."""
+        text = '\n'.join(mvt_lines[start:min(start+30, len(mvt_lines))])
+        seen = set()
+        pending = re.findall(r'\b_[A-Z_]+_(?:SQL|COLUMNS)\b', text)
+        while pending:
+            name = pending.pop()
+            if name in seen or name not in sql_constants:
+                continue
+            seen.add(name)
+            text += '\n' + sql_constants[name]
+            pending.extend(re.findall(r'\b_[A-Z_]+_(?:SQL|COLUMNS)\b', sql_constants[name]))
+        return text
+    
     # Pattern 4: SELECT sans alias AS date, AS type
-    select_mouvements = re.compile(r'def\s+list_mouvements\(\):', re.IGNORECASE)
+    select_mouvements = re.compile(r'def\s+list_mouvements\(', re.IGNORECASE)
     found_list_mouvements = False
-    for i, line in enumerate(lines, 1):
+    for i, line in enumerate(mvt_lines, 1):
         if select_mouvements.search(line):
             found_list_mouvements = True
-            # Vérifier les 20 lignes suivantes pour les alias
-            check_lines = '\n'.join(lines[i:min(i+20, len(lines))])
+            # Vérifier la fonction et ses constantes SQL pour les alias
+            check_lines = function_sql_text(i)
             if 'AS date' not in check_lines or 'AS type' not in check_lines:
                 issues.append(f"Fonction list_mouvements (ligne {i}): manque les alias AS date/AS type")
                 print_error(issues[-1])
@@ -177,10 +202,10 @@ def check_buvette_db_file():
     # Pattern 5: get_mouvement_by_id sans alias
     select_mouvement_by_id = re.compile(r'def\s+get_mouvement_by_id\(', re.IGNORECASE)
     found_get_mouvement = False
-    for i, line in enumerate(lines, 1):
+    for i, line in enumerate(mvt_lines, 1):
         if select_mouvement_by_id.search(line):
             found_get_mouvement = True
-            check_lines = '\n'.join(lines[i:min(i+20, len(lines))])
+            check_lines = function_sql_text(i)
             if 'AS date' not in check_lines or 'AS type' not in check_lines:
                 issues.append(f"Fonction get_mouvement_by_id (ligne {i}): manque les alias AS date/AS type")
                 print_error(issues[-1])
@@ -336,8 +336,11 @@ class DatabaseMigrator:
         'union', 'unique', 'update', 'values', 'when', 'where'
     }
     
-    def __init__(self, db_path: str, use_yaml_hints: bool = True, fuzzy_threshold: float = 0.75):
+    def __init__(self, db_path: str, use_yaml_hints: bool = True, fuzzy_threshold: float = 0.75,
+                 reports_dir: Optional[str] = None):
         self.db_path = db_path
+        # Répertoire des rapports (défaut: reports/ à la racine du projet)
+        self.reports_dir = Path(reports_dir) if reports_dir else Path(__file__).parent.parent / "reports"
         self.backup_path = None
         self.migration_log = []
         self.errors = []
@@ -944,8 +947,8 @@ class DatabaseMigrator:
             self.restore_backup()
             success = False
         
-        # Générer le rapport dans le répertoire reports/
-        report_dir = Path(__file__).parent.parent / "reports"
+        # Générer le rapport dans le répertoire des rapports
+        report_dir = self.reports_dir
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         status_suffix = "success" if success else "failed"
         report_file = report_dir / f"migration_report_{status_suffix}_{timestamp}.md"
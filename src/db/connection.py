@@ -21,6 +21,9 @@ DB_DEFAULT_PATH = Path(_default_path)
 
 DEFAULT_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
 
+# Compiled statements kept per connection (sqlite3 default: 128)
+DEFAULT_CACHED_STATEMENTS = int(os.getenv("DB_CACHED_STATEMENTS", "512"))
+
 
 def _ensure_parent(path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -34,10 +37,14 @@ def connect(
     """
     Retourne une connexion sqlite3 configurée.
     - Active foreign_keys
-    - Active WAL (améliore concurrence lecture/écriture)
+    - Active WAL (améliore concurrence lecture/écriture) ; WAL demande un
+      dossier accessible en écriture (fichiers -wal/-shm) et des checkpoints
+      (automatiques, plus modules.db_api.start_maintenance)
+    - synchronous=NORMAL, temp_store=MEMORY, cache de pages de 64 Mio
     - Définit row_factory sur sqlite3.Row pour accès par clé
     - Définit PRAGMA busy_timeout afin que sqlite attende au lieu
       d'échouer immédiatement
+    - Garde DEFAULT_CACHED_STATEMENTS requêtes compilées en cache
     """
     path = DB_DEFAULT_PATH if db_path is None else Path(db_path)
     _ensure_parent(path)
@@ -49,6 +56,7 @@ def connect(
         isolation_level=None,
         detect_types=sqlite3.PARSE_DECLTYPES,
         check_same_thread=check_same_thread,
+        cached_statements=DEFAULT_CACHED_STATEMENTS,
     )
     # Ensure PRAGMAs for safer concurrency
     conn.execute("PRAGMA foreign_keys = ON;")
@@ -57,6 +65,8 @@ def connect(
     except Exception:
         pass
     conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA cache_size = -65536;")
     conn.execute(f"PRAGMA busy_timeout = {DEFAULT_BUSY_TIMEOUT_MS};")
     conn.row_factory = sqlite3.Row
     return conn
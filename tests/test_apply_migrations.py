@@ -0,0 +1,194 @@
+"""
+Tests for the apply_migrations script.
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import apply_migrations
+
+
+def test_baseline_marks_pending_migrations_in_one_commit():
+    """baseline_migrations records every migration with a single commit, without running it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        migrations = []
+        for name in ("0001_a.sql", "0002_b.sql", "0003_c.sql"):
+            path = Path(tmpdir) / name
+            path.write_text("CREATE TABLE should_not_exist (id INTEGER);", encoding="utf-8")
+            migrations.append(path)
+
+        conn = sqlite3.connect(str(Path(tmpdir) / "test.db"))
+        apply_migrations.init_migrations_table(conn)
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        assert apply_migrations.baseline_migrations(conn, migrations) == 3
+
+        conn.set_trace_callback(None)
+        assert apply_migrations.get_applied_migrations(conn) == {"0001_a.sql", "0002_b.sql", "0003_c.sql"}
+        assert [s for s in statements if s.startswith("COMMIT")] == ["COMMIT"]
+        assert conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name='should_not_exist'"
+        ).fetchone()[0] == 0
+        conn.close()
+
+
+def test_migration_connection_uses_wal_and_backup_holds_committed_changes():
+    """configure_connection switches to WAL; the backup includes changes still in the WAL."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        conn = sqlite3.connect(str(db_path))
+        apply_migrations.configure_connection(conn)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+        conn.execute("CREATE TABLE t (id INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+        # With the migration connection, then with a connection of its own
+        for source in (conn, None):
+            backup_path = apply_migrations.backup_database(db_path, source)
+            backup = sqlite3.connect(str(backup_path))
+            assert backup.execute("SELECT id FROM t").fetchall() == [(1,)]
+            backup.close()
+            backup_path.unlink()
+        conn.close()
+
+
+def test_migration_files_are_listed_once_per_directory(monkeypatch):
+    """get_migration_files returns the .sql files by name and does not rescan the directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in ("0002_b.sql", "0001_a.sql", "README.md"):
+            (Path(tmpdir) / name).write_text("", encoding="utf-8")
+        monkeypatch.setattr(apply_migrations, "MIGRATIONS_DIR", Path(tmpdir))
+
+        assert [m.name for m in apply_migrations.get_migration_files()] == ["0001_a.sql", "0002_b.sql"]
+        (Path(tmpdir) / "0003_c.sql").write_text("", encoding="utf-8")
+        assert len(apply_migrations.get_migration_files()) == 2
+        apply_migrations._list_migration_files.cache_clear()
+        assert len(apply_migrations.get_migration_files()) == 3
+
+
+def test_apply_migration_reads_utf8_scripts():
+    """Migration scripts are decoded as UTF-8 (BOM included) and recorded once applied."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        migration = Path(tmpdir) / "0001_libelle.sql"
+        migration.write_bytes("\ufeffCREATE TABLE t (libellé TEXT DEFAULT 'entrée');".encode("utf-8"))
+
+        conn = sqlite3.connect(str(Path(tmpdir) / "test.db"))
+        apply_migrations.init_migrations_table(conn)
+
+        assert apply_migrations.apply_migration(conn, migration)
+        conn.execute("INSERT INTO t DEFAULT VALUES")
+        assert conn.execute("SELECT libellé FROM t").fetchone()[0] == "entrée"
+        assert apply_migrations.get_applied_migrations(conn) == {"0001_libelle.sql"}
+        conn.close()
+
+
+def test_failed_migration_is_rolled_back_and_foreign_keys_checked_once():
+    """A migration is atomic; with foreign keys enforced, violations are caught before commit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        conn = sqlite3.connect(str(Path(tmpdir) / "test.db"))
+        apply_migrations.init_migrations_table(conn)
+        conn.executescript("""
+            CREATE TABLE parent (id INTEGER PRIMARY KEY);
+            CREATE TABLE child (id INTEGER PRIMARY KEY, parent_id INTEGER REFERENCES parent(id));
+        """)
+        conn.execute("PRAGMA foreign_keys=ON")
+
+        broken = Path(tmpdir) / "0001_broken.sql"
+        broken.write_text("CREATE TABLE half (id INTEGER);\nINSERT INTO missing VALUES (1);", encoding="utf-8")
+        orphan = Path(tmpdir) / "0002_orphan.sql"
+        orphan.write_text("INSERT INTO child VALUES (1, 42);", encoding="utf-8")
+        rebuild = Path(tmpdir) / "0003_rebuild.sql"
+        rebuild.write_text("""
+            INSERT INTO parent VALUES (1);
+            INSERT INTO child VALUES (1, 1);
+            CREATE TABLE parent_new (id INTEGER PRIMARY KEY, name TEXT);
+            INSERT INTO parent_new (id) SELECT id FROM parent;
+            DROP TABLE parent;
+            ALTER TABLE parent_new RENAME TO parent;
+        """, encoding="utf-8")
+
+        assert not apply_migrations.apply_migration(conn, broken)
+        assert not apply_migrations.apply_migration(conn, orphan)
+        assert apply_migrations.apply_migration(conn, rebuild)
+
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name='half'").fetchone() is None
+        assert conn.execute("SELECT * FROM child").fetchall() == [(1, 1)]
+        assert apply_migrations.get_applied_migrations(conn) == {"0003_rebuild.sql"}
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        conn.close()
+
+
+def test_dry_run_previews_first_lines_only(capsys):
+    """A dry run prints the first 10 lines and applies nothing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        migration = Path(tmpdir) / "0001_long.sql"
+        migration.write_text("".join(f"-- line {i}\n" for i in range(1, 13)), encoding="utf-8")
+        conn = sqlite3.connect(str(Path(tmpdir) / "test.db"))
+        apply_migrations.init_migrations_table(conn)
+
+        assert apply_migrations.apply_migration(conn, migration, dry_run=True)
+
+        output = capsys.readouterr().out
+        assert "  -- line 10\n  ...\n" in output
+        assert "line 11" not in output
+        assert apply_migrations.get_applied_migrations(conn) == set()
+        conn.close()
+
+
+def test_show_status_reads_applied_migrations_once(capsys):
+    """show_status lists applied dates and pending files from a single query."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        migrations = [Path(tmpdir) / "0001_a.sql", Path(tmpdir) / "0002_b.sql"]
+        conn = sqlite3.connect(str(Path(tmpdir) / "test.db"))
+        apply_migrations.init_migrations_table(conn)
+        conn.execute(
+            f"INSERT INTO {apply_migrations.MIGRATIONS_TABLE} (filename, applied_at) "
+            "VALUES ('0001_a.sql', '2025-03-01T10:00:00')"
+        )
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        apply_migrations.show_status(conn, migrations)
+
+        conn.close()
+    output = capsys.readouterr().out
+    assert len(statements) == 1
+    assert "0001_a.sql" in output and "2025-03-01 " in output
+    assert "Applied: 1\nPending: 1\n" in output
+
+
+def test_single_row_inserts_are_fused_in_batches():
+    """Runs of single-row INSERTs become multi-row INSERTs with the same result."""
+    seed = "".join(f"INSERT INTO t (a, b) VALUES ({i}, 'v;({i})');\n" for i in range(120))
+    sql = ("-- seed\nCREATE TABLE t (a, b);\n" + seed
+           + "INSERT INTO t (a, b) VALUES ((SELECT max(a) FROM t) + 1, 'sub');\n"
+           + "INSERT INTO t VALUES (-1, 'it''s');\n")
+
+    fused = apply_migrations.fuse_insert_statements(sql)
+
+    assert fused.startswith("-- seed\nCREATE TABLE t (a, b);\nINSERT INTO t (a, b) VALUES (0, 'v;(0)'),\n(1, ")
+    # 50 + 50 + 20 rows, then the subquery and the other head are kept as written
+    assert fused.count("INSERT INTO") == 3 + 2
+    assert fused.endswith(";\nINSERT INTO t (a, b) VALUES ((SELECT max(a) FROM t) + 1, 'sub');\n"
+                          "INSERT INTO t VALUES (-1, 'it''s');\n")
+    expected = sqlite3.connect(":memory:")
+    expected.executescript(sql)
+    actual = sqlite3.connect(":memory:")
+    actual.executescript(fused)
+    query = "SELECT rowid, a, b FROM t ORDER BY rowid"
+    assert actual.execute(query).fetchall() == expected.execute(query).fetchall()
+    assert len(expected.execute(query).fetchall()) == 122
+    expected.close()
+    actual.close()
+
+    trigger = ("CREATE TRIGGER log_t AFTER DELETE ON t BEGIN\n"
+               "INSERT INTO t VALUES (1, 'a');\nINSERT INTO t VALUES (2, 'b');\nEND;\n")
+    assert apply_migrations.fuse_insert_statements(trigger) == trigger
@@ -0,0 +1,185 @@
+"""
+Tests for the audit_db_usage script.
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.audit_db_usage import DBUsageAuditor
+
+
+SAMPLE = '''import sqlite3
+from db.db import get_connection
+
+def load(article_id):
+    conn = get_connection()
+    cur = conn.execute("SELECT id, name FROM buvette_articles WHERE id=?",
+                       (article_id,))
+    row = cur.fetchone()
+    rows = cur.fetchall()
+    batch = cur.fetchmany(10)
+    name = row.get('name')
+    first = row[0]
+    other = values[1]
+    raw = sqlite3.connect("x.db")
+    return rows[1], data.get("x"), config.get("y")
+'''
+
+
+def _scan(content):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "sample.py"
+        path.write_text(content, encoding="utf-8")
+        auditor = DBUsageAuditor(tmpdir)
+        auditor.scan_directory()
+        return auditor.results
+
+
+def test_scan_file_finds_every_pattern():
+    """Each pattern is reported with its line number and code."""
+    results = _scan(SAMPLE)
+
+    assert results['sqlite3_imports'] == [{'file': 'sample.py', 'line': 1}]
+    assert [c['line'] for c in results['get_connection_calls']] == [5]
+    assert [(f['line'], f['pattern']) for f in results['fetch_patterns']] == [
+        (8, '.fetchone()'), (9, '.fetchall()'), (10, '.fetchmany('),
+    ]
+    assert [(g['line'], g['variable']) for g in results['row_get_usage']] == [
+        (11, 'row'), (15, 'data'),
+    ]
+    assert [(p['line'], p['variable'], p['index']) for p in results['positional_indexing']] == [
+        (12, 'row', '0'), (15, 'rows', '1'),
+    ]
+    assert [e['line'] for e in results['execute_patterns']] == [6]
+    assert '(article_id,))' in results['execute_patterns'][0]['code']
+    assert [c['line'] for c in results['connection_patterns']] == [14]
+    assert results['connection_patterns'][0]['code'] == 'raw = sqlite3.connect("x.db")'
+
+
+def test_positional_indexing_is_reported_once_per_line():
+    """Several positional accesses on one line give a single positional_indexing item."""
+    results = _scan("def f(row, data):\n    return row[0], row[1], data[2]\n    \nx = row[3]\n")
+
+    assert [(p['line'], p['index']) for p in results['positional_indexing']] == [(2, '0'), (4, '3')]
+
+
+def test_comments_and_strings_are_not_reported():
+    """Patterns inside comments, docstrings and string literals are ignored."""
+    results = _scan('"""Call conn.execute() then row.get("x")."""\n'
+                    '# sqlite3.connect(path); rows[0]\n'
+                    'HELP = "cur.fetchall()"\n')
+
+    assert all(items == [] for items in results.values())
+
+
+def test_unparsable_file_falls_back_to_regex_scan():
+    """A file with a syntax error is still scanned, with the regex patterns."""
+    results = _scan("def broken(:\n    row = cur.fetchone()\n    return row.get('x')\n")
+
+    assert [f['line'] for f in results['fetch_patterns']] == [2]
+    assert [g['line'] for g in results['row_get_usage']] == [3]
+
+
+def test_files_without_db_tokens_are_not_parsed(monkeypatch):
+    """The substring prefilter skips parsing files that cannot hold DB usage."""
+    import scripts.audit_db_usage as audit_db_usage
+
+    parsed = []
+    real_parse = audit_db_usage.ast.parse
+    monkeypatch.setattr(audit_db_usage.ast, "parse",
+                        lambda *args, **kwargs: parsed.append(args) or real_parse(*args, **kwargs))
+
+    results = _scan("def add(a, b):\n    return a + b\n")
+    assert all(items == [] for items in results.values())
+    assert parsed == []
+
+    results = _scan("def first(row):\n    return row [ 0 ]\n")
+    assert [p['line'] for p in results['positional_indexing']] == [2]
+    assert len(parsed) == 1
+
+
+def test_parallel_scan_matches_sequential_scan(monkeypatch):
+    """Worker processes give the same results, in the same order, as one process."""
+    import scripts.audit_db_usage as audit_db_usage
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(5):
+            package = Path(tmpdir) / f"pkg{i}"
+            package.mkdir()
+            (package / "sample.py").write_text(SAMPLE, encoding="utf-8")
+        (Path(tmpdir) / "__pycache__").mkdir()
+        (Path(tmpdir) / "__pycache__" / "skipped.py").write_text(SAMPLE, encoding="utf-8")
+
+        sequential = DBUsageAuditor(tmpdir)
+        sequential.scan_directory(workers=1)
+        monkeypatch.setattr(audit_db_usage, "_PARALLEL_MIN_FILES", 0)
+        parallel = DBUsageAuditor(tmpdir)
+        parallel.scan_directory(workers=2)
+
+    assert parallel.results == sequential.results
+    assert len(sequential.results['sqlite3_imports']) == 5
+
+
+def test_scan_cache_skips_unchanged_files(monkeypatch):
+    """With a cache file, only files whose mtime or size changed are scanned again."""
+    import os
+    import scripts.audit_db_usage as audit_db_usage
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_path = Path(tmpdir) / ".cache" / "audit.json"
+        for name in ("a.py", "b.py"):
+            (Path(tmpdir) / name).write_text(SAMPLE, encoding="utf-8")
+        first = DBUsageAuditor(tmpdir)
+        first.scan_directory(cache_path=cache_path)
+
+        scanned = []
+        real_scan = audit_db_usage.scan_file_results
+        monkeypatch.setattr(audit_db_usage, "scan_file_results",
+                            lambda path, rel: scanned.append(rel) or real_scan(path, rel))
+        second = DBUsageAuditor(tmpdir)
+        second.scan_directory(cache_path=cache_path)
+        assert scanned == []
+        assert second.results == first.results
+
+        changed = Path(tmpdir) / "b.py"
+        changed.write_text("import sqlite3\n", encoding="utf-8")
+        os.utime(changed, ns=(0, 0))
+        third = DBUsageAuditor(tmpdir)
+        third.scan_directory(cache_path=cache_path)
+        assert scanned == ["b.py"]
+        assert sorted(i['file'] for i in third.results['sqlite3_imports']) == ["a.py", "b.py"]
+        assert len(third.results['fetch_patterns']) == 3
+
+
+def test_reports_mention_critical_row_get():
+    """The generated reports list row.get() usages as critical items."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "sample.py").write_text(SAMPLE, encoding="utf-8")
+        auditor = DBUsageAuditor(tmpdir)
+        auditor.scan_directory()
+        sql_map = auditor.generate_sql_access_map()
+        todos = auditor.generate_todos()
+
+    assert "- row.get() usage: 2\n" in sql_map
+    assert "### sample.py" in sql_map
+    assert "- [ ] sample.py:11" in todos
+
+
+def test_reports_are_streamed_to_a_file():
+    """write_* methods write the same reports as generate_* straight to a file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "sample.py").write_text(SAMPLE, encoding="utf-8")
+        auditor = DBUsageAuditor(tmpdir)
+        auditor.scan_directory()
+        report_path = Path(tmpdir) / "TODOs.md"
+        with open(report_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            auditor.write_todos(f)
+        written = report_path.read_text(encoding="utf-8")
+
+    expected = auditor.generate_todos()
+    assert written.split("\n", 2)[2] == expected.split("\n", 2)[2]
+    assert "- [ ] sample.py:11" in written
@@ -0,0 +1,138 @@
+"""
+Tests for the auto_fix_buvette_rows script.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import auto_fix_buvette_rows
+
+
+SAMPLE = '''"""Sample module."""
+import sqlite3
+
+
+def load(conn):
+    cur = conn.cursor()
+    rows = cur.execute("SELECT * FROM buvette_articles").fetchall()
+    row = cur.execute("SELECT * FROM buvette_articles LIMIT 1").fetchone()
+    return [r for r in rows], row.get("name")
+'''
+
+
+def test_inject_conversions_after_fetch_assignments():
+    """A conversion line, at the same indentation, follows each fetch assignment."""
+    fixed = auto_fix_buvette_rows.inject_conversions(SAMPLE).split('\n')
+
+    assert fixed[7] == '    rows = _rows_to_dicts(rows)'
+    assert fixed[9] == '    row = _row_to_dict(row)'
+    assert len(fixed) == len(SAMPLE.split('\n')) + 2
+
+
+def test_inject_conversions_without_fetch_returns_content_unchanged():
+    """Content without fetch calls is returned as is; one conversion per fetch line."""
+    content = "def f(row):\n    return row.get('a')\n"
+
+    assert auto_fix_buvette_rows.inject_conversions(content) is content
+    assert auto_fix_buvette_rows.inject_conversions("  n = c.fetchone() or c.fetchall()") == (
+        "  n = c.fetchone() or c.fetchall()\n  n = _rows_to_dicts(n)"
+    )
+
+
+def test_process_file_writes_backup_fix_and_diff():
+    """process_file adds the import and conversions, keeping a .bak and a .fix.diff."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "sample.py")
+        Path(path).write_text(SAMPLE, encoding="utf-8")
+
+        assert auto_fix_buvette_rows.process_file(path, dry_run=True) == (True, "Would be modified (dry run)")
+        assert Path(path).read_text(encoding="utf-8") == SAMPLE
+
+        was_modified, _ = auto_fix_buvette_rows.process_file(path)
+        fixed = Path(path).read_text(encoding="utf-8")
+
+        assert was_modified
+        assert "import sqlite3\nfrom modules.db_row_utils import _row_to_dict, _rows_to_dicts\n" in fixed
+        assert Path(path + ".bak").read_text(encoding="utf-8") == SAMPLE
+        assert "+    row = _row_to_dict(row)" in Path(path + ".fix.diff").read_text(encoding="utf-8")
+
+        Path(path).write_text("def f(x):\n    return x.get('a')\n", encoding="utf-8")
+        assert auto_fix_buvette_rows.process_file(path) == (False, "No fetch+get pattern detected")
+
+
+def test_find_python_files_walks_subdirectories():
+    """Nested .py files are found; missing subdirectories and symlinked directories are skipped."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        nested = Path(tmpdir) / "modules" / "sub"
+        nested.mkdir(parents=True)
+        (nested / "a.py").write_text("", encoding="utf-8")
+        (nested / "notes.txt").write_text("", encoding="utf-8")
+        (Path(tmpdir) / "modules" / "b.py").write_text("", encoding="utf-8")
+        if hasattr(os, "symlink"):
+            try:
+                os.symlink(nested, Path(tmpdir) / "modules" / "link", target_is_directory=True)
+            except OSError:
+                pass
+
+        found = auto_fix_buvette_rows.find_python_files(tmpdir)
+
+        assert sorted(os.path.relpath(path, tmpdir) for path in found) == [
+            os.path.join("modules", "b.py"), os.path.join("modules", "sub", "a.py"),
+        ]
+
+
+def test_parallel_processing_matches_sequential(monkeypatch):
+    """Worker processes give the same results, in the same order, as one process."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        for i in range(6):
+            path = os.path.join(tmpdir, f"m{i}.py")
+            Path(path).write_text(SAMPLE if i % 2 else "x = 1\n", encoding="utf-8")
+            paths.append(path)
+
+        sequential = auto_fix_buvette_rows.process_files(paths, dry_run=True, workers=1)
+        monkeypatch.setattr(auto_fix_buvette_rows, "_PARALLEL_MIN_FILES", 0)
+        parallel = auto_fix_buvette_rows.process_files(paths, dry_run=True, workers=2)
+
+    assert parallel == sequential
+    assert [modified for modified, _ in sequential] == [False, True] * 3
+
+
+def test_cache_skips_files_unchanged_since_last_run(monkeypatch):
+    """Cached files are not processed again, unless their content changed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fixed = os.path.join(tmpdir, "fixed.py")
+        plain = os.path.join(tmpdir, "plain.py")
+        Path(fixed).write_text(SAMPLE, encoding="utf-8")
+        Path(plain).write_text("x = 1\n", encoding="utf-8")
+        paths = [fixed, plain]
+        cache = {}
+
+        # A dry run does not record the file it would modify
+        auto_fix_buvette_rows.process_files(paths, dry_run=True, cache=cache, base_dir=tmpdir)
+        assert list(cache) == ["plain.py"]
+
+        first = auto_fix_buvette_rows.process_files(paths, cache=cache, base_dir=tmpdir)
+        assert first[0][0] and not first[1][0]
+        cache_path = os.path.join(tmpdir, auto_fix_buvette_rows.CACHE_FILENAME)
+        auto_fix_buvette_rows.save_cache(cache_path, cache)
+        cache = auto_fix_buvette_rows.load_cache(cache_path)
+
+        processed = []
+        real_process = auto_fix_buvette_rows.process_file
+        monkeypatch.setattr(auto_fix_buvette_rows, "process_file",
+                            lambda path, dry_run=False: processed.append(path) or real_process(path, dry_run))
+        # Same content with a new mtime is still a cache hit; new content is not
+        os.utime(fixed, ns=(0, 0))
+        Path(plain).write_text(SAMPLE, encoding="utf-8")
+        second = auto_fix_buvette_rows.process_files(paths, cache=cache, base_dir=tmpdir)
+
+        assert processed == [plain]
+        assert second[0] == (False, "Unchanged since last run (cache)")
+        assert cache["fixed.py"][0] == 0
+        assert Path(fixed).read_text(encoding="utf-8").count("_rows_to_dicts(rows)") == 1
@@ -0,0 +1,254 @@
+"""
+Tests pour les fonctions de lecture de modules.buvette_db.
+
+Ce fichier teste:
+- Les variantes sans jointure articles (with_article=False)
+- La lecture en flux de yield_mouvements
+- La lecture groupée get_mouvements_by_ids
+- Le cache de lecture de get_article_stock et son invalidation
+- Le cache des listes déroulantes (modules.dropdowns)
+- Le cache mémoire du schéma utilisé par ensure_stock_column
+"""
+
+import unittest
+import sqlite3
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock tkinter before any imports that might use it
+sys.modules['tkinter'] = type(sys)('tkinter')
+sys.modules['tkinter.messagebox'] = type(sys)('messagebox')
+
+
+def get_test_connection(db_file):
+    """Create a simple connection for testing."""
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class TestBuvetteDbListings(unittest.TestCase):
+    """Test suite for buvette_db listing helpers."""
+
+    def setUp(self):
+        """Set up a fresh test database before each test."""
+        fd, self.test_db = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ["APP_DB_PATH"] = self.test_db
+
+        conn = get_test_connection(self.test_db)
+        conn.executescript("""
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                date TEXT
+            );
+            CREATE TABLE buvette_articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                categorie TEXT,
+                unite TEXT,
+                contenance TEXT,
+                commentaire TEXT,
+                stock INTEGER DEFAULT 0,
+                purchase_price REAL
+            );
+            CREATE TABLE buvette_achats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                article_id INTEGER,
+                date_achat TEXT,
+                quantite INTEGER,
+                prix_unitaire REAL,
+                fournisseur TEXT,
+                facture TEXT,
+                exercice TEXT
+            );
+            CREATE TABLE buvette_mouvements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date_mouvement TEXT,
+                article_id INTEGER,
+                type_mouvement TEXT,
+                quantite INTEGER,
+                motif TEXT,
+                event_id INTEGER
+            );
+            CREATE TABLE buvette_inventaire_lignes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inventaire_id INTEGER,
+                article_id INTEGER,
+                quantite INTEGER,
+                commentaire TEXT
+            );
+            INSERT INTO buvette_articles (id, name, contenance, stock) VALUES (1, 'Coca', '33cl', 5);
+            INSERT INTO buvette_achats (article_id, date_achat, quantite) VALUES (1, '2025-01-01', 10);
+            INSERT INTO buvette_mouvements (date_mouvement, article_id, type_mouvement, quantite, motif)
+                VALUES ('2025-01-02', 1, 'sortie', 3, 'vente');
+            INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite) VALUES (7, 1, 4);
+        """)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Clean up test database after each test."""
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+
+    def test_list_mouvements_with_and_without_article(self):
+        """Join-free listing keeps aliases and article_id but drops article columns."""
+        from modules.buvette_db import list_mouvements, list_mouvements_ids_only
+
+        joined = list_mouvements()
+        plain = list_mouvements_ids_only()
+
+        self.assertEqual(joined[0]["article_name"], "Coca")
+        self.assertEqual(plain[0]["article_id"], 1)
+        self.assertEqual(plain[0]["type"], "sortie")
+        self.assertEqual(plain[0]["date"], "2025-01-02")
+        self.assertNotIn("article_name", plain[0])
+        # Raw column names stay available for the mouvement dialogs
+        self.assertEqual(joined[0]["type_mouvement"], "sortie")
+
+    def test_yield_mouvements_streams_and_releases(self):
+        """yield_mouvements matches list_mouvements and gives the connection back early."""
+        from modules.buvette_db import list_mouvements, yield_mouvements
+        from modules.db_api import pool
+
+        conn = get_test_connection(self.test_db)
+        conn.execute("""
+            INSERT INTO buvette_mouvements (date_mouvement, article_id, type_mouvement, quantite)
+            VALUES ('2025-01-03', 1, 'entrée', 6)
+        """)
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(list(yield_mouvements(batch_size=1)), list_mouvements())
+
+        stream = yield_mouvements(batch_size=1)
+        self.assertEqual(next(stream)["date"], "2025-01-03")
+        stream.close()
+        self.assertTrue(all(slot[2] == 0 for slot in pool._slots().values()))
+
+    def test_get_mouvements_by_ids(self):
+        """Batched lookup returns the same rows as get_mouvement_by_id, across chunks."""
+        from modules.buvette_db import get_mouvement_by_id, get_mouvements_by_ids
+
+        found = get_mouvements_by_ids([1] + list(range(1000, 1600)))
+
+        self.assertEqual(list(found), [1])
+        self.assertEqual(found[1], get_mouvement_by_id(1))
+        self.assertEqual(get_mouvements_by_ids([]), {})
+
+    def test_list_achats_and_lignes_without_article(self):
+        """with_article=False is honoured by list_achats and list_lignes_inventaire."""
+        from modules.buvette_db import list_achats, list_lignes_inventaire
+
+        self.assertEqual(list_achats()[0]["article_contenance"], "33cl")
+        self.assertNotIn("article_name", list_achats(with_article=False)[0])
+
+        lignes = list_lignes_inventaire(7, with_article=False)
+        self.assertEqual(lignes[0]["quantite"], 4)
+        self.assertNotIn("article_name", lignes[0])
+
+    def test_get_article_stock_cache_invalidation(self):
+        """Stock reads are cached and invalidated by every stock write path."""
+        from modules.buvette_db import get_article_stock, set_article_stock
+        from modules.stock_db import set_stock
+
+        self.assertEqual(get_article_stock(1), 5)
+
+        # Out-of-band write is not seen: the value comes from the cache
+        conn = get_test_connection(self.test_db)
+        conn.execute("UPDATE buvette_articles SET stock=42 WHERE id=1")
+        conn.commit()
+        self.assertEqual(get_article_stock(1), 5)
+
+        set_article_stock(1, 8)
+        self.assertEqual(get_article_stock(1), 8)
+
+        set_stock(conn, 1, 12)
+        conn.commit()
+        conn.close()
+        self.assertEqual(get_article_stock(1), 12)
+
+    def test_stock_cache_evicts_only_written_article(self):
+        """A stock write evicts its own article; other cached stocks are kept."""
+        from modules.buvette_db import get_article_stock, set_article_stock, clear_stock_cache
+
+        clear_stock_cache()
+        conn = get_test_connection(self.test_db)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (2, 'Eau', 9)")
+        conn.commit()
+        self.assertEqual((get_article_stock(1), get_article_stock(2)), (5, 9))
+
+        conn.execute("UPDATE buvette_articles SET stock=0 WHERE id=2")
+        conn.commit()
+        conn.close()
+        set_article_stock(1, 6)
+        # Article 2 is still served from the cache, article 1 is re-read
+        self.assertEqual((get_article_stock(1), get_article_stock(2)), (6, 9))
+        clear_stock_cache()
+        self.assertEqual(get_article_stock(2), 0)
+
+    def test_dropdown_lists_are_cached_and_invalidated(self):
+        """Dropdown queries are cached until an article write invalidates them."""
+        from modules.buvette_db import insert_article
+        from modules.buvette_mouvements_db import list_articles, list_events
+        from modules.dropdowns import invalidate_dropdowns, invalidate_events
+
+        invalidate_dropdowns()
+        self.assertEqual(list_articles(), [{"id": 1, "name": "Coca"}])
+        self.assertEqual(list_events(), [])
+
+        conn = get_test_connection(self.test_db)
+        conn.execute("INSERT INTO events (name, date) VALUES ('Kermesse', '2025-06-01')")
+        conn.commit()
+        conn.close()
+        # Out-of-band write: still served from the cache
+        self.assertEqual(list_events(), [])
+        invalidate_events()
+        self.assertEqual([e["name"] for e in list_events()], ["Kermesse"])
+
+        insert_article("Eau", None, None, None, None)
+        self.assertEqual([a["name"] for a in list_articles()], ["Coca", "Eau"])
+
+    def test_ensure_stock_column_caches_schema_in_memory(self):
+        """ensure_stock_column adds the column once and leaves user_version alone."""
+        from unittest.mock import patch
+        from modules import buvette_db
+        from modules.buvette_db import ensure_stock_column, clear_schema_cache
+
+        conn = get_test_connection(self.test_db)
+        conn.executescript("""
+            DROP TABLE buvette_articles;
+            CREATE TABLE buvette_articles (id INTEGER PRIMARY KEY, name TEXT);
+        """)
+        conn.close()
+        clear_schema_cache()
+
+        self.assertTrue(ensure_stock_column())
+        statements = []
+        get_conn = buvette_db.get_conn
+
+        def traced_conn():
+            conn = get_conn()
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        # The second call is answered from the in-memory schema cache
+        with patch.object(buvette_db, "get_conn", traced_conn):
+            self.assertFalse(ensure_stock_column())
+        self.assertFalse(any("table_info" in sql for sql in statements))
+
+        conn = get_test_connection(self.test_db)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = [r[1] for r in conn.execute("PRAGMA table_info(buvette_articles)")]
+        conn.close()
+        self.assertEqual(version, 0)
+        self.assertIn("stock", columns)
+
+if __name__ == '__main__':
+    unittest.main()
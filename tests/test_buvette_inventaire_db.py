@@ -0,0 +1,220 @@
+"""
+Tests pour les fonctions d'écriture de modules.buvette_inventaire_db.
+
+Ce fichier teste:
+- L'insertion d'un inventaire (RETURNING id / ligne complète)
+- La lecture groupée get_inventaires_by_ids
+- L'insertion et l'upsert en lot des lignes d'inventaire
+- L'upsert unitaire (ON CONFLICT, avec repli sans index unique)
+- La lecture des lignes avec noms d'articles issus du cache des listes
+"""
+
+import unittest
+import sqlite3
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock tkinter before any imports that might use it
+sys.modules['tkinter'] = type(sys)('tkinter')
+sys.modules['tkinter.messagebox'] = type(sys)('messagebox')
+
+
+def get_test_connection(db_file):
+    """Create a simple connection for testing."""
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class TestBuvetteInventaireDbWrites(unittest.TestCase):
+    """Test suite for buvette_inventaire_db write helpers."""
+
+    def setUp(self):
+        """Set up a fresh test database before each test."""
+        fd, self.test_db = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ["APP_DB_PATH"] = self.test_db
+
+        conn = get_test_connection(self.test_db)
+        conn.executescript("""
+            CREATE TABLE events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                date TEXT
+            );
+            CREATE TABLE buvette_articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                contenance TEXT,
+                stock INTEGER DEFAULT 0
+            );
+            CREATE TABLE buvette_inventaires (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date_inventaire DATE,
+                event_id INTEGER,
+                type_inventaire TEXT,
+                commentaire TEXT
+            );
+            CREATE TABLE buvette_inventaire_lignes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inventaire_id INTEGER,
+                article_id INTEGER,
+                quantite INTEGER,
+                commentaire TEXT,
+                FOREIGN KEY (inventaire_id) REFERENCES buvette_inventaires(id),
+                FOREIGN KEY (article_id) REFERENCES buvette_articles(id)
+            );
+            INSERT INTO buvette_articles (id, name) VALUES (1, 'Coca'), (2, 'Eau'), (3, 'Chips');
+            INSERT INTO buvette_inventaires (id, date_inventaire, type_inventaire)
+                VALUES (1, '2025-01-01', 'avant');
+        """)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        """Clean up test database after each test."""
+        if os.path.exists(self.test_db):
+            os.remove(self.test_db)
+
+    def _lines(self):
+        conn = get_test_connection(self.test_db)
+        rows = conn.execute("""
+            SELECT article_id, quantite, commentaire FROM buvette_inventaire_lignes
+            WHERE inventaire_id=1 ORDER BY article_id
+        """).fetchall()
+        conn.close()
+        return [tuple(r) for r in rows]
+
+    def test_insert_inventaire_returns_id_and_row(self):
+        """insert_inventaire returns the new id; the _returning_row variant the full row."""
+        from modules.buvette_inventaire_db import (
+            insert_inventaire, insert_inventaire_returning_row, get_inventaire_by_id
+        )
+
+        inv_id = insert_inventaire('2025-02-01', None, 'apres', 'soir')
+        self.assertEqual(inv_id, 2)
+        self.assertEqual(get_inventaire_by_id(inv_id)["commentaire"], 'soir')
+
+        row = insert_inventaire_returning_row('2025-03-01', None, 'avant', None)
+        self.assertEqual(row["id"], 3)
+        stored = get_inventaire_by_id(3)
+        self.assertEqual(row, {k: stored[k] for k in row})
+
+    def test_create_inventaire_with_lignes(self):
+        """Header and lines are created together; a failing line leaves nothing behind."""
+        from modules.buvette_inventaire_db import (
+            create_inventaire_with_lignes, get_inventaires_by_ids, list_lignes_inventaire
+        )
+
+        inv_id = create_inventaire_with_lignes(
+            '2025-02-01', None, 'apres', None, ((a, q, None) for a, q in [(1, 6), (3, 2)])
+        )
+        lignes = list_lignes_inventaire(inv_id, with_article=False)
+        self.assertEqual([(ligne["article_id"], ligne["quantite"]) for ligne in lignes], [(1, 6), (3, 2)])
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            create_inventaire_with_lignes('2025-03-01', None, 'avant', None, [(99, 1, None)])
+        self.assertEqual(list(get_inventaires_by_ids([inv_id + 1])), [])
+
+    def test_get_inventaires_by_ids(self):
+        """Batched lookup keyed by id, unknown ids are skipped."""
+        from modules.buvette_inventaire_db import (
+            insert_inventaire, get_inventaire_by_id, get_inventaires_by_ids
+        )
+
+        inv_id = insert_inventaire('2025-02-01', None, 'apres', None)
+        found = get_inventaires_by_ids([1, inv_id, 42])
+
+        self.assertEqual(sorted(found), [1, inv_id])
+        self.assertEqual(found[inv_id], get_inventaire_by_id(inv_id))
+
+    def test_insert_lignes_inventaire_bulk(self):
+        """All lines are inserted in one call."""
+        from modules.buvette_inventaire_db import insert_lignes_inventaire_bulk
+
+        insert_lignes_inventaire_bulk(1, [(1, 10, None), (2, 5, "frigo")])
+
+        self.assertEqual(self._lines(), [(1, 10, None), (2, 5, "frigo")])
+
+    def test_upsert_lignes_inventaire_bulk(self):
+        """Existing lines are updated, new ones inserted, duplicates keep the last value."""
+        from modules.buvette_inventaire_db import (
+            insert_ligne_inventaire, upsert_lignes_inventaire_bulk
+        )
+
+        insert_ligne_inventaire(1, 1, 10)
+        upsert_lignes_inventaire_bulk(1, [(1, 12, None), (2, 3, None), (2, 4, "recompte")])
+
+        self.assertEqual(self._lines(), [(1, 12, None), (2, 4, "recompte")])
+
+    def test_write_transaction_commits_header_and_lines_together(self):
+        """Writers nested in write_transaction() join it: all rows commit or none do."""
+        from modules.buvette_inventaire_db import (
+            write_transaction, insert_inventaire, upsert_lignes_inventaire_bulk, get_inventaires_by_ids
+        )
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            with write_transaction():
+                insert_inventaire('2025-02-01', None, 'apres', None)
+                upsert_lignes_inventaire_bulk(1, [(1, 10, None), (99, 1, None)])
+        self.assertEqual(list(get_inventaires_by_ids([2])), [])
+        self.assertEqual(self._lines(), [])
+
+        with write_transaction() as conn:
+            inv_id = insert_inventaire('2025-02-01', None, 'apres', None)
+            upsert_lignes_inventaire_bulk(1, [(1, 10, None)])
+            self.assertTrue(conn.in_transaction)
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(list(get_inventaires_by_ids([inv_id])), [inv_id])
+        self.assertEqual(self._lines(), [(1, 10, None)])
+
+    def test_upsert_ligne_inventaire_with_unique_index(self):
+        """ON CONFLICT path updates the existing line in place."""
+        from modules.buvette_inventaire_db import upsert_ligne_inventaire
+
+        conn = get_test_connection(self.test_db)
+        conn.execute("""
+            CREATE UNIQUE INDEX idx_buvette_inventaire_lignes_inv_article
+            ON buvette_inventaire_lignes(inventaire_id, article_id)
+        """)
+        conn.commit()
+        conn.close()
+
+        upsert_ligne_inventaire(1, 1, 10)
+        upsert_ligne_inventaire(1, 1, 7, "casse")
+        upsert_ligne_inventaire(1, 2, 3)
+
+        self.assertEqual(self._lines(), [(1, 7, "casse"), (2, 3, None)])
+
+    def test_upsert_ligne_inventaire_without_unique_index(self):
+        """Databases lacking the unique index still upsert correctly."""
+        from modules.buvette_inventaire_db import upsert_ligne_inventaire
+
+        upsert_ligne_inventaire(1, 1, 10)
+        upsert_ligne_inventaire(1, 1, 7)
+
+        self.assertEqual(self._lines(), [(1, 7, None)])
+
+    def test_list_lignes_inventaire_names_from_dropdown_cache(self):
+        """Lines get article names without a join and are sorted by name."""
+        from modules.buvette_inventaire_db import (
+            insert_lignes_inventaire_bulk, list_lignes_inventaire
+        )
+        from modules.dropdowns import invalidate_articles
+
+        invalidate_articles()
+        insert_lignes_inventaire_bulk(1, [(1, 10, None), (3, 2, None), (None, 1, None), (2, 5, None)])
+
+        lignes = list_lignes_inventaire(1)
+
+        self.assertEqual([ligne["article_name"] for ligne in lignes], [None, "Chips", "Coca", "Eau"])
+        self.assertEqual([ligne["quantite"] for ligne in lignes], [1, 2, 10, 5])
+        self.assertNotIn("article_name", list_lignes_inventaire(1, with_article=False)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
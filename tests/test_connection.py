@@ -26,3 +26,14 @@ def test_connect_and_transaction(tmp_path):
         assert row["email"] == "a@example.org"
     finally:
         cur.close()
+
+
+def test_connect_applies_tuning_pragmas(tmp_path):
+    conn = connect(tmp_path / "pragmas.db")
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    finally:
+        conn.close()
@@ -5,15 +5,28 @@ Tests for the database migration script.
 import os
 import sys
 import sqlite3
-import tempfile
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from scripts.update_db_structure import DatabaseMigrator, REFERENCE_SCHEMA, get_latest_migration_report
 
 
+@pytest.fixture
+def db_path(tmp_path):
+    """Database file inside the test's temporary directory."""
+    return str(tmp_path / "test.db")
+
+
+@pytest.fixture
+def reports_dir(tmp_path):
+    """Migration reports directory inside the test's temporary directory."""
+    return tmp_path / "reports"
+
+
 def create_test_database(db_path, missing_columns=True):
     """Create a test database with or without missing columns."""
     conn = sqlite3.connect(db_path)
@@ -69,408 +82,265 @@ def create_test_database(db_path, missing_columns=True):
     conn.close()
 
 
-def test_database_migrator_initialization():
+def test_database_migrator_initialization(db_path):
     """Test DatabaseMigrator initialization."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path)
+    migrator = DatabaseMigrator(db_path)
     
-    try:
-        create_test_database(db_path)
-        migrator = DatabaseMigrator(db_path)
-        
-        assert migrator.db_path == db_path
-        assert migrator.backup_path is None
-        assert len(migrator.migration_log) == 0
-        assert len(migrator.errors) == 0
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    assert migrator.db_path == db_path
+    assert migrator.backup_path is None
+    assert len(migrator.migration_log) == 0
+    assert len(migrator.errors) == 0
 
 
-def test_create_backup():
+def test_create_backup(db_path):
     """Test backup creation."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path)
+    migrator = DatabaseMigrator(db_path)
     
-    try:
-        create_test_database(db_path)
-        migrator = DatabaseMigrator(db_path)
-        
-        result = migrator.create_backup()
-        
-        assert result is True
-        assert migrator.backup_path is not None
-        assert os.path.exists(migrator.backup_path)
-        assert migrator.backup_path.endswith(".bak")
-        
-        # Clean up backup
-        if migrator.backup_path and os.path.exists(migrator.backup_path):
-            os.unlink(migrator.backup_path)
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    result = migrator.create_backup()
+    
+    assert result is True
+    assert migrator.backup_path is not None
+    assert os.path.exists(migrator.backup_path)
+    assert migrator.backup_path.endswith(".bak")
 
 
-def test_get_existing_schema():
+def test_get_existing_schema(db_path):
     """Test schema retrieval."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path)
+    migrator = DatabaseMigrator(db_path)
     
-    try:
-        create_test_database(db_path)
-        migrator = DatabaseMigrator(db_path)
-        
-        conn = sqlite3.connect(db_path)
-        schema = migrator.get_existing_schema(conn)
-        conn.close()
-        
-        assert "config" in schema
-        assert "membres" in schema
-        assert "id" in schema["config"]
-        assert "exercice" in schema["config"]
-        assert "date" in schema["config"]
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    conn = sqlite3.connect(db_path)
+    schema = migrator.get_existing_schema(conn)
+    conn.close()
+    
+    assert "config" in schema
+    assert "membres" in schema
+    assert "id" in schema["config"]
+    assert "exercice" in schema["config"]
+    assert "date" in schema["config"]
 
 
-def test_detect_missing_columns():
+def test_detect_missing_columns(db_path):
     """Test detection of missing columns."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path, missing_columns=True)
+    migrator = DatabaseMigrator(db_path)
     
-    try:
-        create_test_database(db_path, missing_columns=True)
-        migrator = DatabaseMigrator(db_path)
-        
-        conn = sqlite3.connect(db_path)
-        existing_schema = migrator.get_existing_schema(conn)
-        conn.close()
-        
-        missing = migrator.detect_missing_columns(existing_schema)
-        
-        assert "config" in missing
-        assert "membres" in missing
-        
-        # Check that we detected the missing columns in config
-        config_missing_cols = [col[0] for col in missing["config"]]
-        assert "but_asso" in config_missing_cols
-        assert "cloture" in config_missing_cols
-        assert "solde_report" in config_missing_cols
-        assert "disponible_banque" in config_missing_cols
-        
-        # Check that we detected the missing columns in membres
-        membres_missing_cols = [col[0] for col in missing["membres"]]
-        assert "email" in membres_missing_cols
-        assert "classe" in membres_missing_cols
-        assert "cotisation" in membres_missing_cols
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    conn = sqlite3.connect(db_path)
+    existing_schema = migrator.get_existing_schema(conn)
+    conn.close()
+    
+    missing = migrator.detect_missing_columns(existing_schema)
+    
+    assert "config" in missing
+    assert "membres" in missing
+    
+    # Check that we detected the missing columns in config
+    config_missing_cols = [col[0] for col in missing["config"]]
+    assert "but_asso" in config_missing_cols
+    assert "cloture" in config_missing_cols
+    assert "solde_report" in config_missing_cols
+    assert "disponible_banque" in config_missing_cols
+    
+    # Check that we detected the missing columns in membres
+    membres_missing_cols = [col[0] for col in missing["membres"]]
+    assert "email" in membres_missing_cols
+    assert "classe" in membres_missing_cols
+    assert "cotisation" in membres_missing_cols
 
 
-def test_apply_migrations():
+def test_apply_migrations(db_path):
     """Test applying migrations."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path, missing_columns=True)
+    migrator = DatabaseMigrator(db_path)
     
-    try:
-        create_test_database(db_path, missing_columns=True)
-        migrator = DatabaseMigrator(db_path)
-        
-        conn = sqlite3.connect(db_path)
-        existing_schema = migrator.get_existing_schema(conn)
-        missing = migrator.detect_missing_columns(existing_schema)
-        
-        result = migrator.apply_migrations(conn, missing)
-        
-        assert result is True
-        
-        # Verify columns were added
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(config)")
-        config_cols = {row[1] for row in cursor.fetchall()}
-        
-        assert "but_asso" in config_cols
-        assert "cloture" in config_cols
-        assert "solde_report" in config_cols
-        assert "disponible_banque" in config_cols
-        
-        cursor.execute("PRAGMA table_info(membres)")
-        membres_cols = {row[1] for row in cursor.fetchall()}
-        
-        assert "email" in membres_cols
-        assert "classe" in membres_cols
-        assert "cotisation" in membres_cols
-        
-        conn.close()
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    conn = sqlite3.connect(db_path)
+    existing_schema = migrator.get_existing_schema(conn)
+    missing = migrator.detect_missing_columns(existing_schema)
+    
+    result = migrator.apply_migrations(conn, missing)
+    
+    assert result is True
+    
+    # Verify columns were added
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(config)")
+    config_cols = {row[1] for row in cursor.fetchall()}
+    
+    assert "but_asso" in config_cols
+    assert "cloture" in config_cols
+    assert "solde_report" in config_cols
+    assert "disponible_banque" in config_cols
+    
+    cursor.execute("PRAGMA table_info(membres)")
+    membres_cols = {row[1] for row in cursor.fetchall()}
+    
+    assert "email" in membres_cols
+    assert "classe" in membres_cols
+    assert "cotisation" in membres_cols
+    
+    conn.close()
 
 
-def test_migration_with_data_preservation():
+def test_migration_with_data_preservation(db_path):
     """Test that migration preserves existing data."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path, missing_columns=True)
     
-    try:
-        create_test_database(db_path, missing_columns=True)
-        
-        # Insert some test data
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO config (exercice, date) VALUES (?, ?)", ("2024-2025", "2024-09-01"))
-        cursor.execute("INSERT INTO membres (name, prenom) VALUES (?, ?)", ("Dupont", "Jean"))
-        cursor.execute("INSERT INTO membres (name, prenom) VALUES (?, ?)", ("Martin", "Marie"))
-        conn.commit()
-        conn.close()
-        
-        # Run migration
-        migrator = DatabaseMigrator(db_path)
-        migrator.create_backup()
-        
-        conn = sqlite3.connect(db_path)
-        existing_schema = migrator.get_existing_schema(conn)
-        missing = migrator.detect_missing_columns(existing_schema)
-        migrator.apply_migrations(conn, missing)
-        
-        # Verify data is still there
-        cursor = conn.cursor()
-        cursor.execute("SELECT exercice, date, but_asso FROM config")
-        row = cursor.fetchone()
-        assert row[0] == "2024-2025"
-        assert row[1] == "2024-09-01"
-        # New column should have default value
-        assert row[2] == ""
-        
-        cursor.execute("SELECT name, prenom, email FROM membres")
-        rows = cursor.fetchall()
-        assert len(rows) == 2
-        assert rows[0][0] == "Dupont"
-        assert rows[0][1] == "Jean"
-        assert rows[0][2] == ""  # Default value for new column
-        
-        conn.close()
-        
-        # Clean up backup
-        if migrator.backup_path and os.path.exists(migrator.backup_path):
-            os.unlink(migrator.backup_path)
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    # Insert some test data
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO config (exercice, date) VALUES (?, ?)", ("2024-2025", "2024-09-01"))
+    cursor.execute("INSERT INTO membres (name, prenom) VALUES (?, ?)", ("Dupont", "Jean"))
+    cursor.execute("INSERT INTO membres (name, prenom) VALUES (?, ?)", ("Martin", "Marie"))
+    conn.commit()
+    conn.close()
+    
+    # Run migration
+    migrator = DatabaseMigrator(db_path)
+    migrator.create_backup()
+    
+    conn = sqlite3.connect(db_path)
+    existing_schema = migrator.get_existing_schema(conn)
+    missing = migrator.detect_missing_columns(existing_schema)
+    migrator.apply_migrations(conn, missing)
+    
+    # Verify data is still there
+    cursor = conn.cursor()
+    cursor.execute("SELECT exercice, date, but_asso FROM config")
+    row = cursor.fetchone()
+    assert row[0] == "2024-2025"
+    assert row[1] == "2024-09-01"
+    # New column should have default value
+    assert row[2] == ""
+    
+    cursor.execute("SELECT name, prenom, email FROM membres")
+    rows = cursor.fetchall()
+    assert len(rows) == 2
+    assert rows[0][0] == "Dupont"
+    assert rows[0][1] == "Jean"
+    assert rows[0][2] == ""  # Default value for new column
+    
+    conn.close()
 
 
-def test_no_migration_needed():
+def test_no_migration_needed(db_path):
     """Test when no migration is needed."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path, missing_columns=False)
+    migrator = DatabaseMigrator(db_path)
     
-    try:
-        create_test_database(db_path, missing_columns=False)
-        migrator = DatabaseMigrator(db_path)
-        
-        conn = sqlite3.connect(db_path)
-        existing_schema = migrator.get_existing_schema(conn)
-        missing = migrator.detect_missing_columns(existing_schema)
-        
-        # Should find no missing columns for these two tables
-        if "config" in missing:
-            assert len(missing["config"]) == 0
-        if "membres" in missing:
-            assert len(missing["membres"]) == 0
-        
-        conn.close()
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    conn = sqlite3.connect(db_path)
+    existing_schema = migrator.get_existing_schema(conn)
+    missing = migrator.detect_missing_columns(existing_schema)
+    
+    # Should find no missing columns for these two tables
+    if "config" in missing:
+        assert len(missing["config"]) == 0
+    if "membres" in missing:
+        assert len(missing["membres"]) == 0
+    
+    conn.close()
 
 
-def test_generate_report():
+def test_generate_report(db_path, tmp_path):
     """Test report generation."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path, missing_columns=True)
+    migrator = DatabaseMigrator(db_path)
     
-    try:
-        create_test_database(db_path, missing_columns=True)
-        migrator = DatabaseMigrator(db_path)
-        
-        conn = sqlite3.connect(db_path)
-        existing_schema = migrator.get_existing_schema(conn)
-        missing = migrator.detect_missing_columns(existing_schema)
-        conn.close()
-        
-        with tempfile.NamedTemporaryFile(suffix=".md", delete=False) as report_tmp:
-            report_path = report_tmp.name
-        
-        migrator.generate_report(report_path, missing, True)
-        
-        assert os.path.exists(report_path)
-        
-        with open(report_path, 'r') as f:
-            content = f.read()
-        
-        assert "# Database Migration Report" in content
-        assert "SUCCESS" in content
-        assert "config" in content
-        assert "membres" in content
-        
-        os.unlink(report_path)
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    conn = sqlite3.connect(db_path)
+    existing_schema = migrator.get_existing_schema(conn)
+    missing = migrator.detect_missing_columns(existing_schema)
+    conn.close()
+    
+    report_path = str(tmp_path / "report.md")
+    migrator.generate_report(report_path, missing, True)
+    
+    assert os.path.exists(report_path)
+    
+    with open(report_path, 'r') as f:
+        content = f.read()
+    
+    assert "# Database Migration Report" in content
+    assert "SUCCESS" in content
+    assert "config" in content
+    assert "membres" in content
 
 
-def test_report_path_in_reports_directory():
+def test_report_path_in_reports_directory(db_path, reports_dir):
     """Test that report is created in the reports directory."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
+    create_test_database(db_path, missing_columns=True)
+    migrator = DatabaseMigrator(db_path, reports_dir=reports_dir)
     
-    try:
-        create_test_database(db_path, missing_columns=True)
-        migrator = DatabaseMigrator(db_path)
-        
-        # Run the migration
-        success = migrator.run_migration()
-        
-        assert success is True
-        assert migrator.report_path is not None
-        
-        # Verify the report is in the reports directory
-        assert "reports" in migrator.report_path
-        assert "migration_report_success_" in migrator.report_path
-        assert os.path.exists(migrator.report_path)
-        
-        # Clean up
-        if os.path.exists(migrator.report_path):
-            os.unlink(migrator.report_path)
-        if migrator.backup_path and os.path.exists(migrator.backup_path):
-            os.unlink(migrator.backup_path)
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+    # Run the migration
+    success = migrator.run_migration()
+    
+    assert success is True
+    assert migrator.report_path is not None
+    
+    # Verify the report is in the reports directory
+    assert Path(migrator.report_path).parent == reports_dir
+    assert "migration_report_success_" in migrator.report_path
+    assert os.path.exists(migrator.report_path)
+    assert get_latest_migration_report(reports_dir) == migrator.report_path
 
 
-def test_failed_migration_report():
+def test_failed_migration_report(db_path, reports_dir):
     """Test that a failed migration generates an error report."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
-    
     # Constants for file permissions
     READ_ONLY_PERMISSIONS = 0o444
     READ_WRITE_PERMISSIONS = 0o644
     
+    create_test_database(db_path, missing_columns=True)
+    
+    # Make the database read-only to force a migration failure
+    os.chmod(db_path, READ_ONLY_PERMISSIONS)
     try:
-        create_test_database(db_path, missing_columns=True)
-        
-        # Make the database read-only to force a migration failure
-        os.chmod(db_path, READ_ONLY_PERMISSIONS)
-        
-        migrator = DatabaseMigrator(db_path)
+        migrator = DatabaseMigrator(db_path, reports_dir=reports_dir)
         success = migrator.run_migration()
-        
+    finally:
         # Restore write permissions for cleanup
         os.chmod(db_path, READ_WRITE_PERMISSIONS)
-        
-        # Migration should fail
-        assert success is False
-        assert len(migrator.errors) > 0
-        assert migrator.report_path is not None
-        
-        # Verify the report is marked as failed
-        assert "migration_report_failed_" in migrator.report_path
-        
-        # Verify report content contains error information
-        if os.path.exists(migrator.report_path):
-            with open(migrator.report_path, 'r') as f:
-                content = f.read()
-            
-            assert "FAILED" in content
-            assert "## Errors" in content
-            assert "## Recommended Actions" in content
-            
-            # Clean up report
-            os.unlink(migrator.report_path)
-        
-        if migrator.backup_path and os.path.exists(migrator.backup_path):
-            os.unlink(migrator.backup_path)
-    finally:
-        if os.path.exists(db_path):
-            try:
-                os.chmod(db_path, READ_WRITE_PERMISSIONS)
-                os.unlink(db_path)
-            except Exception:
-                pass
-
-
-def test_report_contains_all_required_sections():
-    """Test that generated reports contain all required sections."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_path = tmp.name
     
-    try:
-        create_test_database(db_path, missing_columns=True)
-        migrator = DatabaseMigrator(db_path)
-        
-        success = migrator.run_migration()
-        
-        assert migrator.report_path is not None
-        assert os.path.exists(migrator.report_path)
-        
+    # Migration should fail
+    assert success is False
+    assert len(migrator.errors) > 0
+    assert migrator.report_path is not None
+    
+    # Verify the report is marked as failed
+    assert "migration_report_failed_" in migrator.report_path
+    
+    # Verify report content contains error information
+    if os.path.exists(migrator.report_path):
         with open(migrator.report_path, 'r') as f:
             content = f.read()
         
-        # Check required sections
-        assert "# Database Migration Report" in content
-        assert "**Date:**" in content
-        assert "**Database:**" in content
-        assert "**Status:**" in content
-        assert "## Summary" in content
-        assert "## Changes Applied" in content
-        assert "## Migration Log" in content
-        
-        # Clean up
-        os.unlink(migrator.report_path)
-        if migrator.backup_path and os.path.exists(migrator.backup_path):
-            os.unlink(migrator.backup_path)
-    finally:
-        if os.path.exists(db_path):
-            os.unlink(db_path)
+        assert "FAILED" in content
+        assert "## Errors" in content
+        assert "## Recommended Actions" in content
 
 
-if __name__ == "__main__":
-    # Run tests
-    test_database_migrator_initialization()
-    print("✓ test_database_migrator_initialization")
-    
-    test_create_backup()
-    print("✓ test_create_backup")
-    
-    test_get_existing_schema()
-    print("✓ test_get_existing_schema")
-    
-    test_detect_missing_columns()
-    print("✓ test_detect_missing_columns")
-    
-    test_apply_migrations()
-    print("✓ test_apply_migrations")
-    
-    test_migration_with_data_preservation()
-    print("✓ test_migration_with_data_preservation")
-    
-    test_no_migration_needed()
-    print("✓ test_no_migration_needed")
-    
-    test_generate_report()
-    print("✓ test_generate_report")
+def test_report_contains_all_required_sections(db_path, reports_dir):
+    """Test that generated reports contain all required sections."""
+    create_test_database(db_path, missing_columns=True)
+    migrator = DatabaseMigrator(db_path, reports_dir=reports_dir)
     
-    test_report_path_in_reports_directory()
-    print("✓ test_report_path_in_reports_directory")
+    migrator.run_migration()
     
-    test_failed_migration_report()
-    print("✓ test_failed_migration_report")
+    assert migrator.report_path is not None
+    assert os.path.exists(migrator.report_path)
     
-    test_report_contains_all_required_sections()
-    print("✓ test_report_contains_all_required_sections")
+    with open(migrator.report_path, 'r') as f:
+        content = f.read()
     
-    print("\nAll tests passed!")
+    # Check required sections
+    assert "# Database Migration Report" in content
+    assert "**Date:**" in content
+    assert "**Database:**" in content
+    assert "**Status:**" in content
+    assert "## Summary" in content
+    assert "## Changes Applied" in content
+    assert "## Migration Log" in content
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -15,10 +15,18 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from modules.db_api import execute, get_connection, query_one, query_all
+from modules.db_api import execute, executemany_query, get_connection, query_one, query_all, _query_pool
 from db.db import set_db_file
 
 
+@pytest.fixture(autouse=True)
+def reset_query_pool():
+    """Start every test without pooled connections (and close them afterwards)."""
+    _query_pool.close_all()
+    yield
+    _query_pool.close_all()
+
+
 @pytest.fixture
 def temp_db():
     """Create a temporary database for testing."""
@@ -161,6 +169,23 @@ class TestDBApiRetry:
         # Should have taken at least the retry delays (0.1 + 0.2 = 0.3s)
         assert elapsed >= 0.3
     
+    @patch('modules.db_api.get_connection')
+    def test_execute_retries_on_same_connection(self, mock_get_connection):
+        """Test that lock retries reuse the pooled connection instead of reopening."""
+        conn = MagicMock()
+        cursor = MagicMock()
+        cursor.execute.side_effect = [sqlite3.OperationalError("database is locked"), None]
+        cursor.rowcount = 1
+        conn.cursor.return_value = cursor
+        mock_get_connection.return_value = conn
+        
+        rows = execute("UPDATE test_table SET value = ?", (1,), retries=2, retry_delay=0.01)
+        
+        assert rows == 1
+        assert cursor.execute.call_count == 2
+        assert mock_get_connection.call_count == 1
+        conn.close.assert_not_called()
+    
     @patch('modules.db_api.get_connection')
     def test_execute_fails_after_max_retries(self, mock_get_connection):
         """Test that execute fails after exhausting all retries."""
@@ -208,6 +233,26 @@ class TestDBApiRetry:
         # Should have only tried once (no retries for non-lock errors)
         assert attempt_count[0] == 1
     
+    def test_executemany_query_consumes_generator(self, temp_db):
+        """Test executemany_query with a generator of parameters, in one transaction."""
+        rows = executemany_query(
+            "INSERT INTO test_table (name, value) VALUES (?, ?)",
+            ((f"bulk{i}", i) for i in range(5))
+        )
+        
+        assert rows == 5
+        assert query_one("SELECT COUNT(*) AS n FROM test_table WHERE name LIKE 'bulk%'")["n"] == 5
+    
+    def test_executemany_query_rolls_back_on_error(self, temp_db):
+        """Test that a failing row rolls back the whole batch."""
+        with pytest.raises(sqlite3.IntegrityError):
+            executemany_query(
+                "INSERT INTO test_table (id, name, value) VALUES (?, ?, ?)",
+                [(10, "a", 1), (10, "dup", 2)]
+            )
+        
+        assert query_one("SELECT COUNT(*) AS n FROM test_table WHERE id = 10")["n"] == 0
+    
     def test_query_one_returns_dict(self, temp_db):
         """Test that query_one returns a dictionary."""
         result = query_one("SELECT * FROM test_table WHERE name = ?", ('test1',))
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the ConnectionPool in modules.db_api.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.db_api import ConnectionPool
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Temporary database targeted through APP_DB_PATH."""
+    path = tmp_path / "pool.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)")
+    conn.commit()
+    conn.close()
+    monkeypatch.setenv("APP_DB_PATH", str(path))
+    return path
+
+
+@pytest.fixture
+def app_db_file(tmp_path, monkeypatch):
+    """Point db.db.set_db_file() at a temporary file, restoring the previous one after."""
+    from db.db import set_db_file, get_db_file
+    from modules import db_api
+
+    previous = get_db_file()
+    path = tmp_path / "helpers.db"
+    monkeypatch.setenv("APP_DB_PATH", str(path))
+    set_db_file(path)
+    db_api._query_pool.close_all()
+    try:
+        yield path
+    finally:
+        db_api._query_pool.close_all()
+        set_db_file(previous)
+
+
+@pytest.fixture
+def pool():
+    p = ConnectionPool(lambda: sqlite3.connect(os.environ["APP_DB_PATH"]))
+    yield p
+    p.close_all()
+
+
+class TestConnectionPool:
+    """Connection reuse and release semantics."""
+
+    def test_same_connection_reused(self, db_path, pool):
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        pool.release(second)
+        assert first is second
+
+    def test_outer_release_rolls_back_open_transaction(self, db_path, pool):
+        conn = pool.acquire()
+        conn.execute("INSERT INTO t (v) VALUES (1)")
+        inner = pool.acquire()
+        pool.release(inner)
+        # Nested release keeps the outer transaction alive
+        assert conn.in_transaction
+        pool.release(conn)
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    def test_closed_connection_is_replaced(self, db_path, pool):
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.close()
+        with pool.pooled() as fresh:
+            assert fresh is not conn
+            assert fresh.execute("SELECT 1").fetchone()[0] == 1
+
+    def test_replaced_database_file_gets_new_connection(self, db_path, pool):
+        with pool.pooled() as conn:
+            pass
+        os.remove(db_path)
+        sqlite3.connect(str(db_path)).close()
+        with pool.pooled() as fresh:
+            assert fresh is not conn
+
+    def test_each_thread_gets_its_own_connection(self, db_path, pool):
+        with pool.pooled() as main_conn:
+            seen = []
+            worker = threading.Thread(target=lambda: seen.append(pool.acquire()))
+            worker.start()
+            worker.join()
+        assert seen and seen[0] is not main_conn
+
+
+class TestQueryHelpersPooling:
+    """db_api query helpers share one pooled connection."""
+
+    def test_query_helpers_open_one_connection(self, app_db_file):
+        from unittest.mock import patch
+        from modules import db_api
+
+        with patch("modules.db_api.get_connection", wraps=db_api.get_connection) as opener:
+            db_api.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER)")
+            db_api.execute("INSERT INTO t (v) VALUES (?)", (1,))
+            db_api.execute_query("INSERT INTO t (v) VALUES (?)", (2,))
+            assert db_api.query_one("SELECT COUNT(*) AS n FROM t")["n"] == 2
+            assert len(db_api.query_all("SELECT v FROM t")) == 2
+        assert opener.call_count == 1
+
+    def test_query_helpers_return_dates_as_stored(self, app_db_file):
+        from modules import db_api
+
+        db_api.execute("CREATE TABLE d (id INTEGER PRIMARY KEY, day DATE)")
+        db_api.execute("INSERT INTO d (day) VALUES (?)", ("2025-01-02",))
+        assert db_api.query_one("SELECT day FROM d")["day"] == "2025-01-02"
+
+
+class TestReadOnlyPool:
+    """query_only reader connections and read_connection() routing."""
+
+    def test_readonly_pool_rejects_writes_and_counts(self, db_path):
+        readers = ConnectionPool(lambda: sqlite3.connect(os.environ["APP_DB_PATH"]), readonly=True)
+        try:
+            with readers.pooled() as conn:
+                assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+                with pytest.raises(sqlite3.OperationalError):
+                    conn.execute("INSERT INTO t (v) VALUES (1)")
+            with readers.pooled():
+                pass
+            stats = readers.stats()
+            assert stats["total_acquisitions"] == 2
+            assert stats["connections_opened"] == 1
+        finally:
+            readers.close_all()
+
+    def test_read_connection_sees_own_open_transaction(self, db_path):
+        from modules.db_api import pool, read_pool, read_connection
+
+        with read_connection() as conn:
+            assert conn is read_pool.current()
+        with pool.transaction() as writer:
+            writer.execute("INSERT INTO t (v) VALUES (1)")
+            with read_connection() as conn:
+                assert conn is writer
+                assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+
+class TestMaintenance:
+    """Background WAL checkpoint / optimize."""
+
+    def test_run_maintenance_truncates_wal(self, db_path):
+        from modules.db_api import run_maintenance
+
+        conn = sqlite3.connect(str(db_path))
+        assert run_maintenance(conn) is False  # rollback journal: skipped
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("INSERT INTO t (v) VALUES (1)")
+        conn.commit()
+        assert os.path.getsize(str(db_path) + "-wal") > 0
+        assert run_maintenance(conn) is True
+        assert os.path.getsize(str(db_path) + "-wal") == 0
+        conn.close()
+
+    def test_run_maintenance_falls_back_to_passive_when_busy(self, db_path):
+        import time
+        from modules.db_api import run_maintenance
+
+        conn = sqlite3.connect(str(db_path), isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=15000")
+        reader = sqlite3.connect(str(db_path), isolation_level=None)
+        reader.execute("BEGIN")
+        reader.execute("SELECT COUNT(*) FROM t").fetchone()  # pins the WAL
+        conn.execute("INSERT INTO t (v) VALUES (1)")
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        start = time.monotonic()
+        assert run_maintenance(conn) is True
+        assert time.monotonic() - start < 5
+        assert "PRAGMA wal_checkpoint(PASSIVE);" in statements
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 15000
+        reader.rollback()
+        reader.close()
+        conn.close()
+
+    def test_start_maintenance_only_once(self, monkeypatch):
+        from modules import db_api
+
+        started = []
+        monkeypatch.setattr(db_api, "_maintenance_started", False)
+        monkeypatch.setattr(db_api.threading, "Thread", lambda **kw: type(
+            "T", (), {"start": lambda self: started.append(kw["name"])})())
+        assert db_api.start_maintenance(3600) is True
+        assert db_api.start_maintenance(3600) is False
+        assert started == ["db-maintenance"]
+
+
+class TestTuningPragmas:
+    """Connections opened by db_api carry the tuning PRAGMAs."""
+
+    def test_default_pool_connection_is_tuned(self, db_path):
+        p = ConnectionPool()
+        try:
+            with p.pooled() as conn:
+                assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+                assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+                assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        finally:
+            p.close_all()
+
+    def test_get_connection_switches_wal_once_per_file(self, tmp_path):
+        from db.db import set_db_file
+        from modules import db_api
+
+        path = tmp_path / "wal.db"
+        set_db_file(path)
+        first = db_api.get_connection()
+        statements = []
+        with pytest.MonkeyPatch.context() as mp:
+            real_connect = sqlite3.connect
+
+            def traced_connect(*args, **kwargs):
+                conn = real_connect(*args, **kwargs)
+                conn.set_trace_callback(statements.append)
+                return conn
+
+            mp.setattr(db_api.sqlite3, "connect", traced_connect)
+            second = db_api.get_connection()
+        try:
+            assert second.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert second.execute("PRAGMA busy_timeout").fetchone()[0] == db_api.BUSY_TIMEOUT_MS
+            assert not any("journal_mode=WAL" in sql for sql in statements)
+        finally:
+            first.close()
+            second.close()
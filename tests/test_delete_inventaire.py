@@ -74,3 +74,193 @@ def test_delete_inventaire_with_children(tmp_path):
             os.environ.pop("APP_DB_PATH", None)
         else:
             os.environ["APP_DB_PATH"] = original_db_path
+
+
+def test_delete_inventaire_picks_up_new_child_table(tmp_path, monkeypatch):
+    """The cached DELETE plan is rebuilt when a new FK table appears."""
+    dbfile = tmp_path / "test_inv_plan.db"
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        conn.executescript("""
+            CREATE TABLE buvette_inventaires (id INTEGER PRIMARY KEY AUTOINCREMENT, commentaire TEXT);
+            CREATE TABLE buvette_inventaire_lignes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inventaire_id INTEGER REFERENCES buvette_inventaires(id),
+                article_id INTEGER,
+                quantite INTEGER
+            );
+            INSERT INTO buvette_inventaires (id) VALUES (1), (2);
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+    monkeypatch.setenv("APP_DB_PATH", str(dbfile))
+    delete_inventaire(1)
+
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        conn.executescript("""
+            CREATE TABLE inventaire_notes (
+                id INTEGER PRIMARY KEY,
+                inv_id INTEGER REFERENCES buvette_inventaires(id)
+            );
+            INSERT INTO inventaire_notes (inv_id) VALUES (2);
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+    delete_inventaire(2)
+
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM buvette_inventaires").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM inventaire_notes").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_delete_inventaire_commits_once(tmp_path, monkeypatch):
+    """Revert, deletes and per-article stock recomputes share a single commit."""
+    from modules.db_api import pool
+    from modules.stock_db import ensure_stock_tables
+
+    dbfile = tmp_path / "test_inv_commit.db"
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        conn.executescript("""
+            CREATE TABLE buvette_articles (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER);
+            CREATE TABLE buvette_mouvements (
+                id INTEGER PRIMARY KEY, date_mouvement TEXT, article_id INTEGER,
+                type_mouvement TEXT, quantite INTEGER
+            );
+            CREATE TABLE buvette_inventaires (id INTEGER PRIMARY KEY AUTOINCREMENT, commentaire TEXT);
+            CREATE TABLE buvette_inventaire_lignes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inventaire_id INTEGER REFERENCES buvette_inventaires(id),
+                article_id INTEGER,
+                quantite INTEGER
+            );
+            INSERT INTO buvette_articles VALUES (1, 'A', 4), (2, 'B', 9);
+            INSERT INTO buvette_mouvements VALUES (1, '2025-01-01', 1, 'entrée', 3);
+            INSERT INTO buvette_inventaires (id) VALUES (1);
+            INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite)
+                VALUES (1, 1, 4), (1, 2, 9);
+        """)
+        ensure_stock_tables(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    monkeypatch.setenv("APP_DB_PATH", str(dbfile))
+    statements = []
+    pooled = pool.acquire()
+    try:
+        pooled.set_trace_callback(statements.append)
+        delete_inventaire(1)
+    finally:
+        pooled.set_trace_callback(None)
+        pool.release(pooled)
+
+    assert [s for s in statements if s.strip().upper() == "COMMIT"] == ["COMMIT"]
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        assert conn.execute("SELECT id, stock FROM buvette_articles ORDER BY id").fetchall() == [(1, 3), (2, 0)]
+        assert conn.execute("SELECT COUNT(*) FROM buvette_inventaire_lignes").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_delete_inventaire_undoes_partial_revert(tmp_path, monkeypatch):
+    """A revert failing halfway is rolled back to its savepoint; the deletion still commits."""
+    import modules.buvette_inventaire_db as inventaire_db
+
+    dbfile = tmp_path / "test_inv_partial.db"
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        conn.executescript("""
+            CREATE TABLE buvette_articles (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER);
+            CREATE TABLE buvette_inventaires (id INTEGER PRIMARY KEY AUTOINCREMENT, commentaire TEXT);
+            CREATE TABLE buvette_inventaire_lignes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inventaire_id INTEGER REFERENCES buvette_inventaires(id),
+                article_id INTEGER,
+                quantite INTEGER
+            );
+            INSERT INTO buvette_articles VALUES (1, 'A', 4);
+            INSERT INTO buvette_inventaires (id) VALUES (1);
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+    def failing_revert(conn, inv_id):
+        conn.execute("UPDATE buvette_articles SET stock = 999")
+        raise RuntimeError("journal unavailable")
+
+    monkeypatch.setenv("APP_DB_PATH", str(dbfile))
+    monkeypatch.setattr(inventaire_db, "revert_inventory_effect", failing_revert)
+    delete_inventaire(1)
+
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        assert conn.execute("SELECT stock FROM buvette_articles").fetchone()[0] == 4
+        assert conn.execute("SELECT COUNT(*) FROM buvette_inventaires").fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_delete_inventaire_and_snapshot_take_locks_in_same_order(tmp_path, monkeypatch):
+    """delete_inventaire waits for the stock write lock before BEGIN IMMEDIATE."""
+    import threading
+    from modules import stock_db
+
+    dbfile = tmp_path / "test_inv_locks.db"
+    conn = sqlite3.connect(str(dbfile))
+    try:
+        conn.executescript("""
+            CREATE TABLE buvette_articles (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER);
+            CREATE TABLE buvette_inventaires (id INTEGER PRIMARY KEY AUTOINCREMENT, commentaire TEXT);
+            CREATE TABLE buvette_inventaire_lignes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                inventaire_id INTEGER REFERENCES buvette_inventaires(id),
+                article_id INTEGER,
+                quantite INTEGER
+            );
+            INSERT INTO buvette_articles VALUES (1, 'A', 0), (2, 'B', 0);
+            INSERT INTO buvette_inventaires (id) VALUES (1), (2);
+            INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite)
+                VALUES (1, 1, 3), (2, 2, 6);
+        """)
+        stock_db.ensure_stock_tables(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    monkeypatch.setenv("APP_DB_PATH", str(dbfile))
+
+    errors = []
+
+    def deleter():
+        try:
+            delete_inventaire(1)
+        except Exception as e:
+            errors.append(e)
+
+    # This thread plays a stock writer already holding the lock when the
+    # deletion starts; it then needs the SQLite write lock for its snapshot
+    writer = sqlite3.connect(str(dbfile), isolation_level=None, timeout=1)
+    try:
+        with stock_db.write_lock():
+            thread = threading.Thread(target=deleter)
+            thread.start()
+            thread.join(0.3)
+            assert thread.is_alive(), "delete_inventaire should wait for the stock write lock"
+            stock_db.apply_inventory_snapshot(writer, 2)
+        thread.join(5)
+        assert not thread.is_alive()
+        assert errors == []
+        assert writer.execute("SELECT stock FROM buvette_articles WHERE id=2").fetchone()[0] == 6
+        assert writer.execute("SELECT COUNT(*) FROM buvette_inventaires").fetchone()[0] == 1
+    finally:
+        writer.close()
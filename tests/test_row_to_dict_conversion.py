@@ -9,7 +9,7 @@ import unittest
 import sqlite3
 import tempfile
 import os
-from utils.db_helpers import row_to_dict, rows_to_dicts, row_get_safe
+from utils.db_helpers import row_to_dict, rows_to_dicts, row_get_safe, fetch_dicts, iter_dicts
 
 
 class TestRowToDictConversion(unittest.TestCase):
@@ -100,7 +100,48 @@ class TestRowToDictConversion(unittest.TestCase):
         self.assertTrue(all(isinstance(d, dict) for d in dicts))
         self.assertEqual(dicts[0]['id'], 1)
         self.assertEqual(dicts[1]['id'], 2)
-    
+        self.assertEqual(dicts[1]['name'], 'test2')
+
+    def test_rows_to_dicts_edge_inputs(self):
+        """Test rows_to_dicts with empty input, dicts and a cursor iterator."""
+        self.assertEqual(rows_to_dicts([]), [])
+
+        already = [{'id': 1, 'name': 'test1'}]
+        converted = rows_to_dicts(already)
+        self.assertEqual(converted, already)
+        self.assertIsNot(converted[0], already[0])
+
+        cursor = self.conn.execute("SELECT id, name FROM test_table ORDER BY id")
+        self.assertEqual(rows_to_dicts(cursor)[0], {'id': 1, 'name': 'test1'})
+
+    def test_fetch_dicts_matches_rows_to_dicts(self):
+        """Test that fetch_dicts returns the same dicts without sqlite3.Row rows."""
+        sql = "SELECT * FROM test_table WHERE id >= ? ORDER BY id"
+        expected = rows_to_dicts(self.conn.execute(sql, (1,)).fetchall())
+
+        self.assertEqual(fetch_dicts(self.conn, sql, (1,)), expected)
+        # The connection's row factory is left untouched
+        self.assertIs(self.conn.row_factory, sqlite3.Row)
+
+    def test_converter_handles_any_column_name(self):
+        """Test that converters accept any column name and are reused."""
+        from utils.db_helpers import _make_converter
+
+        row = self.conn.execute('SELECT 1 AS "it\'s", 2 AS "a""b", 3 AS id').fetchone()
+        self.assertEqual(rows_to_dicts([row]), [{"it's": 1, 'a"b': 2, 'id': 3}])
+        self.assertIs(_make_converter(("id",)), _make_converter(("id",)))
+
+    def test_duplicate_column_keeps_first_value(self):
+        """Test that a repeated column name keeps the first value, like dict(row)."""
+        sql = "SELECT 1 AS id, 2 AS name, 3 AS id"
+        row = self.conn.execute(sql).fetchone()
+        expected = {'id': 1, 'name': 2}
+
+        self.assertEqual(dict(row), expected)
+        self.assertEqual(rows_to_dicts([row]), [expected])
+        self.assertEqual(fetch_dicts(self.conn, sql), [expected])
+        self.assertEqual(list(iter_dicts(self.conn.execute(sql))), [expected])
+
     def test_conversion_pattern_consistency(self):
         """Test that the conversion pattern works consistently."""
         row = self.conn.execute("SELECT * FROM test_table WHERE id=1").fetchone()
@@ -188,12 +188,10 @@ class TestStockBuvetteTab(unittest.TestCase):
         coca = next((a for a in stock_list if a['name'] == 'Coca Cola'), None)
         initial_stock = coca['stock']
 
-        # Update stock
+        # Update stock through stock_db, which invalidates the cached listing
+        from modules.stock_db import set_stock
         conn = get_test_connection(self.test_db)
-        conn.execute(
-            "UPDATE buvette_articles SET stock=? WHERE name=?",
-            (initial_stock + 5, 'Coca Cola')
-        )
+        set_stock(conn, coca['id'], initial_stock + 5)
         conn.commit()
         conn.close()
 
@@ -205,6 +203,105 @@ class TestStockBuvetteTab(unittest.TestCase):
         self.assertEqual(updated_coca['stock'], initial_stock + 5,
                         "Stock list should reflect updated stock values")
 
+    def test_get_stock_listing_is_cached_until_invalidated(self):
+        """Repeated calls are served from the cache; fresh, writes and the TTL bypass it."""
+        from unittest import mock
+        import modules.stock_tab as stock_tab
+        from modules.buvette_db import update_article
+
+        first = stock_tab.get_stock_listing()
+        first[0]['stock'] = -1  # callers get copies, not the cached dicts
+
+        conn = get_test_connection(self.test_db)
+        conn.execute("UPDATE buvette_articles SET stock=99 WHERE name='Chips'")
+        conn.commit()
+        conn.close()
+
+        def chips(listing):
+            return next(a['stock'] for a in listing if a['name'] == 'Chips')
+
+        self.assertEqual(chips(stock_tab.get_stock_listing()), 25)
+        self.assertNotEqual(stock_tab.get_stock_listing()[0]['stock'], -1)
+        self.assertEqual(chips(stock_tab.get_stock_listing(fresh=True)), 99)
+
+        update_article(first[1]['id'], 'Aaa', None, None, None, None)
+        self.assertEqual(stock_tab.get_stock_listing()[0]['name'], 'Aaa')
+
+        with mock.patch.object(stock_tab, "LISTING_TTL_S", 0):
+            conn = get_test_connection(self.test_db)
+            conn.execute("UPDATE buvette_articles SET stock=7 WHERE name='Chips'")
+            conn.commit()
+            conn.close()
+            self.assertEqual(chips(stock_tab.get_stock_listing()), 7)
+
+    def test_listing_select_is_built_once_per_schema(self):
+        """The SELECT string is reused until clear_schema_cache()."""
+        from unittest import mock
+        import modules.stock_tab as stock_tab
+
+        stock_tab.clear_schema_cache()
+        with mock.patch.object(stock_tab, "_build_buvette_select",
+                               wraps=stock_tab._build_buvette_select) as build:
+            stock_tab.get_stock_listing(fresh=True)
+            stock_tab.get_stock_listing(fresh=True)
+            self.assertEqual(build.call_count, 1)
+
+            stock_tab.clear_schema_cache()
+            self.assertEqual(len(stock_tab.get_stock_listing()), 4)
+            self.assertEqual(build.call_count, 2)
+
+    def test_yield_stock_listing_streams_same_rows(self):
+        """yield_stock_listing matches get_stock_listing and streams without filling the cache."""
+        import modules.stock_tab as stock_tab
+
+        stock_tab.invalidate_stock_listing()
+        stream = stock_tab.yield_stock_listing(batch_size=1)
+        self.assertEqual(next(stream)['name'], stock_tab.get_stock_listing(fresh=True)[0]['name'])
+        stream.close()
+
+        stock_tab.invalidate_stock_listing()
+        self.assertEqual(list(stock_tab.yield_stock_listing(batch_size=3)), stock_tab.get_stock_listing())
+        self.assertEqual(list(stock_tab.yield_stock_listing(scope='invalid')), [])
+
+    def test_listing_is_read_in_name_order_without_sort(self):
+        """init_db and upgrade_db_structure index buvette_articles(name): ORDER BY name needs no sort."""
+        from unittest import mock
+        from db.db import init_db, upgrade_db_structure
+        from modules.dropdowns import _ARTICLES_SQL
+        import modules.stock_tab as stock_tab
+
+        fd, fresh_db = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ["APP_DB_PATH"] = fresh_db
+        try:
+            init_db()
+            with mock.patch.object(sys.modules["tkinter.messagebox"], "showinfo", create=True):
+                upgrade_db_structure()
+            conn = get_test_connection(fresh_db)
+            stock_tab.clear_schema_cache()
+            for sql in (stock_tab._build_buvette_select(conn), _ARTICLES_SQL):
+                plan = " ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+                self.assertIn("idx_buvette_articles_name", plan)
+                self.assertNotIn("TEMP B-TREE", plan)
+            conn.close()
+        finally:
+            os.environ["APP_DB_PATH"] = self.test_db
+            stock_tab.clear_schema_cache()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(fresh_db + suffix):
+                    os.remove(fresh_db + suffix)
+
+    def test_get_stock_listing_reuses_pooled_read_connection(self):
+        """Uncached listings borrow read_pool's connection instead of opening one each time."""
+        from modules.db_api import read_pool
+        from modules.stock_tab import get_stock_listing
+
+        get_stock_listing(fresh=True)
+        opened = read_pool.stats()["connections_opened"]
+        get_stock_listing(fresh=True)
+        get_stock_listing(fresh=True)
+        self.assertEqual(read_pool.stats()["connections_opened"], opened)
+
 
 if __name__ == '__main__':
     unittest.main()
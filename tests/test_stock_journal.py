@@ -121,9 +121,81 @@ class TestStockJournal(unittest.TestCase):
             "AND name='inventory_stock_journal'"
         )
         result = cursor.fetchone()
+        indexes = {r[1] for r in conn.execute("PRAGMA index_list(inventory_stock_journal)")}
+        plan = " ".join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN DELETE FROM inventory_stock_journal WHERE inventaire_id=1"
+        ))
         conn.close()
 
         self.assertIsNotNone(result, "inventory_stock_journal table should exist")
+        self.assertTrue({"idx_isj_inv_article_delta", "idx_isj_article"} <= indexes)
+        self.assertIn("idx_isj_inv_article_delta", plan)
+
+    def test_fifo_scan_uses_partial_index_without_sort(self):
+        """The FIFO batch query is answered by idx_apb_fifo, without a temp B-tree sort."""
+        from modules.stock_db import ensure_stock_tables, _SQL_FIFO_BATCHES
+
+        conn = get_test_connection(self.test_db)
+        ensure_stock_tables(conn)
+        plan = " ".join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN " + _SQL_FIFO_BATCHES, (1, "buvette")
+        ))
+        conn.close()
+
+        self.assertIn("idx_apb_fifo", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_ensure_stock_tables_configures_connection(self):
+        """ensure_stock_tables switches the file to WAL and tunes the connection."""
+        from modules.stock_db import ensure_stock_tables
+
+        conn = get_test_connection(self.test_db)
+        ensure_stock_tables(conn)
+
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+        self.assertGreater(conn.execute("PRAGMA busy_timeout").fetchone()[0], 0)
+        conn.close()
+
+        # WAL is persistent: a plain connection sees it too
+        conn = sqlite3.connect(self.test_db)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        conn.close()
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.test_db + suffix):
+                os.remove(self.test_db + suffix)
+
+    def test_configure_sets_page_size_on_new_file_and_mmap(self):
+        """A new file gets PAGE_SIZE pages; an existing one keeps its page size."""
+        from modules.stock_db import ensure_stock_tables, PAGE_SIZE
+
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = sqlite3.connect(os.path.join(tmp, "new.db"))
+            ensure_stock_tables(conn)
+            self.assertEqual(conn.execute("PRAGMA page_size").fetchone()[0], PAGE_SIZE)
+            self.assertGreater(conn.execute("PRAGMA mmap_size").fetchone()[0], 0)
+            conn.close()
+
+        conn = get_test_connection(self.test_db)
+        before = conn.execute("PRAGMA page_size").fetchone()[0]
+        ensure_stock_tables(conn)
+        self.assertEqual(conn.execute("PRAGMA page_size").fetchone()[0], before)
+        conn.close()
+
+    def test_ensure_stock_tables_uses_pooled_connection(self):
+        """Without a connection, ensure_stock_tables borrows and returns the pooled one."""
+        from modules.stock_db import ensure_stock_tables
+        from modules.db_api import pool
+
+        ensure_stock_tables()
+        conn = pool.acquire()
+        try:
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            self.assertIn("inventory_stock_journal", tables)
+            self.assertEqual(pool._slots()[self.test_db][2], 1)
+        finally:
+            pool.release(conn)
 
     def test_get_set_stock(self):
         """Test getting and setting stock for an article."""
@@ -149,6 +221,80 @@ class TestStockJournal(unittest.TestCase):
         
         conn.close()
 
+    def test_adjust_stock_clamps_in_sql(self):
+        """adjust_stock adds the delta in one UPDATE, NULL counts as 0, never below 0."""
+        from modules.stock_db import adjust_stock, get_stock
+
+        conn = get_test_connection(self.test_db)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', NULL), (2, 'B', 3)")
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        adjust_stock(conn, 1, 4, reason="achat")
+        adjust_stock(conn, 2, -5, reason="casse")
+
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(get_stock(conn, 1), 4)
+        self.assertEqual(get_stock(conn, 2), 0)
+        conn.close()
+
+    def test_stock_writers_are_serialized(self):
+        """A writer waits for _write_lock; the lock is reentrant on the same thread."""
+        import threading
+        import modules.stock_db as stock_db
+
+        conn = get_test_connection(self.test_db)
+        stock_db.ensure_stock_tables(conn)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', 2)")
+        conn.execute(
+            "INSERT INTO buvette_inventaires (id, date_inventaire, type_inventaire) "
+            "VALUES (1, '2024-01-01', 'hors_evenement')"
+        )
+        conn.execute("INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite) VALUES (1, 1, 5)")
+        conn.commit()
+        conn.close()
+
+        def writer():
+            other = sqlite3.connect(self.test_db, isolation_level=None)
+            stock_db.apply_inventory_snapshot(other, 1)
+            other.close()
+
+        with stock_db._write_lock:
+            thread = threading.Thread(target=writer)
+            thread.start()
+            thread.join(0.2)
+            self.assertTrue(thread.is_alive(), "writer should wait for the lock")
+            # Reentrant: the holder can still write
+            conn = get_test_connection(self.test_db)
+            stock_db.revert_inventory_effect(conn, 1)
+            conn.commit()
+            conn.close()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        conn = get_test_connection(self.test_db)
+        self.assertEqual(stock_db.get_stock(conn, 1), 5)
+        conn.close()
+
+    def test_insert_achat_adjusts_stock(self):
+        """buvette_db purchase writes adjust the article stock."""
+        from modules.buvette_db import insert_achat, delete_achat, get_article_stock
+
+        conn = get_test_connection(self.test_db)
+        conn.executescript("""
+            CREATE TABLE buvette_achats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, article_id INTEGER, date_achat TEXT,
+                quantite INTEGER, prix_unitaire REAL, fournisseur TEXT, facture TEXT, exercice TEXT
+            );
+            INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', 2);
+        """)
+        conn.close()
+
+        insert_achat(1, '2024-01-01', 6, 1.5, 'Metro', 'F1', '2024')
+        self.assertEqual(get_article_stock(1), 8)
+        delete_achat(1)
+        self.assertEqual(get_article_stock(1), 2)
+
     def test_apply_inventory_snapshot(self):
         """Test applying an inventory snapshot updates stock and journal."""
         from modules.stock_db import (
@@ -225,6 +371,255 @@ class TestStockJournal(unittest.TestCase):
         
         conn.close()
 
+    def test_apply_inventory_snapshot_repeated_article(self):
+        """A repeated article is journaled against its previous line; NULL stock counts as 0."""
+        from modules.stock_db import (
+            ensure_stock_tables, apply_inventory_snapshot, get_stock
+        )
+
+        conn = get_test_connection(self.test_db)
+        ensure_stock_tables(conn)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', NULL), (2, 'B', 4)")
+        conn.execute(
+            "INSERT INTO buvette_inventaires (id, date_inventaire, type_inventaire) "
+            "VALUES (1, '2024-01-01', 'hors_evenement')"
+        )
+        conn.executemany(
+            "INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite) VALUES (1, ?, ?)",
+            [(1, 3), (2, 6), (1, 5)]
+        )
+        conn.commit()
+
+        apply_inventory_snapshot(conn, 1)
+        conn.commit()
+
+        deltas = conn.execute(
+            "SELECT article_id, delta FROM inventory_stock_journal ORDER BY id"
+        ).fetchall()
+        self.assertEqual([tuple(r) for r in deltas], [(1, 3), (2, 2), (1, 2)])
+        self.assertEqual(get_stock(conn, 1), 5)
+        self.assertEqual(get_stock(conn, 2), 6)
+        conn.close()
+
+    def test_apply_inventory_snapshot_paths_agree(self):
+        """Both snapshot paths give the same result and skip unchanged articles."""
+        from unittest import mock
+        import modules.stock_db as stock_db
+
+        results = []
+        for has_update_from in (True, False):
+            conn = sqlite3.connect(":memory:")
+            conn.executescript("""
+                CREATE TABLE buvette_articles (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER);
+                CREATE TABLE buvette_inventaire_lignes (inventaire_id INTEGER, article_id INTEGER, quantite INTEGER);
+                INSERT INTO buvette_articles VALUES (1, 'A', 2), (2, 'B', NULL), (3, 'C', 4);
+                INSERT INTO buvette_inventaire_lignes VALUES (1, 1, 5), (1, 2, 3), (1, 42, 1), (1, 3, 4);
+            """)
+            stock_db.ensure_stock_tables(conn)
+            with mock.patch.object(stock_db, "_HAS_UPDATE_FROM", has_update_from):
+                stock_db.apply_inventory_snapshot(conn, 1)
+            results.append((
+                conn.execute("SELECT id, stock FROM buvette_articles ORDER BY id").fetchall(),
+                conn.execute("SELECT article_id, delta FROM inventory_stock_journal ORDER BY article_id").fetchall(),
+            ))
+            conn.close()
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0], [(1, 5), (2, 3), (3, 4)])
+        self.assertEqual(results[0][1], [(1, 3), (2, 3), (42, 1)])
+        # 4 distinct ids: the fallback's IN lookup is cached for 4 parameters
+        self.assertIn(4, stock_db._stocks_in_sql_cache)
+
+    def test_set_based_snapshot_pads_to_power_of_two(self):
+        """Padded VALUES rows are deduplicated; SQL is cached per power-of-two size."""
+        import modules.stock_db as stock_db
+
+        self.assertEqual([stock_db._values_bucket(n) for n in (1, 2, 3, 5, 256)], [1, 2, 4, 8, 256])
+
+        conn = sqlite3.connect(":memory:")
+        conn.executescript("""
+            CREATE TABLE buvette_articles (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER);
+            CREATE TABLE buvette_inventaire_lignes (inventaire_id INTEGER, article_id INTEGER, quantite INTEGER);
+        """)
+        stock_db.ensure_stock_tables(conn)
+        conn.executemany("INSERT INTO buvette_articles VALUES (?, 'x', 1)", [(i,) for i in range(1, 6)])
+        stock_db._apply_snapshot_set_based(conn, 1, [(i, i * 10) for i in range(1, 6)])
+
+        self.assertIn(8, stock_db._snapshot_sql_cache)
+        self.assertEqual(
+            conn.execute("SELECT article_id, delta FROM inventory_stock_journal ORDER BY article_id").fetchall(),
+            [(i, i * 10 - 1) for i in range(1, 6)]
+        )
+        self.assertEqual(conn.execute("SELECT SUM(stock) FROM buvette_articles").fetchone()[0], 150)
+        conn.close()
+
+    def test_apply_inventory_snapshot_statement_count_is_bounded(self):
+        """A 500-line inventory is applied with a handful of statements, not 3 per line."""
+        import modules.stock_db as stock_db
+        if not stock_db._HAS_UPDATE_FROM:
+            self.skipTest("SQLite without UPDATE ... FROM")
+
+        conn = get_test_connection(self.test_db)
+        stock_db.ensure_stock_tables(conn)
+        conn.executemany("INSERT INTO buvette_articles (id, name, stock) VALUES (?, 'x', 1)",
+                         [(i,) for i in range(1, 501)])
+        conn.execute(
+            "INSERT INTO buvette_inventaires (id, date_inventaire, type_inventaire) "
+            "VALUES (1, '2024-01-01', 'hors_evenement')"
+        )
+        conn.executemany("INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite) VALUES (1, ?, 2)",
+                         [(i,) for i in range(1, 501)])
+        conn.commit()
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        stock_db.apply_inventory_snapshot(conn, 1)
+        conn.commit()
+
+        self.assertLessEqual(len(statements), 10)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM inventory_stock_journal").fetchone()[0], 500)
+        self.assertEqual(stock_db.get_stock(conn, 500), 2)
+        conn.close()
+
+    def test_executemany_snapshot_reads_stocks_in_bulk(self):
+        """The fallback path reads current stocks with chunked IN lookups, not a SELECT per line."""
+        import modules.stock_db as stock_db
+
+        conn = sqlite3.connect(":memory:")
+        conn.executescript("""
+            CREATE TABLE buvette_articles (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER);
+        """)
+        stock_db.ensure_stock_tables(conn)
+        conn.executemany("INSERT INTO buvette_articles VALUES (?, 'x', 1)", [(i,) for i in range(1, 1201)])
+        snapshot = [(i, 2) for i in range(1, 1201)]
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        changed = stock_db._apply_snapshot_executemany(conn, 1, snapshot, [aid for aid, _ in snapshot])
+
+        self.assertEqual(changed, 1200)
+        lookups = [sql for sql in statements if sql.startswith("SELECT id, COALESCE(stock, 0)")]
+        # 1200 ids in chunks of MAX_IN_PARAMS (500): 3 lookups
+        self.assertEqual(len(lookups), 3)
+        self.assertFalse(any(sql.startswith("SELECT stock FROM") for sql in statements))
+        self.assertEqual(conn.execute("SELECT SUM(stock) FROM buvette_articles").fetchone()[0], 2400)
+        conn.close()
+
+    def test_snapshot_and_revert_commit_on_autocommit_connection(self):
+        """On an autocommit connection each call is its own BEGIN IMMEDIATE ... COMMIT."""
+        from modules.stock_db import (
+            ensure_stock_tables, apply_inventory_snapshot, revert_inventory_effect
+        )
+
+        conn = sqlite3.connect(self.test_db, isolation_level=None)
+        ensure_stock_tables(conn)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', 2)")
+        conn.execute(
+            "INSERT INTO buvette_inventaires (id, date_inventaire, type_inventaire) "
+            "VALUES (1, '2024-01-01', 'hors_evenement')"
+        )
+        conn.execute("INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite) VALUES (1, 1, 9)")
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        apply_inventory_snapshot(conn, 1)
+        self.assertFalse(conn.in_transaction)
+        other = get_test_connection(self.test_db)
+        self.assertEqual(other.execute("SELECT stock FROM buvette_articles WHERE id=1").fetchone()[0], 9)
+
+        revert_inventory_effect(conn, 1)
+        self.assertEqual(other.execute("SELECT stock FROM buvette_articles WHERE id=1").fetchone()[0], 2)
+        self.assertEqual(statements.count("BEGIN IMMEDIATE"), 2)
+        other.close()
+        conn.close()
+
+    def test_stock_change_hooks_fire_after_commit_only(self):
+        """Hooks see the committed stock; a rolled back write notifies nobody."""
+        from modules import stock_db
+        from modules.db_api import transaction
+
+        conn = sqlite3.connect(self.test_db, isolation_level=None)
+        stock_db.ensure_stock_tables(conn)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', 2)")
+        other = get_test_connection(self.test_db)
+        seen = []
+
+        def hook(article_id):
+            seen.append((article_id, other.execute(
+                "SELECT stock FROM buvette_articles WHERE id=1").fetchone()[0]))
+
+        stock_db.register_stock_change_hook(hook)
+        try:
+            with transaction(conn):
+                stock_db.set_stock(conn, 1, 7)
+                stock_db.adjust_stock(conn, 1, 1)
+                stock_db.set_stock(conn, 1, 5)
+                self.assertEqual(seen, [])
+            # One notification per article, reading the committed value
+            self.assertEqual(seen, [(1, 5)])
+
+            with self.assertRaises(RuntimeError):
+                with transaction(conn):
+                    stock_db.set_stock(conn, 1, 9)
+                    raise RuntimeError("abort")
+            self.assertEqual(seen, [(1, 5)])
+
+            # Outside a transaction() block the autocommit write is already visible
+            stock_db.set_stock(conn, 1, 3)
+            self.assertEqual(seen, [(1, 5), (1, 3)])
+        finally:
+            stock_db._stock_change_hooks.remove(hook)
+            other.close()
+            conn.close()
+
+    def test_apply_inventory_snapshot_caches_table_lookup(self):
+        """Candidate line tables are looked up once, until clear_schema_cache()."""
+        from modules.stock_db import ensure_stock_tables, apply_inventory_snapshot, clear_schema_cache
+
+        conn = get_test_connection(self.test_db)
+        ensure_stock_tables(conn)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', 0)")
+        conn.execute(
+            "INSERT INTO buvette_inventaires (id, date_inventaire, type_inventaire) "
+            "VALUES (1, '2024-01-01', 'hors_evenement')"
+        )
+        conn.execute("INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite) VALUES (1, 1, 2)")
+        candidates = ['buvette_inventaire_lignes', 'inventaire_lignes', 'sqlite_master']
+
+        apply_inventory_snapshot(conn, 1, candidates)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        apply_inventory_snapshot(conn, 1, candidates)
+        conn.set_trace_callback(None)
+        self.assertFalse(any("sqlite_master" in sql or "schema_version" in sql for sql in statements))
+
+        # After a migration the cache is cleared: the table created now is used
+        conn.execute("CREATE TABLE inventaire_lignes (inventaire_id INTEGER, article_id INTEGER, quantite INTEGER)")
+        conn.execute("INSERT INTO inventaire_lignes VALUES (1, 1, 7)")
+        clear_schema_cache()
+        apply_inventory_snapshot(conn, 1, candidates)
+        self.assertEqual(conn.execute("SELECT stock FROM buvette_articles WHERE id=1").fetchone()[0], 7)
+        conn.close()
+
+    def test_table_lookup_cache_follows_connection_database(self):
+        """The cache is keyed on the connection's own file, not on APP_DB_PATH."""
+        from modules.stock_db import _resolve_lines_tables
+
+        candidates = ['buvette_inventaire_lignes', 'inventaire_lignes']
+        fd, other_db = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        other = sqlite3.connect(other_db)
+        other.execute("CREATE TABLE inventaire_lignes (inventaire_id INTEGER, article_id INTEGER, quantite INTEGER)")
+        conn = get_test_connection(self.test_db)
+        try:
+            # APP_DB_PATH still names self.test_db for both lookups
+            self.assertEqual(_resolve_lines_tables(conn, candidates), ('buvette_inventaire_lignes',))
+            self.assertEqual(_resolve_lines_tables(other, candidates), ('inventaire_lignes',))
+        finally:
+            conn.close()
+            other.close()
+            os.remove(other_db)
+
     def test_revert_inventory_effect(self):
         """Test reverting inventory effects restores stock."""
         from modules.stock_db import (
@@ -304,11 +699,57 @@ class TestStockJournal(unittest.TestCase):
         
         conn.close()
 
+    def test_revert_subquery_uses_covering_index(self):
+        """The per-article SUM(delta) of a revert is answered from the index alone."""
+        from modules.stock_db import ensure_stock_tables
+
+        conn = get_test_connection(self.test_db)
+        ensure_stock_tables(conn)
+        plan = " ".join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT SUM(delta) FROM inventory_stock_journal "
+            "WHERE inventaire_id=1 AND article_id=2"
+        ))
+        conn.close()
+        self.assertIn("COVERING INDEX idx_isj_inv_article_delta", plan)
+
+    def test_revert_inventory_effect_sums_deltas_and_clamps(self):
+        """Deltas of a repeated article are summed, clamped at 0; net-zero articles are not rewritten."""
+        from modules.stock_db import ensure_stock_tables, revert_inventory_effect, get_stock
+
+        conn = get_test_connection(self.test_db)
+        ensure_stock_tables(conn)
+        conn.execute("INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', 10), (2, 'B', 1), (3, 'C', 7)")
+        conn.execute(
+            "INSERT INTO buvette_inventaires (id, date_inventaire, type_inventaire) "
+            "VALUES (1, '2024-01-01', 'hors_evenement')"
+        )
+        conn.executemany(
+            "INSERT INTO inventory_stock_journal (inventaire_id, article_id, delta) VALUES (?, ?, ?)",
+            [(1, 1, 3), (1, 1, 2), (1, 2, 4), (1, 3, 4), (1, 3, -4)]
+        )
+        conn.commit()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        changes_before = conn.total_changes
+
+        revert_inventory_effect(conn, 1)
+        conn.commit()
+        conn.set_trace_callback(None)
+
+        # Articles 1 and 2 updated, article 3 skipped, 5 journal rows deleted
+        self.assertEqual(conn.total_changes - changes_before, 2 + 5)
+        # One UPDATE and one DELETE whatever the number of journal rows
+        writes = [s.split()[0].upper() for s in statements if s.split()[0].upper() in ("UPDATE", "DELETE")]
+        self.assertEqual(writes, ["UPDATE", "DELETE"])
+        self.assertEqual([get_stock(conn, a) for a in (1, 2, 3)], [5, 0, 7])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM inventory_stock_journal").fetchone()[0], 0)
+        conn.close()
+
     def test_inventory_stock_journal(self):
         """Test retrieving stock journal for an inventory."""
         from modules.stock_db import (
             ensure_stock_tables, apply_inventory_snapshot,
-            inventory_stock_journal
+            inventory_stock_journal, iter_inventory_stock_journal
         )
 
         conn = get_test_connection(self.test_db)
@@ -349,6 +790,7 @@ class TestStockJournal(unittest.TestCase):
         self.assertEqual(journal[0]["article_id"], article_id)
         self.assertEqual(journal[0]["delta"], 7, "Delta should be +7 (12-5)")
         self.assertEqual(journal[0]["article_name"], "Test Article")
+        self.assertEqual(list(iter_inventory_stock_journal(conn, inv_id, batch_size=1)), journal)
         
         conn.close()
 
@@ -388,6 +830,29 @@ class TestStockJournal(unittest.TestCase):
 
         conn.close()
 
+    def test_recompute_stock_for_article_aggregates_in_sql(self):
+        """Signed SUM over movements: unknown types and NULL quantities are neutral, floor at 0."""
+        from modules.stock_db import recompute_stock_for_article, get_stock
+
+        conn = get_test_connection(self.test_db)
+        conn.executescript("""
+            CREATE TABLE buvette_mouvements (
+                id INTEGER PRIMARY KEY, article_id INTEGER, date_mouvement TEXT,
+                type_mouvement TEXT, quantite INTEGER
+            );
+            INSERT INTO buvette_articles (id, name, stock) VALUES (1, 'A', 0), (2, 'B', 7), (3, 'C', 4);
+            INSERT INTO buvette_mouvements (article_id, type_mouvement, quantite) VALUES
+                (1, 'entrée', 10), (1, 'achat', 2), (1, 'inventaire', 1), (1, 'sortie', 4),
+                (1, 'perte', 50), (1, 'entrée', NULL),
+                (2, 'sortie', 3);
+        """)
+
+        self.assertEqual(recompute_stock_for_article(conn, 1), 9)
+        self.assertEqual(recompute_stock_for_article(conn, 2), 0)
+        self.assertEqual(recompute_stock_for_article(conn, 3), 0)
+        self.assertEqual([get_stock(conn, i) for i in (1, 2, 3)], [9, 0, 0])
+        conn.close()
+
     def test_consume_purchase_batches_fifo(self):
         """Test consuming purchase batches in FIFO order."""
         from modules.stock_db import (
@@ -452,6 +917,41 @@ class TestStockJournal(unittest.TestCase):
 
         conn.close()
 
+    def test_estimate_fifo_cost_matches_consume_without_writing(self):
+        """estimate_fifo_cost gives consume's total_cost and leaves the batches untouched."""
+        from modules.stock_db import (
+            ensure_stock_tables, create_purchase_batch,
+            consume_purchase_batches_fifo, estimate_fifo_cost
+        )
+
+        conn = get_test_connection(self.test_db)
+        ensure_stock_tables(conn)
+        article_id = conn.execute(
+            "INSERT INTO buvette_articles (name, stock) VALUES ('Test Article', 0)"
+        ).lastrowid
+        for quantity, unit_price in ((5, 2.0), (10, 3.0), (8, 2.5)):
+            create_purchase_batch(conn, article_id, quantity=quantity, unit_price=unit_price)
+        conn.commit()
+
+        before = conn.execute(
+            "SELECT id, remaining_quantity FROM article_purchase_batches ORDER BY id"
+        ).fetchall()
+        # Within the batches, on a batch boundary, and beyond them (average cost)
+        estimates = [estimate_fifo_cost(conn, article_id, q) for q in (0, 12, 15, 30)]
+        self.assertEqual(estimates[:3], [0.0, 31.0, 40.0])
+        self.assertAlmostEqual(estimates[3], 60.0 * 30 / 23)
+        self.assertEqual(estimate_fifo_cost(conn, article_id, 5, scope='other'), 0.0)
+        self.assertEqual(conn.execute(
+            "SELECT id, remaining_quantity FROM article_purchase_batches ORDER BY id"
+        ).fetchall(), before)
+
+        self.assertEqual(
+            consume_purchase_batches_fifo(conn, article_id, 12)['total_cost'], estimates[1]
+        )
+        # The estimate follows the consumption: 3 units left at 3.0, then 2.5
+        self.assertEqual(estimate_fifo_cost(conn, article_id, 5), 3 * 3.0 + 2 * 2.5)
+        conn.close()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -23,7 +23,7 @@ from lib.db_articles import (
     update_article_purchase_price
 )
 from modules.buvette_inventaire_db import (
-    insert_inventaire,
+    create_inventaire_with_lignes,
     update_inventaire,
     list_events,
     list_lignes_inventaire
@@ -384,21 +384,24 @@ class InventoryLinesDialog(tk.Toplevel):
                 cursor.execute("DELETE FROM buvette_inventaire_lignes WHERE inventaire_id=?", (self.inventory_id,))
                 
                 inv_id = self.inventory_id
+                
+                # Insert all lines in one executemany (with commentaire column for consistency)
+                cursor.executemany("""
+                    INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite, commentaire)
+                    VALUES (?, ?, ?, ?)
+                """, ((inv_id, line["article_id"], line["quantite"], "") for line in self.inventory_lines))
             else:
-                # Insert mode: Create new inventory
-                inv_id = insert_inventaire(date_str, evt_id, type_inv, comment)
+                # Insert mode: header and lines are created in one transaction
+                inv_id = create_inventaire_with_lignes(
+                    date_str, evt_id, type_inv, comment,
+                    ((line["article_id"], line["quantite"], "") for line in self.inventory_lines)
+                )
             
-            # Insert/update inventory lines and update stock
+            # Update stock and purchase prices
             for line in self.inventory_lines:
                 article_id = line["article_id"]
                 quantite = line["quantite"]
                 
-                # Insert line (with commentaire column for consistency)
-                cursor.execute("""
-                    INSERT INTO buvette_inventaire_lignes (inventaire_id, article_id, quantite, commentaire)
-                    VALUES (?, ?, ?, ?)
-                """, (inv_id, article_id, quantite, ""))
-                
                 # Update article stock (stock = quantity counted)
                 update_article_stock(article_id, quantite)
                 
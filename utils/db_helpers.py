@@ -5,6 +5,32 @@ This module provides utility functions for working with database results,
 particularly for safely handling sqlite3.Row objects.
 """
 
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def _make_converter(keys):
+    """
+    Build a function turning one result tuple into a dict for these column names.
+    
+    When a name appears more than once (e.g. a join selecting two ``id``
+    columns), the first column wins, as with dict(sqlite3.Row). One
+    converter is cached per distinct column tuple, i.e. per query shape.
+    
+    Args:
+        keys: tuple of column names (as in cursor.description)
+        
+    Returns:
+        callable: row -> dict
+    """
+    if len(set(keys)) == len(keys):
+        return lambda r: dict(zip(keys, r))
+    first = {}
+    for i, key in enumerate(keys):
+        first.setdefault(key, i)
+    names, positions = tuple(first), tuple(first.values())
+    return lambda r: dict(zip(names, [r[i] for i in positions]))
+
 
 def row_to_dict(row):
     """
@@ -35,9 +61,12 @@ def rows_to_dicts(rows):
     Convert list of sqlite3.Row objects to list of dicts.
     
     This is a batch version of row_to_dict() for converting multiple rows.
+    Column names are read once from the first row and each row goes through
+    the converter cached for that column tuple (see _make_converter),
+    instead of letting dict(row) walk row.keys() for every row.
     
     Args:
-        rows: list of sqlite3.Row objects
+        rows: list of sqlite3.Row objects (rows that are already dicts are copied)
         
     Returns:
         list of dicts: List of dictionary representations
@@ -48,7 +77,107 @@ def rows_to_dicts(rows):
         >>> for d in dicts:
         >>>     print(d.get('optional_column', 'N/A'))
     """
-    return [dict(row) for row in rows]
+    if not isinstance(rows, list):
+        rows = list(rows)
+    if not rows:
+        return []
+    first = rows[0]
+    if isinstance(first, dict) or not hasattr(first, 'keys'):
+        return [dict(row) for row in rows]
+    convert = _make_converter(tuple(first.keys()))
+    return [convert(row) for row in rows]
+
+
+def iter_dicts(cursor, batch_size=500):
+    """
+    Stream the rows of an executed cursor as dicts, one fetchmany() batch at a time.
+    
+    Unlike rows_to_dicts(cursor.fetchall()), only one batch of rows is held
+    in memory, and the caller may stop iterating early.
+    
+    Args:
+        cursor: cursor on which execute() has been called
+        batch_size: number of rows fetched per fetchmany() call
+        
+    Yields:
+        dict: one dictionary per row, keyed by the cursor's column names
+        
+    Example:
+        >>> cursor = conn.execute("SELECT * FROM table")
+        >>> for d in iter_dicts(cursor):
+        >>>     print(d.get('optional_column', 'N/A'))
+    """
+    if cursor.description is None:
+        return
+    convert = _make_converter(tuple(col[0] for col in cursor.description))
+    # Rows are converted into dicts directly: skip the sqlite3.Row wrapper
+    cursor.row_factory = None
+    cursor.arraysize = batch_size
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            break
+        for row in batch:
+            yield convert(row)
+
+
+def fetch_dicts(conn, sql, params=()):
+    """
+    Execute a query and return its rows as a list of dicts.
+    
+    Equivalent to rows_to_dicts(conn.execute(sql, params).fetchall()) but
+    rows are fetched as plain tuples (no sqlite3.Row object per row) and
+    converted with the cached converter for cursor.description.
+    
+    Args:
+        conn: sqlite3 connection
+        sql: query to execute
+        params: query parameters
+        
+    Returns:
+        list of dicts: one dictionary per row
+        
+    Example:
+        >>> rows = fetch_dicts(conn, "SELECT * FROM table WHERE id > ?", (10,))
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    if cursor.description is None:
+        return []
+    convert = _make_converter(tuple(col[0] for col in cursor.description))
+    return [convert(row) for row in cursor.fetchall()]
+
+
+# Bound parameters per statement for IN (...) lookups; well below
+# SQLITE_MAX_VARIABLE_NUMBER (999 on SQLite builds older than 3.32).
+MAX_IN_PARAMS = 500
+
+
+def iter_chunks(values, size=MAX_IN_PARAMS):
+    """
+    Split values into lists of at most `size` items, for batched IN (...) queries.
+    
+    Args:
+        values: iterable of parameter values (duplicates are kept)
+        size: maximum number of items per chunk
+        
+    Yields:
+        list: consecutive chunks of values
+        
+    Example:
+        >>> for chunk in iter_chunks(ids):
+        >>>     placeholders = ",".join("?" * len(chunk))
+        >>>     conn.execute(f"SELECT * FROM t WHERE id IN ({placeholders})", chunk)
+    """
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 
 def row_get_safe(row, key, default=None):